@@ -0,0 +1,200 @@
+"""
+Registry of each user's open UserSession.
+
+The hot path asks the registry for the user's session id instead of querying
+UserSession. Opening and closing a session are written through to the
+database immediately. A session with no activity for SESSION_IDLE_MINUTES is
+closed, either when the user comes back or by the periodic sweep, and the
+next message opens a new one. After a restart (or in another worker
+process), the first lookup for a user adopts their open session from the
+database if it is still fresh.
+"""
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Set
+
+from sqlalchemy import func
+from sqlmodel import Session, select, desc
+
+from database import engine
+import metrics
+from models import ChatMessage, UserSession
+
+logger = logging.getLogger(__name__)
+
+SESSION_IDLE_MINUTES = float(os.getenv("SESSION_IDLE_MINUTES", "30"))
+SESSION_SWEEP_SECONDS = float(os.getenv("SESSION_SWEEP_SECONDS", "60"))
+SESSION_REGISTRY_SIZE = int(os.getenv("SESSION_REGISTRY_SIZE", "10000"))
+
+
+@dataclass
+class ActiveSession:
+    session_id: int
+    started_at: datetime
+    last_activity: datetime
+
+
+_active: "OrderedDict[int, ActiveSession]" = OrderedDict()
+_sweeper: Optional[asyncio.Task] = None
+_stats = {"hits": 0, "adopted": 0, "opened": 0, "closed": 0}
+
+
+def _idle_limit() -> timedelta:
+    return timedelta(minutes=SESSION_IDLE_MINUTES)
+
+
+def _remember(user_id: int, entry: ActiveSession):
+    _active[user_id] = entry
+    _active.move_to_end(user_id)
+    while len(_active) > SESSION_REGISTRY_SIZE:
+        # Forgetting an entry is safe: the session stays open in the database and is adopted again
+        _active.popitem(last=False)
+
+
+def close_sessions(session: Session, session_ids: Dict[int, datetime]):
+    """Mark sessions ended at their last activity and store their message totals, committing `session`"""
+    if not session_ids:
+        return
+    totals = {
+        sid: (count, avg)
+        for sid, count, avg in session.exec(
+            select(ChatMessage.session_id, func.count(ChatMessage.id), func.avg(ChatMessage.sentiment_score))
+            .where(ChatMessage.session_id.in_(list(session_ids)), ChatMessage.sender == "user")
+            .group_by(ChatMessage.session_id)
+        ).all()
+    }
+    for row in session.exec(select(UserSession).where(UserSession.id.in_(list(session_ids)))).all():
+        count, avg = totals.get(row.id, (0, 0.0))
+        row.session_end = session_ids[row.id]
+        row.total_messages = count
+        row.average_sentiment = avg or 0.0
+    session.commit()
+
+
+def _adopt(user_id: int, session: Session, now: datetime) -> Optional[ActiveSession]:
+    """Pick up the user's open session from the database, closing it if it went idle"""
+    row = session.exec(
+        select(UserSession)
+        .where(UserSession.user_id == user_id, UserSession.session_end == None)
+        .order_by(desc(UserSession.session_start))
+    ).first()
+    if not row:
+        return None
+    last_message = session.exec(
+        select(func.max(ChatMessage.timestamp)).where(ChatMessage.session_id == row.id)
+    ).one()
+    entry = ActiveSession(row.id, row.session_start, max(row.session_start, last_message or row.session_start))
+    if now - entry.last_activity > _idle_limit():
+        close_sessions(session, {row.id: entry.last_activity})
+        _stats["closed"] += 1
+        return None
+    _stats["adopted"] += 1
+    return entry
+
+
+def current(user_id: int, session: Session) -> Optional[int]:
+    """The user's open session id, or None; never opens one"""
+    now = datetime.utcnow()
+    entry = _active.get(user_id)
+    if entry is not None:
+        if now - entry.last_activity <= _idle_limit():
+            _stats["hits"] += 1
+            _active.move_to_end(user_id)
+            return entry.session_id
+        del _active[user_id]
+        close_sessions(session, {entry.session_id: entry.last_activity})
+        _stats["closed"] += 1
+    entry = _adopt(user_id, session, now)
+    if entry is None:
+        return None
+    _remember(user_id, entry)
+    return entry.session_id
+
+
+def get_or_open(user_id: int, session: Session) -> int:
+    """The user's open session id, opening (and committing) a new session if needed"""
+    session_id = current(user_id, session)
+    now = datetime.utcnow()
+    if session_id is None:
+        row = UserSession(user_id=user_id, session_start=now)
+        session.add(row)
+        session.commit()
+        session.refresh(row)
+        _stats["opened"] += 1
+        _remember(user_id, ActiveSession(row.id, now, now))
+        return row.id
+    _active[user_id].last_activity = now
+    return session_id
+
+
+def _close_orphans(session: Session, cutoff: datetime, registered: Set[int], limit: int = 500) -> int:
+    """Close idle sessions left open in the database by restarts, other processes or older code"""
+    rows = session.exec(
+        select(UserSession.id, UserSession.session_start, func.max(ChatMessage.timestamp))
+        .join(ChatMessage, ChatMessage.session_id == UserSession.id, isouter=True)
+        .where(UserSession.session_end == None, UserSession.session_start < cutoff)
+        .group_by(UserSession.id)
+        .order_by(UserSession.session_start)
+        .limit(limit)
+    ).all()
+    stale = {
+        sid: last or start
+        for sid, start, last in rows
+        if sid not in registered and (last or start) < cutoff
+    }
+    close_sessions(session, stale)
+    return len(stale)
+
+
+def _close_idle(idle: Dict[int, datetime], cutoff: datetime, registered: Set[int]) -> int:
+    # Runs on a worker thread; touches only the database, never the registry
+    with Session(engine) as session:
+        close_sessions(session, idle)
+        return len(idle) + _close_orphans(session, cutoff, registered)
+
+
+async def sweep() -> int:
+    """Close every session that has gone idle"""
+    cutoff = datetime.utcnow() - _idle_limit()
+    idle = {uid: e for uid, e in _active.items() if e.last_activity < cutoff}
+    for user_id in idle:
+        del _active[user_id]
+    registered = {e.session_id for e in _active.values()}
+    closed = await asyncio.to_thread(
+        _close_idle, {e.session_id: e.last_activity for e in idle.values()}, cutoff, registered
+    )
+    _stats["closed"] += closed
+    return closed
+
+
+async def _sweep_forever():
+    while True:
+        await asyncio.sleep(SESSION_SWEEP_SECONDS)
+        try:
+            await sweep()
+        except Exception:
+            logger.exception("Closing idle sessions failed")
+
+
+def start():
+    global _sweeper
+    _sweeper = asyncio.create_task(_sweep_forever())
+
+
+async def stop():
+    global _sweeper
+    if _sweeper is not None:
+        _sweeper.cancel()
+        await asyncio.gather(_sweeper, return_exceptions=True)
+        _sweeper = None
+
+
+def stats() -> dict:
+    return {**_stats, "active": len(_active)}
+
+
+metrics.register("active_sessions", stats)
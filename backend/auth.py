@@ -1,13 +1,22 @@
 from passlib.context import CryptContext
 from jose import jwt, JWTError
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from fastapi import Depends, HTTPException, Request
-from sqlmodel import Session
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from models import User
-from database import get_session
+from database import async_engine
 from dotenv import load_dotenv
+import asyncio
+import functools
+import metrics
 import os
+import threading
+import time
 
 # Load environment variables
 load_dotenv()
@@ -19,12 +28,29 @@ if not SECRET_KEY:
 
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+# Comma-separated emails of the users allowed to call admin endpoints
+ADMIN_EMAILS = {email.strip().lower() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()}
+# Verified tokens and their users are kept this long, so most requests skip the JWT check and the database
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+# bcrypt work factor; stored hashes with a different cost are rehashed on the next successful login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Threads hashing passwords (bcrypt releases the GIL) and how many hashes may wait for them
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "256"))  # 0 means unbounded
 
 # Type assertions for the type checker
 assert SECRET_KEY is not None
 assert ALGORITHM is not None
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    # Any other cost counts as outdated, so lowering BCRYPT_ROUNDS also rehashes
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -32,6 +58,101 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+
+_hash_pool: Optional[ThreadPoolExecutor] = None
+_hash_lock = threading.Lock()
+_hash_stats = {"hashed": 0, "rehashed": 0, "rejected": 0, "waiting": 0, "running": 0,
+               "queue_seconds": 0.0, "max_queue_seconds": 0.0, "hash_seconds": 0.0}
+
+
+def _run_timed(submitted: float, fn, *args):
+    started = time.monotonic()
+    with _hash_lock:
+        _hash_stats["waiting"] -= 1
+        _hash_stats["running"] += 1
+        _hash_stats["queue_seconds"] += started - submitted
+        _hash_stats["max_queue_seconds"] = max(_hash_stats["max_queue_seconds"], started - submitted)
+    try:
+        return fn(*args)
+    finally:
+        with _hash_lock:
+            _hash_stats["running"] -= 1
+            _hash_stats["hashed"] += 1
+            _hash_stats["hash_seconds"] += time.monotonic() - started
+
+
+def _dropped_before_start(future):
+    if future.cancelled():
+        with _hash_lock:
+            _hash_stats["waiting"] -= 1
+
+
+async def _offload(fn, *args):
+    """
+    Run a bcrypt call on the password pool. A burst of sign-ins then uses at
+    most PASSWORD_HASH_WORKERS cores and leaves the event loop and the request
+    threadpool free for everything else.
+    """
+    global _hash_pool
+    with _hash_lock:
+        if PASSWORD_HASH_MAX_QUEUE and _hash_stats["waiting"] >= PASSWORD_HASH_MAX_QUEUE:
+            _hash_stats["rejected"] += 1
+            raise HTTPException(status_code=503, detail="Too many sign-ins at once, please try again shortly",
+                                headers={"Retry-After": "1"})
+        _hash_stats["waiting"] += 1
+    if _hash_pool is None:
+        _hash_pool = ThreadPoolExecutor(PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+    future = _hash_pool.submit(_run_timed, time.monotonic(), fn, *args)
+    future.add_done_callback(_dropped_before_start)
+    return await asyncio.wrap_future(future)
+
+
+@functools.lru_cache(maxsize=None)
+def _context_for_rounds(rounds: int) -> CryptContext:
+    return pwd_context.copy(bcrypt__rounds=rounds, bcrypt__min_rounds=rounds, bcrypt__max_rounds=rounds)
+
+
+async def hash_password_offloaded(password: str, rounds: Optional[int] = None) -> str:
+    """
+    Hash on the password pool. A rounds other than BCRYPT_ROUNDS stores a hash
+    that is brought to BCRYPT_ROUNDS at the user's first login
+    """
+    if rounds is None or rounds == BCRYPT_ROUNDS:
+        return await _offload(hash_password, password)
+    return await _offload(_context_for_rounds(rounds).hash, password)
+
+
+async def verify_password_offloaded(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """(matches, new hash to store when the stored one uses another bcrypt cost, else None)"""
+    valid, new_hash = await _offload(pwd_context.verify_and_update, plain_password, hashed_password)
+    if new_hash:
+        with _hash_lock:
+            _hash_stats["rehashed"] += 1
+    return valid, new_hash
+
+
+def shutdown_password_pool():
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(wait=False, cancel_futures=True)
+        _hash_pool = None
+
+
+def _hash_metrics() -> dict:
+    with _hash_lock:
+        stats = dict(_hash_stats)
+    done = stats["hashed"] or 1
+    return {
+        "hashed": stats["hashed"], "rehashed": stats["rehashed"], "rejected": stats["rejected"],
+        "waiting": stats["waiting"], "running": stats["running"],
+        "avg_queue_ms": round(stats["queue_seconds"] / done * 1000, 1),
+        "max_queue_ms": round(stats["max_queue_seconds"] * 1000, 1),
+        "avg_hash_ms": round(stats["hash_seconds"] / done * 1000, 1),
+    }
+
+
+metrics.register("password_hashing", _hash_metrics)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
@@ -45,15 +166,129 @@ def decode_access_token(token: str):
     except JWTError:
         return None
 
-def get_current_user(request: Request, session: Session = Depends(get_session)) -> User:
-    auth = request.headers.get("authorization")
-    if not auth or not auth.lower().startswith("bearer "):
-        raise HTTPException(status_code=401, detail="Missing or invalid token")
-    token = auth.split()[1]
+_cache_lock = threading.Lock()  # profile updates can commit on the threadpool
+_tokens: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()  # token -> (good until, user id)
+_users: "OrderedDict[int, Tuple[float, User]]" = OrderedDict()  # user id -> (good until, detached row)
+_stats = {"hits": 0, "token_misses": 0, "user_misses": 0}
+
+
+def _count(stat: str):
+    with _cache_lock:
+        _stats[stat] += 1
+
+
+def _cache_get(cache: OrderedDict, key):
+    with _cache_lock:
+        entry = cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del cache[key]
+            return None
+        cache.move_to_end(key)
+        return entry[1]
+
+
+def _cache_put(cache: OrderedDict, key, value, good_until: float):
+    with _cache_lock:
+        cache[key] = (good_until, value)
+        cache.move_to_end(key)
+        while len(cache) > AUTH_CACHE_SIZE:
+            cache.popitem(last=False)
+
+
+def forget_user(user_id: int):
+    """Drop a cached user row so the next request reads it again"""
+    with _cache_lock:
+        _users.pop(user_id, None)
+
+
+def clear_auth_cache():
+    with _cache_lock:
+        _tokens.clear()
+        _users.clear()
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_changed(mapper, connection, target):
+    # Flushed, not yet committed: a request reading the row now would cache the old
+    # version again, so the entry is dropped once the transaction commits
+    session = object_session(target)
+    if session is None:
+        forget_user(target.id)
+    else:
+        session.info.setdefault("changed_users", set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _forget_committed_users(session):
+    for user_id in session.info.pop("changed_users", ()):
+        forget_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_users(session):
+    session.info.pop("changed_users", None)
+
+
+def _verified_user_id(token: str) -> int:
+    user_id = _cache_get(_tokens, token)
+    if user_id is not None:
+        return user_id
+    _count("token_misses")
     payload = decode_access_token(token)
     if not payload or "user_id" not in payload:
         raise HTTPException(status_code=401, detail="Invalid token")
-    user = session.get(User, payload["user_id"])
+    # Never trust a cached token past its own expiry
+    remaining = payload["exp"] - time.time() if "exp" in payload else AUTH_CACHE_TTL_SECONDS
+    _cache_put(_tokens, token, payload["user_id"], time.monotonic() + min(AUTH_CACHE_TTL_SECONDS, remaining))
+    return payload["user_id"]
+
+
+def optional_user_id(request: Request) -> Optional[int]:
+    """The user id of a valid bearer token, or None; for endpoints that also serve anonymous callers"""
+    auth = request.headers.get("authorization")
+    if not auth or not auth.lower().startswith("bearer "):
+        return None
+    try:
+        return _verified_user_id(auth.split()[1])
+    except HTTPException:
+        return None
+
+
+async def get_current_user(request: Request) -> User:
+    """
+    The user the bearer token belongs to. Both the verified token and the user
+    row are cached for AUTH_CACHE_TTL_SECONDS; the row is dropped as soon as a
+    change to it commits in this process. Each caller gets its own detached
+    copy, so changing it does not touch the cache (and is not saved).
+    """
+    auth = request.headers.get("authorization")
+    if not auth or not auth.lower().startswith("bearer "):
+        raise HTTPException(status_code=401, detail="Missing or invalid token")
+    user_id = _verified_user_id(auth.split()[1])
+    user = _cache_get(_users, user_id)
+    if user is not None:
+        _count("hits")
+        return User.model_validate(user)
+    _count("user_misses")
+    async with AsyncSession(async_engine) as session:
+        user = await session.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return user 
\ No newline at end of file
+    _cache_put(_users, user_id, user, time.monotonic() + AUTH_CACHE_TTL_SECONDS)
+    return User.model_validate(user)
+
+
+def _auth_metrics() -> dict:
+    with _cache_lock:
+        return {**_stats, "tokens": len(_tokens), "users": len(_users)}
+
+
+metrics.register("auth", _auth_metrics)
+
+def require_admin(user: User = Depends(get_current_user)) -> User:
+    if user.email.lower() not in ADMIN_EMAILS:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return user
@@ -0,0 +1,142 @@
+"""
+Mixed-endpoint throughput of the database-backed async routers.
+
+Seeds --users learners with chat history and emotional trends, serves the app
+with uvicorn, and runs closed-loop clients (each sends its next request as soon
+as the previous one returns) over a mix of analytics, personalization and
+research endpoints at each --concurrency level. A probe hits GET / every 50 ms
+alongside the load: with synchronous queries inside async endpoints it waits
+behind every query on the event loop.
+
+To compare against another checkout (for example the commit before the async
+port), point --backend at its backend directory:
+
+    git worktree add /tmp/before <commit>
+    python benchmarks/bench_async_db.py --backend /tmp/before/backend
+    python benchmarks/bench_async_db.py
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+import harness
+from loadgen import Stats, percentile
+
+MIX = [
+    (4, "GET", "/analytics/learning-summary"),
+    (2, "GET", "/analytics/emotional-trends?days=30"),
+    (2, "GET", "/personalization/learning-style"),
+    (1, "POST", "/personalization/bookmarks"),
+    (1, "GET", "/personalization/session-state"),
+    (2, "GET", "/research/learning-progress/{user_id}"),
+]
+
+
+def seed(users: int, history: int) -> list:
+    """Create learners with chat history; returns (user_id, auth headers) pairs"""
+    from sqlmodel import Session
+
+    from auth import create_access_token
+    from database import create_db_and_tables, engine
+    from models import ChatMessage, EmotionalTrend, User, UserSession
+
+    create_db_and_tables()
+    learners = []
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        for u in range(users):
+            user = User(name=f"Learner {u}", email=f"learner{u}@example.com", hashed_password="x")
+            session.add(user)
+            session.flush()
+            chat = UserSession(user_id=user.id, session_start=now - timedelta(hours=2), session_end=now)
+            session.add(chat)
+            session.flush()
+            for i in range(history):
+                when = now - timedelta(minutes=history - i)
+                score = random.uniform(-1, 1)
+                session.add(ChatMessage(
+                    session_id=chat.id, user_id=user.id, message=f"question {i} about graphs", sender="user",
+                    sentiment_score=score, emotion_category="neutral", topic="Graphs", timestamp=when,
+                ))
+                session.add(EmotionalTrend(
+                    session_id=chat.id, user_id=user.id, sentiment_score=score,
+                    emotion_category="neutral", topic="Graphs", timestamp=when,
+                ))
+            token = create_access_token({"user_id": user.id})
+            learners.append((user.id, {"Authorization": f"Bearer {token}"}))
+        session.commit()
+    return learners
+
+
+async def client_loop(client, stats, learners, stop_at):
+    weights = [w for w, _, _ in MIX]
+    while time.perf_counter() < stop_at:
+        _, method, path = random.choices(MIX, weights)[0]
+        user_id, headers = random.choice(learners)
+        kwargs = {"json": {"title": "Dijkstra notes", "tags": ["graphs"]}} if method == "POST" else {}
+        started = time.perf_counter()
+        try:
+            r = await client.request(method, path.format(user_id=user_id), headers=headers, **kwargs)
+            ok = r.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        stats.record("mixed", time.perf_counter() - started, ok)
+
+
+async def probe(client, stats, stop_at):
+    while time.perf_counter() < stop_at:
+        started = time.perf_counter()
+        r = await client.get("/")
+        stats.record("probe GET /", time.perf_counter() - started, r.status_code == 200)
+        await asyncio.sleep(0.05)
+
+
+async def run(url, learners, concurrency, duration):
+    stats = Stats()
+    limits = httpx.Limits(max_connections=concurrency + 1)
+    async with httpx.AsyncClient(base_url=url, timeout=60, limits=limits) as client:
+        stop_at = time.perf_counter() + duration
+        await asyncio.gather(
+            probe(client, stats, stop_at),
+            *(client_loop(client, stats, learners, stop_at) for _ in range(concurrency)),
+        )
+    mixed = sorted(stats.latencies["mixed"])
+    probes = sorted(stats.latencies["probe GET /"])
+    print(
+        f"{concurrency:>11} {len(mixed) / duration:>7.1f} {percentile(mixed, 50) * 1000:>7.0f} "
+        f"{percentile(mixed, 99) * 1000:>7.0f} {stats.errors['mixed']:>6} "
+        f"{percentile(probes, 50) * 1000:>9.0f} {percentile(probes, 99) * 1000:>9.0f}"
+    )
+
+
+def main(args):
+    random.seed(3)
+    learners = seed(args.users, args.history)
+    from main import app
+
+    url = harness.serve_in_thread(app)
+    print(f"backend: {os.path.dirname(sys.modules['main'].__file__)}")
+    print(f"{'concurrency':>11} {'req/s':>7} {'p50 ms':>7} {'p99 ms':>7} {'errors':>6} {'probe p50':>9} {'probe p99':>9}")
+    for concurrency in args.concurrency:
+        asyncio.run(run(url, learners, concurrency, args.duration))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", help="backend directory to import the app from (default: this checkout)")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--history", type=int, default=300, help="chat messages and trends per learner")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--duration", type=float, default=15, help="seconds per concurrency level")
+    args = parser.parse_args()
+
+    if args.backend:
+        sys.path.insert(0, os.path.abspath(args.backend))
+    harness.use_temp_backend_env("http://127.0.0.1:9/v1")
+    main(args)
@@ -0,0 +1,95 @@
+"""
+Per-request cost of authenticating a bearer token.
+
+Registers one user in a fresh SQLite database, then measures:
+
+  - the auth dependency called on its own, --calls times with the same token,
+    in microseconds per call and database statements per call,
+  - GET /users/me end to end through the in-process TestClient, --requests times.
+
+To compare against another checkout, point --backend at its backend directory:
+
+    git worktree add /tmp/before <commit>
+    python benchmarks/bench_auth.py --backend /tmp/before/backend
+    python benchmarks/bench_auth.py
+"""
+import argparse
+import asyncio
+import inspect
+import os
+import statistics
+import sys
+import time
+
+import harness
+
+
+def dependency_cost(get_current_user, token: str, calls: int) -> float:
+    """Seconds per call of the auth dependency, however this checkout declares it"""
+    from sqlmodel import Session
+    from starlette.requests import Request
+
+    from database import engine
+
+    request = Request({"type": "http", "headers": [(b"authorization", f"Bearer {token}".encode())]})
+    if inspect.iscoroutinefunction(get_current_user):
+        async def run():
+            started = time.perf_counter()
+            for _ in range(calls):
+                await get_current_user(request)
+            return time.perf_counter() - started
+        return asyncio.run(run()) / calls
+    # One Session per request, as get_session hands out
+    started = time.perf_counter()
+    for _ in range(calls):
+        with Session(engine) as session:
+            get_current_user(request, session)
+    return (time.perf_counter() - started) / calls
+
+
+def main(args):
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+
+    import auth
+    from database import async_engine, create_db_and_tables, engine
+    from main import app
+
+    print(f"backend: {os.path.dirname(sys.modules['auth'].__file__)}")
+    create_db_and_tables()
+    statements = [0]
+    for e in (engine, async_engine.sync_engine):
+        event.listen(e, "before_cursor_execute", lambda *_: statements.__setitem__(0, statements[0] + 1))
+
+    with TestClient(app) as client:
+        user = {"name": "Bench", "email": "bench@example.com", "password": "bench-password"}
+        client.post("/users/register", json=user)
+        token = client.post("/users/login", json=user).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        dependency_cost(auth.get_current_user, token, 10)  # warm up
+        statements[0] = 0
+        per_call = dependency_cost(auth.get_current_user, token, args.calls)
+        print(f"get_current_user: {per_call * 1e6:8.1f} us/call   {statements[0] / args.calls:.2f} statements/call")
+
+        samples = []
+        statements[0] = 0
+        for _ in range(args.requests):
+            started = time.perf_counter()
+            client.get("/users/me", headers=headers).raise_for_status()
+            samples.append(time.perf_counter() - started)
+        print(f"GET /users/me:    {statistics.median(samples) * 1e6:8.1f} us median   "
+              f"{statements[0] / args.requests:.2f} statements/request")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", help="backend directory to import the app from (default: this checkout)")
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+
+    if args.backend:
+        sys.path.insert(0, os.path.abspath(args.backend))
+    harness.use_temp_backend_env("http://127.0.0.1:9/v1")
+    main(args)
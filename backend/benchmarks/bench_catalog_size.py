@@ -0,0 +1,79 @@
+"""
+Database size and in-memory footprint of the question catalog.
+
+Imports --problems problems, each offered in Python, C++ and JavaScript, into a
+fresh SQLite database with question_import (descriptions, solutions and
+examples are the seeded catalog's, cycled). It then reports:
+
+  - the database file size after VACUUM, and the bytes used by each catalog table,
+  - Python memory held by every catalog row loaded at once, as a catalog cache would.
+
+To compare against another checkout, point --backend at its backend directory:
+
+    git worktree add /tmp/before <commit>
+    python benchmarks/bench_catalog_size.py --backend /tmp/before/backend
+    python benchmarks/bench_catalog_size.py
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import tracemalloc
+
+import harness
+
+LANGUAGES = ["Python", "C++", "JavaScript"]
+CATALOG_TABLES = ["problem", "question"]
+
+
+def catalog_file(problems: int) -> io.StringIO:
+    with open(os.path.join(harness.BACKEND_DIR, "data", "questions.json")) as f:
+        seeded = json.load(f)["questions"]
+    lines = io.StringIO()
+    for i in range(problems):
+        base = seeded[i % len(seeded)]
+        for language in LANGUAGES:
+            lines.write(json.dumps({**base, "title": f"{base['title']} #{i}", "language": language}) + "\n")
+    lines.seek(0)
+    return lines
+
+
+def main(args):
+    from sqlalchemy import inspect, text
+
+    import question_import
+    from database import create_db_and_tables, engine
+
+    print(f"backend: {os.path.dirname(sys.modules['database'].__file__)}")
+    create_db_and_tables()
+    report = question_import.import_questions(catalog_file(args.problems), "jsonl")
+    print(f"imported {report['rows']} rows ({args.problems} problems x {len(LANGUAGES)} languages)")
+
+    tables = [t for t in CATALOG_TABLES if t in inspect(engine).get_table_names()]
+    with engine.connect() as conn:
+        conn.execute(text("VACUUM"))
+        for table in tables:
+            rows = conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+            size = conn.execute(text("SELECT SUM(pgsize) FROM dbstat WHERE name = :t"), {"t": table}).scalar()
+            print(f"  {table:<10} {rows:>8} rows {size / 2**20:>8.2f} MiB")
+
+    tracemalloc.start()
+    with engine.connect() as conn:
+        cache = [[tuple(row) for row in conn.execute(text(f"SELECT * FROM {table}"))] for table in tables]
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"database file: {os.path.getsize('dsa_gpt.db') / 2**20:.2f} MiB")
+    print(f"catalog rows in memory: {held / 2**20:.2f} MiB ({sum(len(rows) for rows in cache)} rows)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", help="backend directory to import the app from (default: this checkout)")
+    parser.add_argument("--problems", type=int, default=10_000)
+    args = parser.parse_args()
+
+    if args.backend:
+        sys.path.insert(0, os.path.abspath(args.backend))
+    harness.use_temp_backend_env("http://127.0.0.1:9/v1")
+    main(args)
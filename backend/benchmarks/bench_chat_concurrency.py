@@ -0,0 +1,59 @@
+"""
+Concurrent /chat/message throughput against a local fake LLM.
+
+Every request waits --latency seconds on the fake upstream. With a non-blocking
+LLM client throughput grows with the number of in-flight requests; with a
+blocking client it stays flat at roughly 1 / latency.
+
+    python benchmarks/bench_chat_concurrency.py --latency 0.2 --levels 1 4 16 64
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+import fake_llm
+import harness
+
+
+async def run_level(client: httpx.AsyncClient, headers: dict, in_flight: int, rounds: int):
+    latencies = []
+
+    async def worker():
+        for _ in range(rounds):
+            started = time.perf_counter()
+            r = await client.post("/chat/message", json={"message": "How do two pointers work?"}, headers=headers)
+            r.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(in_flight)))
+    elapsed = time.perf_counter() - started
+    return len(latencies), elapsed, sum(latencies) / len(latencies)
+
+
+async def main(args):
+    from main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            headers = await harness.login(client)
+
+            print(f"fake LLM latency: {args.latency:.3f}s")
+            print(f"{'in-flight':>10} {'requests':>9} {'seconds':>8} {'req/s':>8} {'mean lat':>9}")
+            for level in args.levels:
+                count, elapsed, mean = await run_level(client, headers, level, args.rounds)
+                print(f"{level:>10} {count:>9} {elapsed:>8.2f} {count / elapsed:>8.1f} {mean:>8.3f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--rounds", type=int, default=3, help="requests per in-flight worker")
+    args = parser.parse_args()
+
+    harness.use_temp_backend_env(fake_llm.start_in_thread(latency=args.latency))
+    asyncio.run(main(args))
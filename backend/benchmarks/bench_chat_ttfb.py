@@ -0,0 +1,55 @@
+"""
+Time-to-first-byte of /chat/message versus /chat/message/stream.
+
+The blocking endpoint cannot send anything until the whole completion is back,
+while the streaming endpoint sends sentiment metadata before calling the LLM.
+
+    python benchmarks/bench_chat_ttfb.py --latency 2.0 --requests 5
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+import fake_llm
+import harness
+
+
+async def measure(client: httpx.AsyncClient, path: str, headers: dict):
+    started = time.perf_counter()
+    async with client.stream("POST", path, json={"message": "Explain binary search"}, headers=headers) as r:
+        r.raise_for_status()
+        first_byte = None
+        async for _ in r.aiter_bytes():
+            if first_byte is None:
+                first_byte = time.perf_counter() - started
+    return first_byte, time.perf_counter() - started
+
+
+async def main(args):
+    from main import app
+
+    # Serve over a real socket: the in-process ASGI transport buffers whole responses
+    base_url = harness.serve_in_thread(app)
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+        headers = await harness.login(client)
+
+        print(f"fake LLM latency: {args.latency:.3f}s")
+        print(f"{'endpoint':<22} {'ttfb p50':>9} {'total p50':>10}")
+        for path in ("/chat/message", "/chat/message/stream"):
+            samples = [await measure(client, path, headers) for _ in range(args.requests)]
+            ttfb = statistics.median(s[0] for s in samples)
+            total = statistics.median(s[1] for s in samples)
+            print(f"{path:<22} {ttfb * 1000:>7.0f}ms {total * 1000:>8.0f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=2.0)
+    parser.add_argument("--requests", type=int, default=5)
+    args = parser.parse_args()
+
+    harness.use_temp_backend_env(fake_llm.start_in_thread(latency=args.latency))
+    asyncio.run(main(args))
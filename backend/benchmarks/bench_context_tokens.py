@@ -0,0 +1,91 @@
+"""
+Prompt tokens per chat turn as a session grows.
+
+Plays a long session through start_turn/finish_turn (no LLM involved; the bot
+replies are synthetic and long, as real tutor replies are) and reports the
+estimated prompt size of the token-budgeted context next to the old recipe
+(the five oldest of the user's last ten messages, unbounded), plus the time
+taken to build the context. Every --paste-every turns the student pastes a
+long code block.
+
+    python benchmarks/bench_context_tokens.py --turns 200
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import harness
+
+QUESTIONS = [
+    "How does a stack differ from a queue?",
+    "I'm confused, why is binary search O(log n)?",
+    "Can you show me how to reverse a linked list step by step? " * 3,
+    "What is memoization and when should I use it in dynamic programming?",
+    "Thanks! Can you give me a harder graph problem to practice?",
+]
+REPLY = ("Great question! Let's walk through it carefully. " * 8).strip()
+# Students regularly paste their whole solution into the chat
+PASTE = "Here is my code, why does it fail?\n" + "    for i in range(len(nums)):\n        total += nums[i]\n" * 80
+
+
+def legacy_tokens(session, user, system_prompt_tokens, message):
+    """Prompt size under the previous recipe"""
+    from sqlmodel import select, desc
+
+    from llm import estimate_tokens
+    from models import ChatMessage
+
+    recent = session.exec(
+        select(ChatMessage).where(ChatMessage.user_id == user.id).order_by(desc(ChatMessage.timestamp)).limit(10)
+    ).all()
+    history = [{"content": m.message} for m in recent[-5:]] + [{"content": message}]
+    return system_prompt_tokens + estimate_tokens(history)
+
+
+async def main(args):
+    from sqlmodel import Session
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+    from database import async_engine, create_db_and_tables, engine
+    from llm import estimate_tokens
+    from models import User
+    from routers.gpt_chat import ChatRequest, finish_turn, start_turn
+
+    create_db_and_tables()
+    random.seed(7)
+    async with AsyncSession(async_engine, expire_on_commit=False) as chat_session:
+        with Session(engine) as session:
+            user = User(name="Bench", email="context@example.com", hashed_password="x")
+            session.add(user)
+            session.commit()
+            session.refresh(user)
+
+            print(f"{'turn':>5} {'budgeted':>9} {'legacy':>7} {'build ms':>9}")
+            totals = {"budgeted": 0, "legacy": 0}
+            for i in range(1, args.turns + 1):
+                message = PASTE if i % args.paste_every == 0 else random.choice(QUESTIONS)
+                topic = random.choice(["Stacks", "Graphs", "Dynamic Programming", None])
+                started = time.perf_counter()
+                turn = await start_turn(ChatRequest(message=message, topic=topic), user, chat_session)
+                build_ms = (time.perf_counter() - started) * 1000
+                budgeted = estimate_tokens(turn.llm_messages)
+                legacy = legacy_tokens(session, user, estimate_tokens(turn.llm_messages[:1]), message)
+                await finish_turn(turn, " ".join([REPLY] * random.randint(1, 3)))
+                totals["budgeted"] += budgeted
+                totals["legacy"] += legacy
+                if i in (1, 2, 5) or i % args.every == 0:
+                    print(f"{i:>5} {budgeted:>9} {legacy:>7} {build_ms:>9.1f}")
+            print(f"total prompt tokens over {args.turns} turns: "
+                  f"budgeted {totals['budgeted']}, legacy {totals['legacy']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--every", type=int, default=25, help="print every N turns")
+    parser.add_argument("--paste-every", type=int, default=10, help="send a pasted code block every N turns")
+    args = parser.parse_args()
+
+    harness.use_temp_backend_env("http://127.0.0.1:9/v1")
+    asyncio.run(main(args))
@@ -0,0 +1,107 @@
+"""
+Chat-row insert throughput: per-request commits vs the group-commit writer.
+
+Each simulated chat turn stores a ChatMessage (durable) and an EmotionalTrend
+(telemetry). The "direct" mode commits both in its own transaction from a
+worker thread, as a sync handler would; "writer" awaits db_writer.write for
+the message and queues the trend with write_nowait. For each level of
+concurrency it reports turns/s, latency percentiles and failed turns
+("database is locked").
+
+    python benchmarks/bench_db_writer.py --writers 10 100 1000 --turns 3000
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import harness
+
+
+def percentile(samples, p):
+    return samples[min(len(samples) - 1, int(len(samples) * p / 100))] if samples else 0.0
+
+
+def rows(user_id, i):
+    from models import ChatMessage, EmotionalTrend
+
+    message = ChatMessage(
+        session_id=None, user_id=user_id, message=f"message {i}", sender="user",
+        sentiment_score=0.1, emotion_category="neutral", topic="Graphs",
+    )
+    trend = EmotionalTrend(session_id=None, user_id=user_id, sentiment_score=0.1, emotion_category="neutral")
+    return message, trend
+
+
+def direct_turn(user_id, i):
+    from sqlmodel import Session
+
+    from database import engine
+
+    message, trend = rows(user_id, i)
+    with Session(engine) as session:
+        session.add(message)
+        session.add(trend)
+        session.commit()
+
+
+async def writer_turn(user_id, i):
+    import db_writer
+
+    message, trend = rows(user_id, i)
+    await db_writer.write(message)
+    db_writer.write_nowait(trend)
+
+
+async def run(mode, writers, turns):
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=writers)
+    latencies, failures = [], 0
+    per_writer = max(1, turns // writers)
+
+    async def writer(user_id):
+        nonlocal failures
+        for i in range(per_writer):
+            started = time.perf_counter()
+            try:
+                if mode == "direct":
+                    await loop.run_in_executor(executor, direct_turn, user_id, i)
+                else:
+                    await writer_turn(user_id, i)
+                latencies.append(time.perf_counter() - started)
+            except Exception:
+                failures += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(writer(u) for u in range(1, writers + 1)))
+    elapsed = time.perf_counter() - started
+    executor.shutdown()
+    latencies.sort()
+    return len(latencies) / elapsed, percentile(latencies, 50), percentile(latencies, 99), failures
+
+
+async def main(args):
+    import db_writer
+    from database import create_db_and_tables
+
+    create_db_and_tables()
+    print(f"{'mode':<7} {'writers':>7} {'turns/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'failed':>7}")
+    for writers in args.writers:
+        for mode in ("direct", "writer"):
+            if mode == "writer":
+                db_writer.start()
+            rate, p50, p99, failed = await run(mode, writers, args.turns)
+            if mode == "writer":
+                await db_writer.stop()
+            print(f"{mode:<7} {writers:>7} {rate:>8.0f} {p50 * 1000:>8.1f} {p99 * 1000:>8.1f} {failed:>7}")
+    print("writer stats:", db_writer.stats())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--turns", type=int, default=3000, help="chat turns per run, split across the writers")
+    args = parser.parse_args()
+
+    harness.use_temp_backend_env("http://127.0.0.1:9/v1")
+    asyncio.run(main(args))
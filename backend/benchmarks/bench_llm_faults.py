@@ -0,0 +1,92 @@
+"""
+Chat behaviour while the LLM upstream misbehaves.
+
+Runs /chat/message against the fake LLM through a series of fault phases
+(healthy, flaky, down, hanging, recovered) and reports latency, degraded
+replies and the transport counters from /metrics for each phase.
+
+    python benchmarks/bench_llm_faults.py --requests 40 --concurrency 8
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import httpx
+
+import fake_llm
+import harness
+
+PHASES = [
+    ("healthy", {"error_rate": 0.0, "hang_rate": 0.0}),
+    ("flaky 30%", {"error_rate": 0.3, "hang_rate": 0.0}),
+    ("down", {"error_rate": 1.0, "hang_rate": 0.0}),
+    ("hanging 20%", {"error_rate": 0.0, "hang_rate": 0.2}),
+    ("recovered", {"error_rate": 0.0, "hang_rate": 0.0}),
+]
+COUNTERS = ["upstream_calls", "retries", "errors", "deadline_exceeded", "short_circuited", "breaker_opened"]
+
+
+async def run_phase(client, headers, args):
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies, degraded, failed = [], 0, 0
+
+    async def one(i):
+        nonlocal degraded, failed
+        async with semaphore:
+            started = time.perf_counter()
+            # Distinct messages so single-flight coalescing doesn't hide upstream calls
+            r = await client.post("/chat/message", json={"message": f"Explain two pointers ({i})"}, headers=headers)
+            latencies.append(time.perf_counter() - started)
+            if r.status_code != 200:
+                failed += 1
+            elif r.json().get("degraded"):
+                degraded += 1
+
+    await asyncio.gather(*(one(i) for i in range(args.requests)))
+    latencies.sort()
+    return {
+        "p50_ms": statistics.median(latencies) * 1000,
+        "max_ms": latencies[-1] * 1000,
+        "degraded": degraded,
+        "failed": failed,
+    }
+
+
+async def main(args, llm_url):
+    from main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client, \
+                httpx.AsyncClient(base_url=llm_url.rsplit("/v1", 1)[0]) as llm_admin:
+            headers = await harness.login(client)
+            print(f"{'phase':<12} {'p50 ms':>8} {'max ms':>8} {'degraded':>9} {'failed':>7}  transport")
+            for name, faults in PHASES:
+                await llm_admin.post("/faults", json=faults)
+                before = (await client.get("/metrics")).json()["llm"]
+                if before["breaker_state"] == "open":
+                    # Let the cooldown pass so the next phase starts with a half-open probe
+                    await asyncio.sleep(args.cooldown)
+                result = await run_phase(client, headers, args)
+                after = (await client.get("/metrics")).json()["llm"]
+                deltas = " ".join(f"{k}={after[k] - before[k]}" for k in COUNTERS)
+                print(f"{name:<12} {result['p50_ms']:>8.0f} {result['max_ms']:>8.0f} "
+                      f"{result['degraded']:>9} {result['failed']:>7}  {deltas} breaker={after['breaker_state']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=40, help="chat messages per phase")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--deadline", type=float, default=2.0, help="LLM_DEADLINE for the backend")
+    parser.add_argument("--cooldown", type=float, default=2.0, help="LLM_BREAKER_COOLDOWN for the backend")
+    args = parser.parse_args()
+
+    os.environ["LLM_DEADLINE"] = str(args.deadline)
+    os.environ["LLM_BREAKER_COOLDOWN"] = str(args.cooldown)
+    llm_url = fake_llm.start_in_thread(latency=args.latency)
+    harness.use_temp_backend_env(llm_url)
+    asyncio.run(main(args, llm_url))
@@ -0,0 +1,101 @@
+"""
+Interactive chat latency while background LLM work saturates the token budget.
+
+A burst of quiz and prefetch requests (and one chatty heavy user) larger than
+the budget is queued at once, then light users send chat messages at a steady
+pace. Once the light users are done, whatever is still queued is cancelled.
+The run is repeated with every request in one FIFO class and with the priority
+scheduler, and latencies are reported for both.
+
+    python benchmarks/bench_llm_scheduler.py --tpm 6000 --background 150
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import fake_llm
+import harness
+
+
+async def scenario(args, prioritized: bool):
+    import llm
+    from llm_scheduler import INTERACTIVE, PREFETCH, QUIZ, Scheduler
+
+    llm.scheduler = Scheduler(args.tpm, 0, args.reserve if prioritized else 0.0)
+    light, heavy, background = [], [], []
+    failed = {}
+
+    async def call(bucket, i, priority, user_id):
+        messages = [{"role": "user", "content": f"Explain stacks, request {i} ({priority}, {user_id})"}]
+        started = time.perf_counter()
+        try:
+            await llm.chat_completion(
+                messages,
+                max_tokens=args.max_tokens,
+                temperature=0.7,
+                priority=priority if prioritized else INTERACTIVE,
+                user_id=user_id if prioritized else None,
+                deadline=args.deadline,
+            )
+        except llm.LLMUnavailable:
+            failed[id(bucket)] = failed.get(id(bucket), 0) + 1
+            return
+        bucket.append(time.perf_counter() - started)
+
+    flood = []
+    for i in range(args.background):
+        # User 1 floods quiz generation; prefetch work has no user
+        priority, user_id = (QUIZ, 1) if i % 2 else (PREFETCH, None)
+        flood.append(asyncio.create_task(call(background, i, priority, user_id)))
+    for i in range(args.background // 3):
+        flood.append(asyncio.create_task(call(heavy, i, INTERACTIVE, 1)))
+    await asyncio.sleep(0.5)
+
+    chats = []
+    for round_ in range(args.rounds):
+        for user_id in range(2, 2 + args.light_users):
+            chats.append(asyncio.create_task(call(light, f"{round_}-{user_id}", INTERACTIVE, user_id)))
+        await asyncio.sleep(args.interval)
+    await asyncio.gather(*chats)
+
+    for task in flood:
+        task.cancel()
+    await asyncio.gather(*flood, return_exceptions=True)
+    return [(samples, failed.get(id(samples), 0)) for samples in (light, heavy, background)]
+
+
+def describe(result):
+    samples, failed = result
+    if not samples:
+        return f"   0 calls  {failed} missed the deadline"
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return (f"{len(samples):>4} calls  p50 {statistics.median(samples) * 1000:>7.0f} ms  "
+            f"p95 {p95 * 1000:>7.0f} ms  {failed} missed the deadline")
+
+
+async def main(args):
+    for name, prioritized in (("fifo", False), ("scheduled", True)):
+        light, heavy, background = await scenario(args, prioritized)
+        print(f"[{name}]")
+        print(f"  light users, chat:    {describe(light)}")
+        print(f"  heavy user, chat:     {describe(heavy)}  (completed before cancel)")
+        print(f"  quiz + prefetch:      {describe(background)}  (completed before cancel)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tpm", type=int, default=6000, help="tokens-per-minute budget")
+    parser.add_argument("--reserve", type=float, default=0.2, help="share of the budget kept for chat")
+    parser.add_argument("--max-tokens", type=int, default=50)
+    parser.add_argument("--background", type=int, default=150, help="queued quiz + prefetch requests")
+    parser.add_argument("--light-users", type=int, default=2)
+    parser.add_argument("--rounds", type=int, default=6)
+    parser.add_argument("--interval", type=float, default=2.0, help="seconds between light-user rounds")
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--deadline", type=float, default=10.0, help="per-call LLM deadline")
+    args = parser.parse_args()
+
+    harness.use_temp_backend_env(fake_llm.start_in_thread(latency=args.latency))
+    asyncio.run(main(args))
@@ -0,0 +1,102 @@
+"""
+A class-start login burst and what it does to the rest of the API.
+
+Creates --users accounts sharing one password hashed at --rounds, then fires
+--logins concurrent POST /users/login requests spread over them, twice:
+
+  - on its own, for login throughput and latency,
+  - alongside a probe requesting GET /questions/ every --probe-interval
+    seconds, for the latency the rest of the API sees during the burst.
+
+To compare against another checkout, point --backend at its backend directory:
+
+    git worktree add /tmp/before <commit>
+    python benchmarks/bench_login.py --backend /tmp/before/backend
+    python benchmarks/bench_login.py
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+import harness
+
+PASSWORD = "bench-password"
+
+
+def percentile(samples: list, share: float) -> float:
+    return sorted(samples)[min(len(samples) - 1, int(len(samples) * share))] * 1000
+
+
+async def main(args):
+    from passlib.context import CryptContext
+    from sqlmodel import Session
+
+    from database import engine
+    from main import app
+    from models import User
+
+    async with app.router.lifespan_context(app):
+        hashed = CryptContext(schemes=["bcrypt"], bcrypt__rounds=args.rounds).hash(PASSWORD)
+        with Session(engine) as session:
+            session.add_all(User(name=f"Student {i}", email=f"student{i}@example.com", hashed_password=hashed)
+                            for i in range(args.users))
+            session.commit()
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            await client.get("/questions/")
+
+            async def login(i: int) -> float:
+                started = time.perf_counter()
+                r = await client.post("/users/login", json={"email": f"student{i % args.users}@example.com",
+                                                             "password": PASSWORD})
+                r.raise_for_status()
+                return time.perf_counter() - started
+
+            async def burst() -> list:
+                return await asyncio.gather(*(login(i) for i in range(args.logins)))
+
+            async def probed_request(probes: list):
+                started = time.perf_counter()
+                (await client.get("/questions/")).raise_for_status()
+                probes.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            logins = await burst()
+            elapsed = time.perf_counter() - started
+
+            probes = []
+            running = asyncio.create_task(burst())
+            pending = []
+            while not running.done():
+                pending.append(asyncio.create_task(probed_request(probes)))
+                await asyncio.sleep(args.probe_interval)
+            await asyncio.gather(running, *pending)
+
+    print(f"backend: {os.path.dirname(sys.modules['auth'].__file__)}   "
+          f"bcrypt rounds {args.rounds}, {os.cpu_count()} CPUs")
+    print(f"{args.logins} logins in {elapsed:.2f}s: {args.logins / elapsed:.1f} logins/s, "
+          f"p50 {percentile(logins, 0.5):.0f} ms, p95 {percentile(logins, 0.95):.0f} ms")
+    print(f"GET /questions/ during a burst: {len(probes)} requests, "
+          f"p50 {statistics.median(probes) * 1000:.1f} ms, p95 {percentile(probes, 0.95):.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", help="backend directory to import the app from (default: this checkout)")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--probe-interval", type=float, default=0.1)
+    parser.add_argument("--rounds", type=int, default=10, help="BCRYPT_ROUNDS for the run")
+    args = parser.parse_args()
+
+    if args.backend:
+        sys.path.insert(0, os.path.abspath(args.backend))
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    harness.use_temp_backend_env("http://127.0.0.1:9/v1")
+    asyncio.run(main(args))
@@ -0,0 +1,47 @@
+"""
+A lecture-start burst: many students open the same question at once.
+
+Fires --students concurrent /ai/question-detail requests for one uncached
+problem and reports how many upstream LLM calls were made (from /metrics).
+
+    python benchmarks/bench_question_detail_burst.py --students 50 --latency 1.0
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+import fake_llm
+import harness
+
+
+async def main(args):
+    from main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            body = {"title": "Binary Search", "description": "Find a target in a sorted array."}
+            before = (await client.get("/metrics")).json()["llm"]
+            started = time.perf_counter()
+            responses = await asyncio.gather(
+                *(client.post("/ai/question-detail", json=body) for _ in range(args.students))
+            )
+            elapsed = time.perf_counter() - started
+            after = (await client.get("/metrics")).json()["llm"]
+
+            ok = sum(1 for r in responses if r.status_code == 200)
+            print(f"{args.students} concurrent requests, {ok} ok, {elapsed:.2f}s")
+            print(f"upstream LLM calls: {after['upstream_calls'] - before['upstream_calls']}")
+            print(f"coalesced callers:  {after['coalesced'] - before['coalesced']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=1.0)
+    args = parser.parse_args()
+
+    harness.use_temp_backend_env(fake_llm.start_in_thread(latency=args.latency))
+    asyncio.run(main(args))
@@ -0,0 +1,180 @@
+"""
+Throughput and memory of the bulk question importer.
+
+Writes --rows generated questions (with a sprinkling of invalid rows and
+repeated titles) to JSONL and CSV files, then imports them into a fresh
+SQLite database:
+
+  - from the CLI path (question_import.import_questions on the open file),
+  - through POST /questions/import, streaming the file as the request body,
+  - and, for scale, row-at-a-time ORM inserts with a commit each (the way the
+    routers write), timed on --naive-rows rows.
+
+Peak Python memory of the CLI path is measured with tracemalloc at two file
+sizes to show it does not grow with the file.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import random
+import time
+import tracemalloc
+
+import httpx
+
+import harness
+
+DIFFICULTIES = ["basic", "intermediate", "advanced"]
+LANGUAGES = ["Python", "C++", "JavaScript"]
+
+
+def generate(rows: int):
+    """Yield question records; about 1% are invalid and 1% repeat an earlier title"""
+    for i in range(rows):
+        n = random.randrange(i) if i and random.random() < 0.01 else i
+        record = {
+            "title": f"Generated problem {n}",
+            "description": f"Solve generated problem {n}. " * 8,
+            "difficulty": random.choice(DIFFICULTIES),
+            "language": LANGUAGES[n % 3],
+            "solution": "Use a hash map.",
+            "examples": json.dumps([{"input": str(n), "output": str(n * 2), "explanation": "Doubles it."}]),
+        }
+        roll = random.random()
+        if roll < 0.005:
+            record["examples"] = "[{not json"
+        elif roll < 0.01:
+            record["difficulty"] = "legendary"
+        yield record
+
+
+def write_files(directory: str, rows: int) -> dict:
+    paths = {"jsonl": os.path.join(directory, f"questions-{rows}.jsonl"),
+             "csv": os.path.join(directory, f"questions-{rows}.csv")}
+    random.seed(rows)
+    with open(paths["jsonl"], "w") as jsonl, open(paths["csv"], "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["title", "description", "difficulty", "language", "solution", "examples"])
+        writer.writeheader()
+        for record in generate(rows):
+            jsonl.write(json.dumps(record) + "\n")
+            writer.writerow(record)
+    return paths
+
+
+def reset():
+    from sqlmodel import delete, Session
+
+    from database import engine
+    from models import Problem, Question
+
+    with Session(engine) as session:
+        session.exec(delete(Question))
+        session.exec(delete(Problem))
+        session.commit()
+
+
+def run_cli(path: str, fmt: str) -> dict:
+    import question_import
+
+    reset()
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        return question_import.import_questions(f, fmt)
+
+
+def peak_memory(path: str, fmt: str) -> float:
+    tracemalloc.start()
+    run_cli(path, fmt)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 2**20
+
+
+async def run_http(url: str, headers: dict, path: str, fmt: str) -> dict:
+    reset()
+
+    async def body():
+        with open(path, "rb") as f:
+            while chunk := f.read(64 * 1024):
+                yield chunk
+
+    async with httpx.AsyncClient(base_url=url, timeout=600) as client:
+        r = await client.post(f"/questions/import?format={fmt}", content=body(), headers=headers)
+        r.raise_for_status()
+        return r.json()
+
+
+def run_naive(path: str, rows: int) -> float:
+    """Row-at-a-time ORM inserts with a commit each; returns rows/s"""
+    from sqlmodel import Session
+
+    import question_import
+    from database import engine
+    from models import Problem, Question
+
+    reset()
+    seen, problem_ids = set(), {}
+    started = time.perf_counter()
+    with open(path) as f, Session(engine) as session:
+        for line, _ in zip(f, range(rows)):
+            try:
+                row = question_import.validate(json.loads(line))
+            except ValueError:
+                continue
+            language = row.pop("language")
+            if (row["title"], language) in seen:
+                continue
+            seen.add((row["title"], language))
+            if row["title"] not in problem_ids:
+                problem = Problem(**row)
+                session.add(problem)
+                session.flush()
+                problem_ids[row["title"]] = problem.id
+            session.add(Question(problem_id=problem_ids[row["title"]], language=language))
+            session.commit()
+    return rows / (time.perf_counter() - started)
+
+
+def line(label: str, report: dict):
+    print(f"{label:<22} {report['rows']:>8} {report['upserted']:>9} {report['duplicates']:>6} "
+          f"{report['invalid']:>8} {report['seconds']:>8.2f} {report['rows_per_sec']:>9}")
+
+
+def main(args):
+    os.environ["ADMIN_EMAILS"] = "bench@example.com"
+    from database import create_db_and_tables
+    from main import app
+
+    create_db_and_tables()
+    directory = os.getcwd()
+    paths = write_files(directory, args.rows)
+    print(f"{'':<22} {'rows':>8} {'upserted':>9} {'dupes':>6} {'invalid':>8} {'seconds':>8} {'rows/s':>9}")
+    for fmt in ("jsonl", "csv"):
+        line(f"cli {fmt}", run_cli(paths[fmt], fmt))
+
+    url = harness.serve_in_thread(app)
+
+    async def http():
+        async with httpx.AsyncClient(base_url=url) as client:
+            headers = await harness.login(client)
+        for fmt in ("jsonl", "csv"):
+            line(f"POST /import {fmt}", await run_http(url, headers, paths[fmt], fmt))
+
+    asyncio.run(http())
+    print(f"\nrow-at-a-time ORM commits: {run_naive(paths['jsonl'], args.naive_rows):.0f} rows/s "
+          f"(on {args.naive_rows} rows)")
+
+    small = write_files(directory, args.rows // 10)
+    print(f"peak traced memory, cli jsonl: {peak_memory(small['jsonl'], 'jsonl'):.1f} MiB at {args.rows // 10} rows, "
+          f"{peak_memory(paths['jsonl'], 'jsonl'):.1f} MiB at {args.rows} rows")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--naive-rows", type=int, default=2000)
+    args = parser.parse_args()
+
+    harness.use_temp_backend_env("http://127.0.0.1:9/v1")
+    main(args)
@@ -0,0 +1,94 @@
+"""
+Cost of one GET /questions page as the catalog grows.
+
+For each --problems size, imports that many problems (three languages each)
+into a fresh SQLite database and times GET /questions/ requests in-process:
+the first page unfiltered and filtered by language, and, where the endpoint
+pages with a cursor, a page near the end of the catalog.
+
+To compare against another checkout, point --backend at its backend directory:
+
+    git worktree add /tmp/before <commit>
+    python benchmarks/bench_questions_page.py --backend /tmp/before/backend
+    python benchmarks/bench_questions_page.py
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import time
+
+import harness
+
+LANGUAGES = ["Python", "C++", "JavaScript"]
+DIFFICULTIES = ["basic", "intermediate", "advanced"]
+
+
+def catalog_file(start: int, stop: int) -> io.StringIO:
+    lines = io.StringIO()
+    for i in range(start, stop):
+        for language in LANGUAGES:
+            lines.write(json.dumps({
+                "title": f"Problem {i}", "description": f"Solve problem {i}. " * 10,
+                "difficulty": DIFFICULTIES[i % 3], "language": language,
+                "solution": "Use a hash map.", "examples": [{"input": str(i), "output": str(i)}],
+            }) + "\n")
+    lines.seek(0)
+    return lines
+
+
+def timed(client, url: str, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        r = client.get(url)
+        samples.append(time.perf_counter() - started)
+        assert r.status_code == 200, r.text
+    return statistics.median(samples) * 1000
+
+
+def last_cursor(client, url: str):
+    """Walk to the final page 100 rows at a time; returns the cursor that fetches it (None without paging)"""
+    cursor = previous = None
+    while True:
+        r = client.get(url + ("&" if "?" in url else "?") + "limit=100" + (f"&cursor={cursor}" if cursor else ""))
+        if "X-Next-Cursor" not in r.headers:
+            return previous
+        previous, cursor = cursor, r.headers["X-Next-Cursor"]
+
+
+def main(args):
+    from fastapi.testclient import TestClient
+
+    import question_import
+    from database import create_db_and_tables
+    from main import app
+
+    print(f"backend: {os.path.dirname(sys.modules['main'].__file__)}   (median ms of {args.runs} requests)")
+    print(f"{'problems':>9} {'first page':>11} {'?language=':>11} {'last page':>10}")
+    create_db_and_tables()
+    loaded = 0
+    with TestClient(app) as client:
+        for size in args.problems:
+            question_import.import_questions(catalog_file(loaded, size), "jsonl")
+            loaded = size
+            first = timed(client, "/questions/", args.runs)
+            by_language = timed(client, "/questions/?language=Python", args.runs)
+            cursor = last_cursor(client, "/questions/")
+            deep = f"{timed(client, f'/questions/?cursor={cursor}', args.runs):>10.2f}" if cursor else f"{'n/a':>10}"
+            print(f"{size:>9} {first:>11.2f} {by_language:>11.2f} {deep}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", help="backend directory to import the app from (default: this checkout)")
+    parser.add_argument("--problems", type=int, nargs="+", default=[1_000, 10_000, 30_000])
+    parser.add_argument("--runs", type=int, default=30)
+    args = parser.parse_args()
+
+    if args.backend:
+        sys.path.insert(0, os.path.abspath(args.backend))
+    harness.use_temp_backend_env("http://127.0.0.1:9/v1")
+    main(args)
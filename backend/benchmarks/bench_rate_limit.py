@@ -0,0 +1,101 @@
+"""
+Overhead of the login rate limiter.
+
+Times rate_limit.admit_login on its own, --calls times per pattern:
+
+  - "same client": one IP and one email, with the limits raised so every call is allowed,
+  - "new clients": a different IP and email each call, so every call adds buckets
+    and, past --max-keys, evicts the oldest,
+  - "limited": one email that is already over its limit, so every call is refused.
+
+It also reports the memory held per tracked key, and how many bcrypt hashes
+--stuffing login attempts against one account cost through the app.
+
+    python benchmarks/bench_rate_limit.py
+"""
+import argparse
+import asyncio
+import os
+import time
+import tracemalloc
+
+import harness
+
+
+class FakeRequest:
+    """Just enough of a Starlette request for client_ip()"""
+
+    def __init__(self, host: str = "203.0.113.7"):
+        self.client = type("client", (), {"host": host})
+
+
+async def per_call(calls: int, admit) -> float:
+    started = time.perf_counter()
+    for i in range(calls):
+        try:
+            await admit(i)
+        except Exception:
+            pass
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+async def main(args):
+    import httpx
+
+    import rate_limit
+    from main import app
+
+    rate_limit.LOGIN_LIMIT_PER_IP = rate_limit.LOGIN_LIMIT_PER_EMAIL = 10 ** 9
+    rate_limit.set_store(rate_limit.MemoryStore(args.max_keys))
+    request = FakeRequest()
+    same = await per_call(args.calls, lambda i: rate_limit.admit_login(request, "student@example.com"))
+    requests = [FakeRequest(f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}") for i in range(args.calls)]
+    new = await per_call(args.calls, lambda i: rate_limit.admit_login(requests[i], f"student{i}@example.com"))
+
+    rate_limit.LOGIN_LIMIT_PER_EMAIL = 1
+    await rate_limit.admit_login(request, "victim@example.com")
+    limited = await per_call(args.calls, lambda i: rate_limit.admit_login(request, "victim@example.com"))
+
+    print(f"admit_login, us/call over {args.calls} calls:")
+    print(f"  same client  {same:6.2f}")
+    print(f"  new clients  {new:6.2f}   (store capped at {args.max_keys} keys)")
+    print(f"  limited      {limited:6.2f}")
+
+    tracemalloc.start()
+    store = rate_limit.MemoryStore(args.max_keys)
+    for i in range(args.max_keys):
+        await store.take(f"login:email:student{i}@example.com", 10, 60)
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"memory: {held / len(store):.0f} bytes per key, {held / 2**20:.1f} MiB for {len(store)} keys")
+
+    # Credential stuffing against one account, through the app with default limits
+    rate_limit.LOGIN_LIMIT_PER_IP, rate_limit.LOGIN_LIMIT_PER_EMAIL = args.ip_limit, args.email_limit
+    rate_limit.set_store(rate_limit.MemoryStore())
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            user = {"name": "Victim", "email": "victim@example.com", "password": "right-password"}
+            await client.post("/users/register", json=user)
+            before = (await client.get("/metrics")).json()["password_hashing"]["hashed"]
+            codes = [
+                (await client.post("/users/login", json={"email": user["email"], "password": f"guess{i}"})).status_code
+                for i in range(args.stuffing)
+            ]
+            hashed = (await client.get("/metrics")).json()["password_hashing"]["hashed"] - before
+    print(f"{args.stuffing} wrong-password logins for one email: {codes.count(401)} answered 401, "
+          f"{codes.count(429)} refused with 429, {hashed} bcrypt hashes")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--max-keys", type=int, default=100_000)
+    parser.add_argument("--stuffing", type=int, default=500)
+    parser.add_argument("--ip-limit", type=int, default=120)
+    parser.add_argument("--email-limit", type=int, default=10)
+    args = parser.parse_args()
+
+    os.environ.setdefault("BCRYPT_ROUNDS", "4")
+    harness.use_temp_backend_env("http://127.0.0.1:9/v1")
+    asyncio.run(main(args))
@@ -0,0 +1,90 @@
+"""
+Onboarding a class: one POST /users/register per student vs one roster upload.
+
+Generates --students students and signs them up into a fresh SQLite database
+twice, with BCRYPT_ROUNDS set to --rounds:
+
+  - "register loop": POST /users/register for each student in turn, as a script
+    against the single-user endpoint would,
+  - "roster": the same students as one CSV to POST /users/roster.
+
+For each it reports wall time, students per second and database statements.
+bcrypt dominates both, so the roster path scales with PASSWORD_HASH_WORKERS
+(one per CPU by default). --roster-rounds imports at a lower cost that each
+student's first login raises to --rounds.
+
+    python benchmarks/bench_roster_import.py --students 1000 --rounds 10
+"""
+import argparse
+import asyncio
+import csv
+import io
+import os
+import time
+
+import httpx
+
+import harness
+
+
+def roster(students: int, prefix: str) -> str:
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["name", "email", "password"])
+    for i in range(students):
+        writer.writerow([f"Student {i}", f"{prefix}{i}@school.example", f"password-{i}"])
+    return out.getvalue()
+
+
+async def main(args):
+    from sqlalchemy import event
+
+    import auth
+    from database import async_engine, engine
+    from main import app
+
+    statements = [0]
+    for e in (engine, async_engine.sync_engine):
+        event.listen(e, "before_cursor_execute", lambda *_: statements.__setitem__(0, statements[0] + 1))
+
+    print(f"{args.students} students, bcrypt rounds {args.rounds} (roster {args.roster_rounds or args.rounds}), "
+          f"{auth.PASSWORD_HASH_WORKERS} hashing threads, {os.cpu_count()} CPUs")
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            admin = await harness.login(client, "admin@school.example")
+
+            statements[0] = 0
+            started = time.perf_counter()
+            for i in range(args.students):
+                r = await client.post("/users/register", json={
+                    "name": f"Student {i}", "email": f"loop{i}@school.example", "password": f"password-{i}",
+                })
+                r.raise_for_status()
+            report("register loop", args.students, time.perf_counter() - started, statements[0])
+
+            statements[0] = 0
+            started = time.perf_counter()
+            r = await client.post("/users/roster", content=roster(args.students, "roster"),
+                                  headers={**admin, "Content-Type": "text/csv"})
+            r.raise_for_status()
+            assert r.json()["created"] == args.students, r.json()
+            report("roster", args.students, time.perf_counter() - started, statements[0])
+
+
+def report(label: str, students: int, seconds: float, statements: int):
+    print(f"  {label:<14} {seconds:7.2f} s  {students / seconds:7.1f} students/s  {statements:6} statements")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=10, help="BCRYPT_ROUNDS for the run")
+    parser.add_argument("--roster-rounds", type=int, help="ROSTER_BCRYPT_ROUNDS (default: --rounds)")
+    args = parser.parse_args()
+
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    os.environ["ROSTER_BCRYPT_ROUNDS"] = str(args.roster_rounds or args.rounds)
+    os.environ["ADMIN_EMAILS"] = "admin@school.example"
+    harness.use_temp_backend_env("http://127.0.0.1:9/v1")
+    asyncio.run(main(args))
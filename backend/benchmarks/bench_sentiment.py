@@ -0,0 +1,75 @@
+"""
+Cost of sentiment scoring per chat turn.
+
+Builds a stream of --messages student messages: a --repeated share drawn from a
+list of short phrases students send again and again (with varying spacing),
+the rest unique sentences. Times routers.sentiment.analyze_sentiment over the
+stream, and checks every result against plain VADER scoring.
+
+To compare against another checkout, point --backend at its backend directory:
+
+    git worktree add /tmp/before <commit>
+    python benchmarks/bench_sentiment.py --backend /tmp/before/backend
+    python benchmarks/bench_sentiment.py
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import harness
+
+PHRASES = [
+    "ok", "okay", "thanks", "thank you!", "yes", "no", "I don't get it", "I'm confused", "got it",
+    "that makes sense", "can you explain again?", "what?", "hmm", "cool", "this is hard", "I'm stuck",
+    "great, thanks!", "not sure", "why?", "next question please",
+]
+TOPICS = ["arrays", "linked lists", "binary trees", "graphs", "dynamic programming", "heaps", "sorting"]
+
+
+def messages(count: int, repeated: float, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    out = []
+    for i in range(count):
+        if rng.random() < repeated:
+            phrase = rng.choice(PHRASES)
+            out.append(rng.choice(["{}", " {}", "{} ", "{}\n"]).format(phrase))
+        else:
+            out.append(f"I'm working on {rng.choice(TOPICS)} problem {i} and I think the recursion "
+                       f"is {rng.choice(['wrong', 'fine', 'confusing', 'really elegant'])}, can you check?")
+    return out
+
+
+def main(args):
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+    import metrics
+    from routers.sentiment import SentimentRequest, analyze_sentiment
+
+    stream = messages(args.messages, args.repeated)
+    requests = [SentimentRequest(message=m) for m in stream]
+    started = time.perf_counter()
+    results = [analyze_sentiment(r) for r in requests]
+    elapsed = time.perf_counter() - started
+
+    plain = SentimentIntensityAnalyzer()
+    mismatches = sum(1 for m, r in zip(stream, results) if plain.polarity_scores(m)["compound"] != r.compound)
+    print(f"backend: {os.path.dirname(sys.modules['routers.sentiment'].__file__)}")
+    print(f"{args.messages} messages, {args.repeated:.0%} repeated phrases: "
+          f"{elapsed / args.messages * 1e6:.1f} us/message, {mismatches} scores differ from plain VADER")
+    if "sentiment_cache" in metrics.snapshot():
+        print(f"cache: {metrics.snapshot()['sentiment_cache']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", help="backend directory to import the app from (default: this checkout)")
+    parser.add_argument("--messages", type=int, default=50_000)
+    parser.add_argument("--repeated", type=float, default=0.6, help="share of messages that are common phrases")
+    args = parser.parse_args()
+
+    if args.backend:
+        sys.path.insert(0, os.path.abspath(args.backend))
+    harness.use_temp_backend_env("http://127.0.0.1:9/v1")
+    main(args)
@@ -0,0 +1,78 @@
+"""
+Startup cost of the schema and question catalog steps.
+
+Each run is a fresh interpreter (as after a deploy or restart) that imports the
+app and times create_db_and_tables() and seed_questions() against a SQLite
+file. "first boot" starts from an empty database; "restart" reuses the one the
+first boot left behind, which is what every later start of a deployment sees.
+
+To compare against another checkout, point --backend at its backend directory:
+
+    git worktree add /tmp/before <commit>
+    python benchmarks/bench_startup.py --backend /tmp/before/backend
+    python benchmarks/bench_startup.py
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def once():
+    """Child process: time the startup steps and print them as JSON"""
+    started = time.perf_counter()
+    from database import create_db_and_tables, seed_questions
+    import main  # noqa: F401  (import cost of the app, for reference)
+    imported = time.perf_counter()
+    create_db_and_tables()
+    migrated = time.perf_counter()
+    seed_questions()
+    seeded = time.perf_counter()
+    print(json.dumps({
+        "import": imported - started, "schema": migrated - imported, "seed": seeded - migrated,
+    }))
+
+
+def run(backend: str, workdir: str) -> dict:
+    env = {**os.environ, "DATABASE_URL": "sqlite:///./dsa_gpt.db", "OPENAI_API_KEY": "fake-key",
+           "SECRET_KEY": "bench-secret", "PYTHONPATH": backend}
+    result = subprocess.run([sys.executable, __file__, "--once"], env=env, cwd=workdir,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def report(label: str, samples: list):
+    row = [label]
+    for step in ("import", "schema", "seed"):
+        row.append(statistics.median(s[step] for s in samples) * 1000)
+    row.append(statistics.median(s["schema"] + s["seed"] for s in samples) * 1000)
+    print(f"{row[0]:<11} {row[1]:>10.1f} {row[2]:>10.1f} {row[3]:>10.1f} {row[4]:>16.1f}")
+
+
+def main(args):
+    backend = os.path.abspath(args.backend or os.path.dirname(HERE))
+    print(f"backend: {backend}   ({args.runs} runs, median ms)")
+    print(f"{'':<11} {'import':>10} {'schema':>10} {'seed':>10} {'schema + seed':>16}")
+    first, restart = [], []
+    for _ in range(args.runs):
+        workdir = tempfile.mkdtemp(prefix="dsagpt-bench-")
+        first.append(run(backend, workdir))
+        restart.append(run(backend, workdir))
+    report("first boot", first)
+    report("restart", restart)
+
+
+if __name__ == "__main__":
+    if "--once" in sys.argv:
+        once()
+        sys.exit(0)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", help="backend directory to import the app from (default: this checkout)")
+    parser.add_argument("--runs", type=int, default=15)
+    main(parser.parse_args())
@@ -0,0 +1,155 @@
+"""
+Minimal OpenAI-compatible chat completions server for local benchmarks.
+
+Run standalone:
+    python benchmarks/fake_llm.py --port 9100 --latency 0.5 --distribution lognormal --spread 0.5
+and point the backend at it with OPENAI_BASE_URL=http://127.0.0.1:9100/v1
+
+Faults can be injected at start-up (--error-rate, --hang-rate) or changed on a
+running server with POST /faults {"error_rate": 0.5, "hang_rate": 0.0}.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import random
+import time
+from typing import Callable
+
+import uvicorn
+from fastapi import Body, FastAPI, Request
+from fastapi.responses import JSONResponse
+from fastapi.responses import StreamingResponse
+
+from harness import serve_in_thread
+
+CANNED_REPLY = "Great question! Think about how two pointers can walk towards each other."
+_quiz_counter = itertools.count(1)
+
+
+def canned_quiz() -> str:
+    # Number each quiz so quiz-bank dedupe sees distinct questions
+    return json.dumps({
+        "question": f"What is the time complexity of binary search on a sorted array? (#{next(_quiz_counter)})",
+        "options": ["O(1)", "O(log n)", "O(n)", "O(n log n)"],
+        "correct_answer": 1,
+        "explanation": "Each step halves the remaining search space.",
+    })
+
+
+def reply_for(body: dict) -> str:
+    """Quiz prompts get valid quiz JSON, everything else a tutoring reply"""
+    system = " ".join(m.get("content", "") for m in body.get("messages", []) if m.get("role") == "system")
+    return canned_quiz() if "quiz generator" in system else CANNED_REPLY
+
+
+HANG_SECONDS = 3600
+DISTRIBUTIONS = ["fixed", "uniform", "normal", "lognormal", "exponential"]
+
+
+def latency_sampler(mean: float, distribution: str = "fixed", spread: float = 0.0) -> Callable[[], float]:
+    """
+    Return a function drawing completion latencies with the given mean. `spread` is
+    the half-width for uniform, the standard deviation (as a fraction of the mean)
+    for normal, and sigma for lognormal; exponential has no extra parameter.
+    """
+    if distribution == "fixed" or mean <= 0:
+        return lambda: mean
+    if distribution == "uniform":
+        return lambda: max(0.0, random.uniform(mean - spread, mean + spread))
+    if distribution == "normal":
+        return lambda: max(0.0, random.gauss(mean, spread * mean))
+    if distribution == "lognormal":
+        # Pick mu so the mean stays at `mean`; gives the long tail real APIs show
+        mu = math.log(mean) - spread ** 2 / 2
+        return lambda: random.lognormvariate(mu, spread)
+    if distribution == "exponential":
+        return lambda: random.expovariate(1 / mean)
+    raise ValueError(f"unknown latency distribution {distribution!r}")
+
+
+def create_app(
+    latency: float = 0.5,
+    error_rate: float = 0.0,
+    hang_rate: float = 0.0,
+    distribution: str = "fixed",
+    spread: float = 0.0,
+) -> FastAPI:
+    app = FastAPI()
+    sample_latency = latency_sampler(latency, distribution, spread)
+    # error_rate: share of calls answered with a 503; hang_rate: share that never answer
+    app.state.faults = {"error_rate": error_rate, "hang_rate": hang_rate}
+    app.state.calls = 0
+
+    @app.post("/faults")
+    async def set_faults(faults: dict = Body(...)):
+        app.state.faults.update({k: float(v) for k, v in faults.items() if k in app.state.faults})
+        return {**app.state.faults, "calls": app.state.calls}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.calls += 1
+        roll = random.random()
+        if roll < app.state.faults["hang_rate"]:
+            await asyncio.sleep(HANG_SECONDS)
+        elif roll < app.state.faults["hang_rate"] + app.state.faults["error_rate"]:
+            await asyncio.sleep(sample_latency() / 10)
+            return JSONResponse(
+                status_code=503,
+                content={"error": {"message": "injected fault", "type": "server_error"}},
+            )
+        if body.get("stream"):
+            return StreamingResponse(stream_reply(body), media_type="text/event-stream")
+        await asyncio.sleep(sample_latency())
+        return {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-3.5-turbo"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": reply_for(body)},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    async def stream_reply(body: dict):
+        # Spread the sampled total latency evenly over the tokens
+        tokens = [word + " " for word in reply_for(body).split(" ")]
+        per_token = sample_latency() / len(tokens)
+        for token in tokens:
+            await asyncio.sleep(per_token)
+            chunk = {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "gpt-3.5-turbo"),
+                "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return app
+
+
+def start_in_thread(latency: float = 0.5, port: int = 0, **options) -> str:
+    """Start the server on a background thread and return its OpenAI base URL"""
+    return serve_in_thread(create_app(latency, **options), port) + "/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", type=float, default=0.5, help="mean seconds per completion")
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="fixed")
+    parser.add_argument("--spread", type=float, default=0.0, help="shape of the latency distribution")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of calls failing with 503")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="share of calls that never answer")
+    args = parser.parse_args()
+    app = create_app(args.latency, args.error_rate, args.hang_rate, args.distribution, args.spread)
+    uvicorn.run(app, host="127.0.0.1", port=args.port)
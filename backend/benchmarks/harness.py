@@ -0,0 +1,52 @@
+"""Shared helpers for the benchmark scripts"""
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+import uvicorn
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve_in_thread(app, port: int = 0) -> str:
+    """Run an ASGI app with uvicorn on a background thread and return its URL"""
+    port = port or free_port()
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}"
+
+
+def use_temp_backend_env(llm_base_url: str):
+    """Point the backend at the fake LLM and a throwaway database directory"""
+    os.environ["OPENAI_BASE_URL"] = llm_base_url
+    os.environ.setdefault("OPENAI_API_KEY", "fake-key")
+    os.environ.setdefault("SECRET_KEY", "bench-secret")
+    # Every simulated user signs in from this one address
+    os.environ.setdefault("LOGIN_LIMIT_PER_IP", "0")
+    os.environ.setdefault("REGISTER_LIMIT_PER_IP", "0")
+    # database.py resolves the SQLite file relative to the working directory
+    os.chdir(tempfile.mkdtemp(prefix="dsagpt-bench-"))
+
+
+async def login(client: httpx.AsyncClient, email: str = "bench@example.com") -> dict:
+    """Register (if needed) and log in a benchmark user, returning auth headers"""
+    user = {"name": "Bench", "email": email, "password": "bench-password"}
+    await client.post("/users/register", json=user)
+    r = await client.post("/users/login", json={"email": email, "password": user["password"]})
+    r.raise_for_status()
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
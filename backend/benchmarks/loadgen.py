@@ -0,0 +1,217 @@
+"""
+End-to-end load generator for the chat path.
+
+Registers --users synthetic learners, logs them in, then drives a weighted mix
+of chat messages, quiz answers and analytics reads at --rps for --duration
+seconds (open loop: arrivals do not wait for earlier responses). Prints
+p50/p95/p99 latency and the error rate per endpoint.
+
+By default it starts the fake LLM and the backend in-process on a throwaway
+database. To size a real deployment, run the fake LLM and the backend
+separately and point the generator at it:
+
+    python benchmarks/fake_llm.py --port 9100 --latency 0.8 --distribution lognormal --spread 0.6
+    OPENAI_BASE_URL=http://127.0.0.1:9100/v1 OPENAI_API_KEY=fake LOGIN_LIMIT_PER_IP=0 REGISTER_LIMIT_PER_IP=0 \
+        uvicorn main:app --workers 4
+    python benchmarks/loadgen.py --url http://127.0.0.1:8000 --users 200 --rps 50 --duration 60
+"""
+import argparse
+import asyncio
+import random
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+import fake_llm
+import harness
+
+MESSAGES = [
+    "Can you explain how {topic} work?",
+    "What's the time complexity of the usual {topic} operations?",
+    "I'm confused about {topic}, I don't understand when to use them",
+    "Thanks, that makes sense! Can you give me a harder {topic} example?",
+    "I'm stuck on a {topic} problem and it's frustrating",
+]
+TOPICS = ["Arrays", "Linked Lists", "Trees", "Graphs", "Dynamic Programming", "Sorting"]
+ANALYTICS = ["/analytics/learning-summary", "/analytics/emotional-trends", "/analytics/recommendations"]
+
+
+class Stats:
+    """Latencies and failures per endpoint label"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, label: str, elapsed: float, ok: bool):
+        self.latencies[label].append(elapsed)
+        if not ok:
+            self.errors[label] += 1
+
+    def report(self, elapsed: float):
+        print(f"{'endpoint':<34} {'count':>6} {'err %':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>7}")
+        for label in sorted(self.latencies):
+            samples = sorted(self.latencies[label])
+            count = len(samples)
+            print(
+                f"{label:<34} {count:>6} {100 * self.errors[label] / count:>6.1f} "
+                f"{percentile(samples, 50) * 1000:>8.0f} {percentile(samples, 95) * 1000:>8.0f} "
+                f"{percentile(samples, 99) * 1000:>8.0f} {count / elapsed:>7.1f}"
+            )
+
+
+def percentile(samples: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not samples:
+        return 0.0
+    rank = max(0, min(len(samples) - 1, int(round(p / 100 * len(samples) + 0.5)) - 1))
+    return samples[rank]
+
+
+class Learner:
+    def __init__(self, email: str):
+        self.email = email
+        self.headers: dict = {}
+        self.quiz_ids: List[int] = []
+        self.tickets: List[int] = []
+        self.topic = random.choice(TOPICS)
+
+
+async def timed(client: httpx.AsyncClient, stats: Stats, label: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+    started = time.perf_counter()
+    try:
+        r = await client.request(method, url, **kwargs)
+    except httpx.HTTPError:
+        stats.record(label, time.perf_counter() - started, ok=False)
+        return None
+    stats.record(label, time.perf_counter() - started, ok=r.status_code < 400)
+    return r
+
+
+async def sign_up(client: httpx.AsyncClient, stats: Stats, learner: Learner):
+    user = {"name": "Load Test", "email": learner.email, "password": "loadtest-password"}
+    await timed(client, stats, "POST /users/register", "POST", "/users/register", json=user)
+    r = await timed(client, stats, "POST /users/login", "POST", "/users/login",
+                    json={"email": learner.email, "password": user["password"]})
+    if r is not None and r.status_code == 200:
+        learner.headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+async def chat(client: httpx.AsyncClient, stats: Stats, learner: Learner):
+    if random.random() < 0.2:
+        learner.topic = random.choice(TOPICS)
+    message = random.choice(MESSAGES).format(topic=learner.topic.lower())
+    r = await timed(client, stats, "POST /chat/message", "POST", "/chat/message",
+                    json={"message": message, "topic": learner.topic}, headers=learner.headers)
+    if r is not None and r.status_code == 200:
+        body = r.json()
+        if body.get("quiz") and body["quiz"].get("id"):
+            learner.quiz_ids.append(body["quiz"]["id"])
+        elif body.get("quiz_ticket"):
+            learner.tickets.append(body["quiz_ticket"])
+
+
+async def answer_quiz(client: httpx.AsyncClient, stats: Stats, learner: Learner):
+    # Quizzes generated in the background arrive as tickets; resolve one first
+    if not learner.quiz_ids and learner.tickets:
+        ticket = learner.tickets.pop(0)
+        r = await timed(client, stats, "GET /chat/quiz/jobs/{ticket}", "GET", f"/chat/quiz/jobs/{ticket}",
+                        headers=learner.headers)
+        if r is not None and r.status_code == 200:
+            job = r.json()
+            if job["status"] == "done":
+                learner.quiz_ids.append(job["quiz"]["id"])
+            elif job["status"] != "failed":
+                learner.tickets.append(ticket)
+    if not learner.quiz_ids:
+        # Nothing to answer yet: keep the learner talking instead
+        await chat(client, stats, learner)
+        return
+    await timed(client, stats, "POST /chat/quiz/answer", "POST", "/chat/quiz/answer",
+                json={"quiz_id": learner.quiz_ids.pop(0), "selected_option": random.randrange(4)},
+                headers=learner.headers)
+
+
+async def analytics(client: httpx.AsyncClient, stats: Stats, learner: Learner):
+    path = random.choice(ANALYTICS)
+    await timed(client, stats, f"GET {path}", "GET", path, headers=learner.headers)
+
+
+async def run(args, base_url: str):
+    signup_stats = Stats()
+    stats = Stats()
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        run_id = random.randrange(1 << 30)
+        learners = [Learner(f"load-{run_id}-{i}@example.com") for i in range(args.users)]
+        semaphore = asyncio.Semaphore(args.signup_concurrency)
+
+        async def sign_up_one(learner):
+            async with semaphore:
+                await sign_up(client, signup_stats, learner)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(sign_up_one(learner) for learner in learners))
+        signup_stats.report(time.perf_counter() - started)
+        learners = [learner for learner in learners if learner.headers]
+        if not learners:
+            return
+        print()
+
+        actions = [chat, answer_quiz, analytics]
+        weights = [args.chat_weight, args.quiz_weight, args.analytics_weight]
+        in_flight: set = set()
+        dropped = 0
+        started = time.perf_counter()
+        next_at = started
+        while next_at - started < args.duration:
+            await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+            if len(in_flight) >= args.max_in_flight:
+                # The backend is not keeping up; count the arrival rather than queueing it client-side
+                dropped += 1
+            else:
+                action = random.choices(actions, weights)[0]
+                task = asyncio.create_task(action(client, stats, random.choice(learners)))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+            gap = 1 / args.rps
+            next_at += random.expovariate(args.rps) if args.poisson else gap
+        offered = time.perf_counter() - started
+        await asyncio.gather(*in_flight)
+        elapsed = time.perf_counter() - started
+
+    print(f"offered {args.rps} req/s for {offered:.1f}s, drained after {elapsed:.1f}s, "
+          f"dropped {dropped} arrivals (more than {args.max_in_flight} in flight)")
+    stats.report(elapsed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="backend to load; omit to start one in-process with the fake LLM")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--rps", type=float, default=10, help="target arrivals per second")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of load after sign-up")
+    parser.add_argument("--poisson", action="store_true", help="exponential inter-arrival times instead of a fixed gap")
+    parser.add_argument("--chat-weight", type=float, default=6)
+    parser.add_argument("--quiz-weight", type=float, default=2)
+    parser.add_argument("--analytics-weight", type=float, default=2)
+    parser.add_argument("--max-in-flight", type=int, default=500)
+    parser.add_argument("--signup-concurrency", type=int, default=16)
+    parser.add_argument("--timeout", type=float, default=60)
+    # Only used when the generator starts its own fake LLM
+    parser.add_argument("--latency", type=float, default=0.5, help="mean fake LLM latency")
+    parser.add_argument("--distribution", choices=fake_llm.DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--spread", type=float, default=0.5)
+    args = parser.parse_args()
+
+    base_url = args.url
+    if not base_url:
+        harness.use_temp_backend_env(
+            fake_llm.start_in_thread(latency=args.latency, distribution=args.distribution, spread=args.spread)
+        )
+        from main import app
+
+        base_url = harness.serve_in_thread(app)
+    asyncio.run(run(args, base_url.rstrip("/")))
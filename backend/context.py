@@ -0,0 +1,148 @@
+"""
+Conversation context for chat prompts, bounded by a token budget.
+
+The newest turns of the current UserSession are sent verbatim for as long as
+they fit in CHAT_HISTORY_TOKENS. Turns that slide out of that window are folded
+into the session's SessionSummary once, so each turn only does work for the
+messages that just fell out, and the prompt stays the same size however long
+the session gets.
+"""
+import json
+import os
+from datetime import datetime
+from typing import List, Optional
+
+from sqlmodel import Session, select, desc
+
+import db_writer
+from llm import estimate_tokens
+from models import ChatMessage, SessionSummary
+
+CHAT_HISTORY_TOKENS = int(os.getenv("CHAT_HISTORY_TOKENS", "500"))  # verbatim recent turns
+CHAT_MESSAGE_TOKENS = int(os.getenv("CHAT_MESSAGE_TOKENS", "200"))  # cap for any one past message
+CHAT_SUMMARY_TOKENS = int(os.getenv("CHAT_SUMMARY_TOKENS", "150"))
+# Recent messages read per turn; the window can never hold more than this
+CHAT_HISTORY_SCAN = int(os.getenv("CHAT_HISTORY_SCAN", "30"))
+
+NOTE_WORDS = 25
+MAX_SUMMARY_TOPICS = 10
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to roughly max_tokens, at a word boundary"""
+    limit = max_tokens * 4
+    if len(text) <= limit:
+        return text
+    cut = text[:limit].rsplit(" ", 1)[0]
+    return cut + " …"
+
+
+def _note(msg: ChatMessage) -> str:
+    words = msg.message.split()
+    text = " ".join(words[:NOTE_WORDS]) + (" …" if len(words) > NOTE_WORDS else "")
+    return f"{'Student' if msg.sender == 'user' else 'Tutor'}: {text}"
+
+
+def _remember(items: List[str], item: str):
+    if item in items:
+        items.remove(item)
+    items.append(item)
+    del items[:-MAX_SUMMARY_TOPICS]
+
+
+def fold(summary: SessionSummary, messages: List[ChatMessage]):
+    """Fold messages (oldest first) that left the verbatim window into the summary"""
+    topics = json.loads(summary.topics or "[]")
+    struggles = json.loads(summary.struggles or "[]")
+    notes = json.loads(summary.notes or "[]")
+    for msg in messages:
+        if msg.topic:
+            _remember(topics, msg.topic)
+            if msg.sender == "user" and msg.sentiment_score < -0.3:
+                _remember(struggles, msg.topic)
+        notes.append(_note(msg))
+        summary.covered_until = max(summary.covered_until, msg.id)
+    # Keep the newest notes that fit next to the topic lists
+    budget = CHAT_SUMMARY_TOKENS - estimate_tokens([{"content": ", ".join(topics + struggles)}])
+    kept: List[str] = []
+    for note in reversed(notes):
+        budget -= len(note) // 4 + 1
+        if budget < 0:
+            break
+        kept.append(note)
+    summary.topics = json.dumps(topics)
+    summary.struggles = json.dumps(struggles)
+    summary.notes = json.dumps(kept[::-1])
+    summary.updated_at = datetime.utcnow()
+
+
+def render_summary(summary: SessionSummary) -> Optional[str]:
+    topics = json.loads(summary.topics or "[]")
+    struggles = json.loads(summary.struggles or "[]")
+    notes = json.loads(summary.notes or "[]")
+    if not (topics or notes):
+        return None
+    lines = ["Summary of the earlier part of this tutoring session:"]
+    if topics:
+        lines.append(f"Topics discussed: {', '.join(topics)}.")
+    if struggles:
+        lines.append(f"The student struggled with: {', '.join(struggles)}.")
+    lines.extend(f"- {note}" for note in notes)
+    return "\n".join(lines)
+
+
+def _get_summary(session: Session, session_id: int) -> SessionSummary:
+    summary = session.exec(select(SessionSummary).where(SessionSummary.session_id == session_id)).first()
+    if not summary:
+        return SessionSummary(session_id=session_id)
+    # Updates go through the writer; keep them out of the request's transaction
+    session.expunge(summary)
+    return summary
+
+
+def build_history(session: Session, session_id: int) -> List[dict]:
+    """
+    LLM messages for the conversation so far, oldest first: an optional summary
+    system message followed by the newest turns that fit the history budget.
+    """
+    summary = _get_summary(session, session_id)
+    query = select(ChatMessage).where(
+        ChatMessage.session_id == session_id,
+        ChatMessage.id > summary.covered_until,
+    )
+    recent = session.exec(query.order_by(desc(ChatMessage.id)).limit(CHAT_HISTORY_SCAN)).all()
+
+    window: List[dict] = []
+    budget = CHAT_HISTORY_TOKENS
+    overflow_from = None
+    for msg in recent:
+        content = truncate_to_tokens(msg.message, CHAT_MESSAGE_TOKENS)
+        entry = {"role": "user" if msg.sender == "user" else "assistant", "content": content}
+        cost = estimate_tokens([entry])
+        if cost > budget:
+            overflow_from = msg.id
+            break
+        budget -= cost
+        window.append(entry)
+    else:
+        if len(recent) == CHAT_HISTORY_SCAN:
+            overflow_from = recent[-1].id - 1
+
+    if overflow_from is not None:
+        # Everything not yet summarized up to the oldest message left out of the window
+        folded = select(ChatMessage).where(
+            ChatMessage.session_id == session_id,
+            ChatMessage.id > summary.covered_until,
+            ChatMessage.id <= overflow_from,
+        )
+        fold(summary, session.exec(folded.order_by(ChatMessage.id)).all())
+        # Best effort: if this write is lost, the next turn folds the same messages
+        # again. Upserted, since concurrent turns of a session may both create it
+        db_writer.write_nowait(summary, upsert_on=["session_id"])
+
+    history = []
+    text = render_summary(summary)
+    if text:
+        history.append({"role": "system", "content": text})
+    history.extend(reversed(window))
+    return history
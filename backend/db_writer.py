@@ -0,0 +1,196 @@
+"""
+Group-commit writer for the chat path's inserts.
+
+Requests hand their rows to a single writer instead of committing themselves,
+so concurrent chat turns don't fight over SQLite's one write lock. The writer
+task collects whatever is queued (up to WRITER_BATCH_SIZE requests, waiting
+at most WRITER_FLUSH_MS after the first) and commits it as one transaction on
+a dedicated thread.
+
+`await write(...)` returns once the rows are committed (chat messages,
+quizzes, jobs) and fills in their ids. `write_nowait(...)` is for telemetry
+such as EmotionalTrend: it never waits and drops the rows if the queue is full.
+Both take upsert_on=[columns] to write rows with INSERT ... ON CONFLICT DO
+UPDATE on a unique key instead (their ids are not filled in). Rows are copied
+when queued, so the caller may keep using its objects.
+"""
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from sqlmodel import Session, SQLModel
+
+from database import engine, upsert
+import metrics
+
+logger = logging.getLogger(__name__)
+
+WRITER_QUEUE_SIZE = int(os.getenv("WRITER_QUEUE_SIZE", "10000"))
+WRITER_BATCH_SIZE = int(os.getenv("WRITER_BATCH_SIZE", "256"))  # requests per transaction
+WRITER_FLUSH_MS = float(os.getenv("WRITER_FLUSH_MS", "2"))
+
+
+@dataclass
+class _Unit:
+    originals: List[SQLModel]
+    rows: List[SQLModel]  # copies of values, attached to the session of the current attempt
+    values: List[Dict]  # the rows' values when queued; a retry starts again from these
+    future: Optional[asyncio.Future] = None  # None for fire-and-forget writes
+    upsert_on: Optional[List[str]] = None
+    error: Optional[Exception] = None
+
+
+_queue: Optional[asyncio.Queue] = None
+_task: Optional[asyncio.Task] = None
+_executor: Optional[ThreadPoolExecutor] = None
+_stats = {"transactions": 0, "units": 0, "rows": 0, "failed": 0, "dropped": 0, "max_batch": 0, "commit_ms": 0.0}
+
+
+def _copies(unit: _Unit) -> List[SQLModel]:
+    return [type(original)(**values) for original, values in zip(unit.originals, unit.values)]
+
+
+def _unit(rows, future=None, upsert_on=None) -> _Unit:
+    unit = _Unit(list(rows), [], [r.model_dump() for r in rows], future, upsert_on)
+    unit.rows = _copies(unit)
+    return unit
+
+
+def _store(session: Session, unit: _Unit):
+    if unit.upsert_on and unit.values:
+        table = type(unit.rows[0]).__table__
+        session.connection().execute(
+            upsert(table, unit.upsert_on),
+            [{k: v for k, v in values.items() if k != "id"} for values in unit.values],
+        )
+        return
+    # New rows are inserted; rows that already have an id are updates
+    unit.rows = [session.merge(r) if r.id is not None else r for r in unit.rows]
+    session.add_all(unit.rows)
+
+
+def _commit(units: List[_Unit]):
+    """Commit all units in one transaction; if that fails, retry them one by one"""
+    started = time.perf_counter()
+    try:
+        with Session(engine, expire_on_commit=False) as session:
+            for unit in units:
+                _store(session, unit)
+            session.commit()
+        _stats["transactions"] += 1
+    except Exception:
+        # Isolate the unit that broke the batch so the others still land
+        for unit in units:
+            # Not from the originals: the caller may have changed them since queueing
+            unit.rows = _copies(unit)
+            try:
+                with Session(engine, expire_on_commit=False) as session:
+                    _store(session, unit)
+                    session.commit()
+                _stats["transactions"] += 1
+            except Exception as e:
+                unit.error = e
+    _stats["commit_ms"] += (time.perf_counter() - started) * 1000
+    for unit in units:
+        if unit.error is None:
+            for original, row in zip(unit.originals, unit.rows):
+                if original.id is None:
+                    original.id = row.id
+            _stats["rows"] += len(unit.rows)
+        else:
+            _stats["failed"] += 1
+            if unit.future is None:
+                logger.warning("Dropped background write: %s", unit.error)
+    _stats["units"] += len(units)
+    _stats["max_batch"] = max(_stats["max_batch"], len(units))
+
+
+def _settle(units: List[_Unit]):
+    for unit in units:
+        if unit.future is not None and not unit.future.done():
+            if unit.error is None:
+                unit.future.set_result(None)
+            else:
+                unit.future.set_exception(unit.error)
+
+
+async def _collect(first: _Unit) -> List[_Unit]:
+    loop = asyncio.get_running_loop()
+    units = [first]
+    deadline = loop.time() + WRITER_FLUSH_MS / 1000
+    while True:
+        while len(units) < WRITER_BATCH_SIZE and not _queue.empty():
+            units.append(_queue.get_nowait())
+        remaining = deadline - loop.time()
+        if len(units) >= WRITER_BATCH_SIZE or remaining <= 0:
+            return units
+        await asyncio.sleep(remaining)
+
+
+async def _run():
+    loop = asyncio.get_running_loop()
+    while True:
+        first = await _queue.get()
+        if first is None:
+            return
+        units = await _collect(first)
+        stop = None in units
+        units = [u for u in units if u is not None]
+        await loop.run_in_executor(_executor, _commit, units)
+        _settle(units)
+        if stop:
+            return
+
+
+async def write(*rows: SQLModel, upsert_on: Optional[List[str]] = None):
+    """Insert (or update) rows and return once they are committed"""
+    if _queue is None:
+        # Writer not running (scripts, tests): commit inline
+        unit = _unit(rows, upsert_on=upsert_on)
+        _commit([unit])
+        if unit.error is not None:
+            raise unit.error
+        return
+    unit = _unit(rows, asyncio.get_running_loop().create_future(), upsert_on)
+    await _queue.put(unit)
+    await unit.future
+
+
+def write_nowait(*rows: SQLModel, upsert_on: Optional[List[str]] = None):
+    """Queue rows for the next batch without waiting; dropped if the queue is full"""
+    if _queue is None:
+        _commit([_unit(rows, upsert_on=upsert_on)])
+        return
+    try:
+        _queue.put_nowait(_unit(rows, upsert_on=upsert_on))
+    except asyncio.QueueFull:
+        _stats["dropped"] += 1
+
+
+def stats() -> dict:
+    return {**_stats, "queue_depth": _queue.qsize() if _queue else 0}
+
+
+metrics.register("db_writer", stats)
+
+
+def start():
+    global _queue, _task, _executor
+    _queue = asyncio.Queue(maxsize=WRITER_QUEUE_SIZE)
+    _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+    _task = asyncio.create_task(_run())
+
+
+async def stop():
+    """Flush everything queued so far, then stop the writer"""
+    global _queue, _task, _executor
+    if _task is None:
+        return
+    await _queue.put(None)
+    await _task
+    _executor.shutdown()
+    _queue = _task = _executor = None
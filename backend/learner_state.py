@@ -0,0 +1,145 @@
+"""
+Per-user learner state kept in memory and updated as messages and quiz answers
+are written, so prompt assembly and recommendations don't rescan the tables.
+
+A state holds the user's recent topics, a time-decayed confusion score per
+topic, an EWMA of message sentiment and per-topic quiz results. States live in
+an LRU cache and are rebuilt from the user's recent rows on a miss. Entries
+also expire after LEARNER_STATE_TTL seconds so that, with several server
+processes, a state updated elsewhere is picked up again.
+"""
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlmodel import Session, select, desc
+
+import metrics
+from models import ChatMessage, Quiz
+
+LEARNER_CACHE_SIZE = int(os.getenv("LEARNER_CACHE_SIZE", "10000"))
+LEARNER_STATE_TTL = float(os.getenv("LEARNER_STATE_TTL", "300"))
+CONFUSION_HALF_LIFE_HOURS = float(os.getenv("CONFUSION_HALF_LIFE_HOURS", "72"))
+SENTIMENT_ALPHA = float(os.getenv("SENTIMENT_ALPHA", "0.3"))  # weight of the newest message in the EWMA
+
+CONFUSED_SENTIMENT = -0.3  # messages below this count as confusion, as in the chat prompt
+CONFUSION_THRESHOLD = 0.3  # decayed score at which a topic is flagged
+WRONG_ANSWER_CONFUSION = 0.5
+RECENT_TOPICS = 10
+REBUILD_MESSAGES = 200  # rows replayed on a cache miss
+REBUILD_QUIZZES = 100
+
+
+class LearnerState:
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self.loaded_at = time.monotonic()
+        self.recent_topics: List[str] = []  # distinct, oldest first
+        self.confusion: Dict[str, tuple] = {}  # topic -> (score, as of datetime)
+        self.sentiment_ewma: Optional[float] = None
+        self.last_sentiment: Optional[float] = None
+        self.message_count = 0
+        self.quiz_results: Dict[str, Dict[str, int]] = {}  # topic -> {"correct": n, "wrong": n}
+
+    def _decayed(self, topic: str, now: datetime) -> float:
+        score, as_of = self.confusion.get(topic, (0.0, now))
+        hours = max(0.0, (now - as_of).total_seconds() / 3600)
+        return score * 0.5 ** (hours / CONFUSION_HALF_LIFE_HOURS)
+
+    def _add_confusion(self, topic: str, amount: float, when: datetime):
+        self.confusion[topic] = (max(0.0, self._decayed(topic, when) + amount), when)
+
+    def observe_message(self, topic: Optional[str], sentiment: float, when: Optional[datetime] = None):
+        """Account for one user message"""
+        when = when or datetime.utcnow()
+        self.message_count += 1
+        self.last_sentiment = sentiment
+        if self.sentiment_ewma is None:
+            self.sentiment_ewma = sentiment
+        else:
+            self.sentiment_ewma = SENTIMENT_ALPHA * sentiment + (1 - SENTIMENT_ALPHA) * self.sentiment_ewma
+        if topic:
+            if topic in self.recent_topics:
+                self.recent_topics.remove(topic)
+            self.recent_topics.append(topic)
+            del self.recent_topics[:-RECENT_TOPICS]
+            if sentiment < CONFUSED_SENTIMENT:
+                self._add_confusion(topic, -sentiment, when)
+
+    def observe_quiz(self, topic: Optional[str], correct: bool, when: Optional[datetime] = None):
+        """Account for one answered quiz"""
+        if not topic:
+            return
+        when = when or datetime.utcnow()
+        results = self.quiz_results.setdefault(topic, {"correct": 0, "wrong": 0})
+        results["correct" if correct else "wrong"] += 1
+        self._add_confusion(topic, -WRONG_ANSWER_CONFUSION if correct else WRONG_ANSWER_CONFUSION, when)
+
+    def confusion_topics(self, now: Optional[datetime] = None) -> List[str]:
+        """Topics still above the confusion threshold, most confusing first"""
+        now = now or datetime.utcnow()
+        scores = {topic: self._decayed(topic, now) for topic in self.confusion}
+        return sorted((t for t, s in scores.items() if s >= CONFUSION_THRESHOLD), key=lambda t: -scores[t])
+
+    def weak_topics(self) -> List[str]:
+        """Topics where the user has answered more quizzes wrong than right"""
+        return [t for t, r in self.quiz_results.items() if r["wrong"] > r["correct"]]
+
+
+_cache: "OrderedDict[int, LearnerState]" = OrderedDict()
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def rebuild(user_id: int, session: Session) -> LearnerState:
+    """Replay the user's recent messages and answered quizzes in time order"""
+    state = LearnerState(user_id)
+    messages = session.exec(
+        select(ChatMessage)
+        .where(ChatMessage.user_id == user_id, ChatMessage.sender == "user")
+        .order_by(desc(ChatMessage.timestamp))
+        .limit(REBUILD_MESSAGES)
+    ).all()
+    quizzes = session.exec(
+        select(Quiz)
+        .where(Quiz.user_id == user_id, Quiz.answered_at != None)
+        .order_by(desc(Quiz.answered_at))
+        .limit(REBUILD_QUIZZES)
+    ).all()
+    events = [(m.timestamp, 0, m) for m in messages] + [(q.answered_at, 1, q) for q in quizzes]
+    for when, kind, row in sorted(events, key=lambda e: (e[0], e[1])):
+        if kind == 0:
+            state.observe_message(row.topic, row.sentiment_score, when)
+        else:
+            state.observe_quiz(row.topic, bool(row.is_correct), when)
+    return state
+
+
+def get(user_id: int, session: Session) -> LearnerState:
+    """Cached state for the user, rebuilt from the database on a miss"""
+    state = _cache.get(user_id)
+    if state is not None and time.monotonic() - state.loaded_at < LEARNER_STATE_TTL:
+        _cache.move_to_end(user_id)
+        _stats["hits"] += 1
+        return state
+    _stats["misses"] += 1
+    state = rebuild(user_id, session)
+    _cache[user_id] = state
+    _cache.move_to_end(user_id)
+    while len(_cache) > LEARNER_CACHE_SIZE:
+        _cache.popitem(last=False)
+        _stats["evictions"] += 1
+    return state
+
+
+def invalidate(user_id: Optional[int]):
+    """Drop a state whose updates may not match what was committed"""
+    _cache.pop(user_id, None)
+
+
+def stats() -> dict:
+    return {**_stats, "size": len(_cache)}
+
+
+metrics.register("learner_state", stats)
@@ -0,0 +1,336 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+import openai
+from dotenv import load_dotenv
+
+import metrics
+from llm_scheduler import INTERACTIVE, Grant, scheduler
+
+load_dotenv()
+
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# Point at any OpenAI-compatible server (e.g. benchmarks/fake_llm.py for load tests)
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-3.5-turbo")
+
+# Timeouts in seconds. LLM_TIMEOUT bounds a single HTTP attempt; LLM_DEADLINE bounds
+# a whole call including retries and backoff.
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", "45"))
+
+# Connection pool shared by every caller in the process
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "20"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30"))
+
+# Retries use exponential backoff with full jitter
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE = float(os.getenv("LLM_RETRY_BASE", "0.25"))
+LLM_RETRY_CAP = float(os.getenv("LLM_RETRY_CAP", "4"))
+
+# Circuit breaker: open after this many consecutive failures, probe again after the cooldown
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+
+RETRYABLE_ERRORS = (
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+
+class LLMUnavailable(Exception):
+    """The upstream is unhealthy (circuit open) or did not answer before the deadline"""
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures; after the cooldown one probe call is let through"""
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+        self.times_opened = 0
+        self.short_circuited = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half_open"
+        return "open"
+
+    def before_call(self):
+        state = self.state
+        if state == "open" or (state == "half_open" and self.probing):
+            self.short_circuited += 1
+            raise LLMUnavailable("LLM circuit breaker is open")
+        if state == "half_open":
+            self.probing = True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.probing or (self.opened_at is None and self.failures >= self.threshold):
+            self.opened_at = time.monotonic()
+            self.times_opened += 1
+        self.probing = False
+
+    def abandon_probe(self):
+        """The probe ended without reaching the upstream; let the next call probe instead"""
+        self.probing = False
+
+
+breaker = CircuitBreaker(LLM_BREAKER_THRESHOLD, LLM_BREAKER_COOLDOWN)
+
+_client: Optional[openai.AsyncOpenAI] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+# Single-flight: identical concurrent requests share one upstream call
+_in_flight: Dict[Tuple[int, str], asyncio.Task] = {}
+_stats = {
+    "requests": 0,
+    "upstream_calls": 0,
+    "coalesced": 0,
+    "errors": 0,
+    "retries": 0,
+    "deadline_exceeded": 0,
+}
+
+
+def is_configured() -> bool:
+    return bool(OPENAI_API_KEY)
+
+
+def get_client() -> openai.AsyncOpenAI:
+    """Shared async client, created lazily so the app can boot without a key"""
+    global _client, _client_loop
+    # The connection pool is bound to the event loop that created it (CLI jobs and
+    # benchmarks may run more than one loop in a process)
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        _client_loop = loop
+        http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_KEEPALIVE,
+                keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+            ),
+        )
+        _client = openai.AsyncOpenAI(
+            api_key=OPENAI_API_KEY,
+            base_url=OPENAI_BASE_URL,
+            http_client=http_client,
+            max_retries=0,  # retried in _create, with jitter and within the deadline
+        )
+    return _client
+
+
+def request_key(model: str, messages: List[dict], max_tokens: int, temperature: float) -> str:
+    """Hash of the request with message whitespace normalized"""
+    normalized = [
+        {"role": m["role"], "content": " ".join(str(m.get("content") or "").split())}
+        for m in messages
+    ]
+    raw = json.dumps([model, normalized, max_tokens, temperature], sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def estimate_tokens(messages: List[dict]) -> int:
+    """Rough prompt size (about four characters per token plus per-message overhead)"""
+    return sum(len(str(m.get("content") or "")) // 4 + 4 for m in messages)
+
+
+def _backoff(attempt: int) -> float:
+    return random.uniform(0, min(LLM_RETRY_CAP, LLM_RETRY_BASE * (2 ** attempt)))
+
+
+async def _create(deadline: float, priority: int, user_id: Optional[int], **kwargs) -> Tuple[object, Grant]:
+    """
+    Send one request through the breaker and the scheduler, bounding every attempt
+    (queueing included) by what is left of the deadline and retrying retryable
+    errors with jittered backoff. The caller releases the returned grant.
+    """
+    loop = asyncio.get_running_loop()
+    deadline_at = loop.time() + deadline
+    cost = estimate_tokens(kwargs["messages"]) + kwargs["max_tokens"]
+    attempt = 0
+    while True:
+        breaker.before_call()
+        try:
+            grant = await asyncio.wait_for(scheduler.acquire(priority, user_id, cost), deadline_at - loop.time())
+        except BaseException as e:
+            breaker.abandon_probe()
+            if isinstance(e, asyncio.TimeoutError):
+                _stats["deadline_exceeded"] += 1
+                raise LLMUnavailable(f"LLM request was not scheduled within {deadline:g}s")
+            raise
+        _stats["upstream_calls"] += 1
+        try:
+            response = await asyncio.wait_for(get_client().chat.completions.create(**kwargs), deadline_at - loop.time())
+        except asyncio.TimeoutError:
+            grant.release()
+            # The caller's deadline ran out (possibly while queued); a slow upstream
+            # shows up as APITimeoutError once LLM_TIMEOUT passes
+            breaker.abandon_probe()
+            _stats["errors"] += 1
+            _stats["deadline_exceeded"] += 1
+            raise LLMUnavailable(f"LLM did not answer within {deadline:g}s")
+        except RETRYABLE_ERRORS:
+            grant.release()
+            _stats["errors"] += 1
+            breaker.record_failure()
+            delay = _backoff(attempt)
+            if attempt >= LLM_MAX_RETRIES or loop.time() + delay >= deadline_at:
+                raise
+            attempt += 1
+            _stats["retries"] += 1
+            await asyncio.sleep(delay)
+            continue
+        except BaseException:
+            grant.release()
+            # Bad requests, auth errors and cancellation say nothing about upstream health
+            breaker.abandon_probe()
+            _stats["errors"] += 1
+            raise
+        breaker.record_success()
+        return response, grant
+
+
+async def _complete(
+    model: str,
+    messages: List[dict],
+    max_tokens: int,
+    temperature: float,
+    deadline: float,
+    priority: int,
+    user_id: Optional[int],
+) -> Optional[str]:
+    response, grant = await _create(
+        deadline,
+        priority,
+        user_id,
+        model=model,
+        messages=messages,
+        max_tokens=max_tokens,
+        temperature=temperature,
+    )
+    usage = getattr(response, "usage", None)
+    grant.release(usage.total_tokens if usage and usage.total_tokens else None)
+    return response.choices[0].message.content
+
+
+def _forget(key: Tuple[int, str], task: asyncio.Task):
+    _in_flight.pop(key, None)
+    # Mark the outcome retrieved even if every waiter has gone away
+    if not task.cancelled():
+        task.exception()
+
+
+async def chat_completion(
+    messages: List[dict],
+    max_tokens: int,
+    temperature: float,
+    model: Optional[str] = None,
+    deadline: Optional[float] = None,
+    priority: int = INTERACTIVE,
+    user_id: Optional[int] = None,
+    coalesce: bool = True,
+) -> Optional[str]:
+    """
+    Run a chat completion without blocking the event loop. Callers that send the
+    same normalized request while one is in flight wait for that call instead of
+    starting their own; pass coalesce=False when each caller needs its own sample.
+    `priority` and `user_id` place the call in the scheduler's queues. Raises
+    LLMUnavailable when the circuit is open or the deadline passes.
+    """
+    model = model or LLM_MODEL
+    _stats["requests"] += 1
+    if not coalesce:
+        return await _complete(model, messages, max_tokens, temperature, deadline or LLM_DEADLINE, priority, user_id)
+    key = (id(asyncio.get_running_loop()), request_key(model, messages, max_tokens, temperature))
+    task = _in_flight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(
+            _complete(model, messages, max_tokens, temperature, deadline or LLM_DEADLINE, priority, user_id)
+        )
+        _in_flight[key] = task
+        task.add_done_callback(lambda t: _forget(key, t))
+    else:
+        _stats["coalesced"] += 1
+    # Shield so one caller disconnecting does not cancel the call for the others
+    return await asyncio.shield(task)
+
+
+def stats() -> dict:
+    return {
+        **_stats,
+        "in_flight": len(_in_flight),
+        "breaker_state": breaker.state,
+        "breaker_opened": breaker.times_opened,
+        "short_circuited": breaker.short_circuited,
+    }
+
+
+metrics.register("llm", stats)
+
+
+async def stream_chat_completion(
+    messages: List[dict],
+    max_tokens: int,
+    temperature: float,
+    model: Optional[str] = None,
+    deadline: Optional[float] = None,
+    priority: int = INTERACTIVE,
+    user_id: Optional[int] = None,
+) -> AsyncIterator[str]:
+    """
+    Yield the completion text piece by piece as the upstream produces it. Opening
+    the stream is retried like any other call; a stream that breaks midway is not.
+    """
+    _stats["requests"] += 1
+    stream, grant = await _create(
+        deadline or LLM_DEADLINE,
+        priority,
+        user_id,
+        model=model or LLM_MODEL,
+        messages=messages,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        stream=True,
+    )
+    try:
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    except RETRYABLE_ERRORS:
+        _stats["errors"] += 1
+        breaker.record_failure()
+        raise
+    finally:
+        # Hold the scheduler slot for the whole stream
+        grant.release()
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
@@ -0,0 +1,204 @@
+"""
+Admission control for outbound LLM requests.
+
+Requests wait here until the upstream budget allows them through:
+- priority classes are served strictly in order (interactive chat, then quiz
+  generation, then prefetch work such as study material and the quiz bank);
+- within a class, users share the budget by weighted fair queueing, so one
+  heavy user cannot starve the rest;
+- a global tokens-per-minute bucket caps what is sent upstream, and background
+  classes may not spend the slice reserved for interactive chat.
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+import metrics
+
+INTERACTIVE = 0
+QUIZ = 1
+PREFETCH = 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", QUIZ: "quiz", PREFETCH: "prefetch"}
+
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "90000"))  # 0 disables the budget
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "64"))  # 0 means unlimited
+# Share of the token bucket only interactive requests may spend
+LLM_INTERACTIVE_RESERVE = float(os.getenv("LLM_INTERACTIVE_RESERVE", "0.2"))
+
+# Finish tags kept per (class, user) before idle users are pruned
+_MAX_TRACKED_USERS = 10000
+
+
+class Grant:
+    """Permission to send one upstream request; release it when the call ends"""
+
+    def __init__(self, scheduler: "Scheduler", priority: int, cost: int):
+        self.scheduler = scheduler
+        self.loop = scheduler._loop
+        self.priority = priority
+        self.cost = cost
+        self.released = False
+
+    def release(self, actual_tokens: Optional[int] = None):
+        if not self.released:
+            self.released = True
+            self.scheduler._release(self, actual_tokens)
+
+
+class _Entry:
+    __slots__ = ("key", "start", "priority", "cost", "future", "enqueued_at", "cancelled")
+
+    def __init__(self, key: Tuple[int, float, int], start: float, priority: int, cost: int, future: asyncio.Future):
+        self.key = key
+        self.start = start
+        self.priority = priority
+        self.cost = cost
+        self.future = future
+        self.enqueued_at = time.monotonic()
+        self.cancelled = False
+
+    def __lt__(self, other: "_Entry") -> bool:
+        return self.key < other.key
+
+
+class Scheduler:
+    def __init__(self, tokens_per_minute: int, max_concurrency: int, interactive_reserve: float):
+        self.capacity = tokens_per_minute
+        self.rate = tokens_per_minute / 60.0
+        self.max_concurrency = max_concurrency
+        self.reserve = interactive_reserve * tokens_per_minute
+        self._reset()
+
+    def _reset(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._heap: List[_Entry] = []
+        self._seq = itertools.count()
+        self._tokens = float(self.capacity)
+        self._refilled_at = time.monotonic()
+        self._running = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Weighted fair queueing: per-class virtual time and each user's last finish tag
+        self._virtual: Dict[int, float] = {p: 0.0 for p in PRIORITY_NAMES}
+        self._finish: Dict[Tuple[int, Optional[int]], float] = {}
+        self._stats = {
+            p: {"queued": 0, "dispatched": 0, "cancelled": 0, "wait_ms_total": 0.0, "wait_ms_max": 0.0}
+            for p in PRIORITY_NAMES
+        }
+
+    async def acquire(self, priority: int, user_id: Optional[int], cost: int, weight: float = 1.0) -> Grant:
+        """Wait for a turn to send a request estimated at `cost` tokens"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Futures belong to one loop; CLI jobs and benchmarks may start several
+            self._reset()
+            self._loop = loop
+        if self.capacity > 0:
+            cost = min(cost, self.capacity)
+
+        virtual = self._virtual[priority]
+        start = max(virtual, self._finish.get((priority, user_id), virtual))
+        finish = start + cost / weight
+        self._finish[(priority, user_id)] = finish
+        if len(self._finish) > _MAX_TRACKED_USERS:
+            self._prune()
+
+        entry = _Entry((priority, finish, next(self._seq)), start, priority, cost, loop.create_future())
+        heapq.heappush(self._heap, entry)
+        self._stats[priority]["queued"] += 1
+        self._dispatch()
+        try:
+            return await entry.future
+        except asyncio.CancelledError:
+            if entry.future.done() and not entry.future.cancelled():
+                # Granted just as the caller gave up (e.g. its deadline passed)
+                entry.future.result().release(0)
+            else:
+                entry.cancelled = True
+                self._stats[priority]["cancelled"] += 1
+            raise
+
+    def _prune(self):
+        # Users at or behind the virtual clock would restart from it anyway
+        self._finish = {k: v for k, v in self._finish.items() if v > self._virtual[k[0]]}
+
+    def _refill(self):
+        now = time.monotonic()
+        if self.capacity > 0:
+            self._tokens = min(self.capacity, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._refill()
+        while self._heap:
+            entry = self._heap[0]
+            if entry.cancelled:
+                heapq.heappop(self._heap)
+                continue
+            if self.max_concurrency > 0 and self._running >= self.max_concurrency:
+                return
+            if self.capacity > 0:
+                needed = entry.cost
+                if entry.priority != INTERACTIVE:
+                    needed = min(self.capacity, needed + self.reserve)
+                if self._tokens < needed:
+                    # Wake up once the bucket holds enough for the head of the queue
+                    delay = (needed - self._tokens) / self.rate
+                    self._timer = self._loop.call_later(delay, self._dispatch)
+                    return
+                self._tokens -= entry.cost
+            heapq.heappop(self._heap)
+            self._running += 1
+            self._virtual[entry.priority] = max(self._virtual[entry.priority], entry.start)
+            waited = (time.monotonic() - entry.enqueued_at) * 1000
+            stats = self._stats[entry.priority]
+            stats["dispatched"] += 1
+            stats["wait_ms_total"] += waited
+            stats["wait_ms_max"] = max(stats["wait_ms_max"], waited)
+            entry.future.set_result(Grant(self, entry.priority, entry.cost))
+
+    def _release(self, grant: Grant, actual_tokens: Optional[int]):
+        if grant.loop is not self._loop:
+            return  # granted before a reset for a new event loop
+        self._running -= 1
+        if actual_tokens is not None and self.capacity > 0:
+            # Settle the estimate against what the upstream reports it used
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + grant.cost - actual_tokens)
+        if self._loop is not None and not self._loop.is_closed():
+            self._dispatch()
+
+    def stats(self) -> dict:
+        self._refill()
+        depth = {name: 0 for name in PRIORITY_NAMES.values()}
+        for entry in self._heap:
+            if not entry.cancelled:
+                depth[PRIORITY_NAMES[entry.priority]] += 1
+        classes = {}
+        for priority, s in self._stats.items():
+            dispatched = s["dispatched"]
+            classes[PRIORITY_NAMES[priority]] = {
+                "queued": s["queued"],
+                "dispatched": dispatched,
+                "cancelled": s["cancelled"],
+                "queue_depth": depth[PRIORITY_NAMES[priority]],
+                "wait_ms_avg": round(s["wait_ms_total"] / dispatched, 1) if dispatched else 0.0,
+                "wait_ms_max": round(s["wait_ms_max"], 1),
+            }
+        return {
+            "running": self._running,
+            "queue_depth": sum(depth.values()),
+            "tokens_available": int(self._tokens) if self.capacity > 0 else None,
+            "tokens_per_minute": self.capacity,
+            "classes": classes,
+        }
+
+
+scheduler = Scheduler(LLM_TOKENS_PER_MINUTE, LLM_MAX_CONCURRENCY, LLM_INTERACTIVE_RESERVE)
+
+metrics.register("llm_scheduler", scheduler.stats)
@@ -1,13 +1,29 @@
 from dotenv import load_dotenv
+import asyncio
 import os
 load_dotenv()
-from database import create_db_and_tables, seed_questions
+import active_sessions
+import auth
+import db_writer
+from database import async_engine, create_db_and_tables, seed_questions
+from llm import close_client
+import metrics
+import quiz_bank
+import quiz_jobs
+import study_cache
 from routers import users, sentiment, gpt_chat, questions
 from routers import ai, analytics, personalization, research
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 app = FastAPI()
+# Startup work running in the background; held here so it is not garbage-collected, cancelled on shutdown
+_background = set()
+
+def _spawn(coro):
+    task = asyncio.create_task(coro)
+    _background.add(task)
+    task.add_done_callback(_background.discard)
 
 # Get allowed origins from environment variable
 allowed_origins = os.getenv("ALLOWED_ORIGINS", "*").split(",")
@@ -21,12 +37,34 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # paging token of GET /questions
 )
 
 @app.on_event("startup")
-def on_startup():
+async def on_startup():
     create_db_and_tables()
     seed_questions()
+    db_writer.start()
+    await quiz_jobs.start()
+    active_sessions.start()
+    quiz_bank.load()
+    if os.getenv("QUIZ_BANK_PREFILL", "false").lower() == "true":
+        _spawn(quiz_bank.prefill())
+    if os.getenv("WARM_STUDY_CACHE", "false").lower() == "true":
+        _spawn(study_cache.warm(int(os.getenv("WARM_STUDY_CACHE_CONCURRENCY", "4"))))
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    tasks = list(_background)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await quiz_jobs.stop()
+    await active_sessions.stop()
+    await db_writer.stop()
+    await close_client()
+    auth.shutdown_password_pool()
+    await async_engine.dispose()
 
 app.include_router(users.router)
 app.include_router(sentiment.router)
@@ -37,6 +75,11 @@ app.include_router(analytics.router)
 app.include_router(personalization.router)
 app.include_router(research.router)
 
+@app.get("/metrics")
+def get_metrics():
+    """In-process counters from the LLM client, quiz workers and caches"""
+    return metrics.snapshot()
+
 @app.get("/")
 def read_root():
     return {"msg": "DSA-GPT backend is running"} 
\ No newline at end of file
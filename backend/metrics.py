@@ -0,0 +1,12 @@
+from typing import Callable, Dict
+
+# Each component registers a zero-argument function returning a dict of its counters
+_sources: Dict[str, Callable[[], dict]] = {}
+
+
+def register(name: str, source: Callable[[], dict]):
+    _sources[name] = source
+
+
+def snapshot() -> dict:
+    return {name: source() for name, source in _sources.items()}
@@ -0,0 +1,34 @@
+"""Alembic environment: migrates the database configured in database.py"""
+import os
+import sys
+from logging.config import fileConfig
+
+from alembic import context
+from sqlmodel import SQLModel
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database import engine  # noqa: E402
+import models  # noqa: E402,F401  (registers the tables on SQLModel.metadata)
+
+config = context.config
+if config.config_file_name and config.attributes.get("connection") is None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+
+def run_migrations(connection):
+    context.configure(
+        connection=connection,
+        target_metadata=SQLModel.metadata,
+        render_as_batch=True,  # SQLite can only ALTER by copying the table
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+# create_db_and_tables passes its own connection; the CLI opens one
+connection = config.attributes.get("connection")
+if connection is not None:
+    run_migrations(connection)
+else:
+    with engine.connect() as connection:
+        run_migrations(connection)
@@ -0,0 +1,286 @@
+"""Baseline schema: the tables as create_all built them before migrations existed
+
+Revision ID: 0001
+Revises:
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases built by create_all before migrations existed already have some
+    # or all of these tables; create only what is missing
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    if 'question' not in existing:
+        op.create_table('question',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('description', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('difficulty', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('language', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('solution', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('examples', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if 'quizbankitem' not in existing:
+        op.create_table('quizbankitem',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('topic', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('difficulty', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('question', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('options', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('correct_answer', sa.Integer(), nullable=False),
+        sa.Column('explanation', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('content_hash', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('content_hash')
+        )
+        with op.batch_alter_table('quizbankitem', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_quizbankitem_topic'), ['topic'], unique=False)
+    if 'studymaterial' not in existing:
+        op.create_table('studymaterial',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('cache_key', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('title', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('content', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('model', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('prompt_version', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('cache_key')
+        )
+    if 'user' not in existing:
+        op.create_table('user',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('email', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('hashed_password', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('preferred_language', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('dsa_level', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if 'cognitiveprofile' not in existing:
+        op.create_table('cognitiveprofile',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('working_memory_capacity', sa.Float(), nullable=False),
+        sa.Column('processing_speed', sa.Float(), nullable=False),
+        sa.Column('attention_span', sa.Float(), nullable=False),
+        sa.Column('pattern_recognition', sa.Float(), nullable=False),
+        sa.Column('logical_reasoning', sa.Float(), nullable=False),
+        sa.Column('spatial_ability', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if 'learningpath' not in existing:
+        op.create_table('learningpath',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('topic_id', sa.Integer(), nullable=False),
+        sa.Column('order', sa.Integer(), nullable=False),
+        sa.Column('difficulty_adjustment', sa.Float(), nullable=False),
+        sa.Column('estimated_duration', sa.Integer(), nullable=False),
+        sa.Column('prerequisites', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('completed', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['topic_id'], ['question.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if 'learningstyle' not in existing:
+        op.create_table('learningstyle',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('visual_preference', sa.Float(), nullable=False),
+        sa.Column('auditory_preference', sa.Float(), nullable=False),
+        sa.Column('kinesthetic_preference', sa.Float(), nullable=False),
+        sa.Column('reading_preference', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if 'spacedrepetition' not in existing:
+        op.create_table('spacedrepetition',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('topic_id', sa.Integer(), nullable=False),
+        sa.Column('difficulty_level', sa.Integer(), nullable=False),
+        sa.Column('next_review', sa.DateTime(), nullable=False),
+        sa.Column('review_count', sa.Integer(), nullable=False),
+        sa.Column('success_rate', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['topic_id'], ['question.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if 'userquestionprogress' not in existing:
+        op.create_table('userquestionprogress',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('question_id', sa.Integer(), nullable=False),
+        sa.Column('attempted', sa.Boolean(), nullable=False),
+        sa.Column('solved', sa.Boolean(), nullable=False),
+        sa.Column('last_answer', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['question_id'], ['question.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if 'usersession' not in existing:
+        op.create_table('usersession',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('session_start', sa.DateTime(), nullable=False),
+        sa.Column('session_end', sa.DateTime(), nullable=True),
+        sa.Column('topics_covered', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('confusion_flags', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('average_sentiment', sa.Float(), nullable=False),
+        sa.Column('total_messages', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if 'chatmessage' not in existing:
+        op.create_table('chatmessage',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('session_id', sa.Integer(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('message', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('sender', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('sentiment_score', sa.Float(), nullable=False),
+        sa.Column('emotion_category', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('timestamp', sa.DateTime(), nullable=False),
+        sa.Column('topic', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('quiz_generated', sa.Boolean(), nullable=False),
+        sa.Column('quiz_answered', sa.Boolean(), nullable=False),
+        sa.Column('quiz_correct', sa.Boolean(), nullable=True),
+        sa.ForeignKeyConstraint(['session_id'], ['usersession.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if 'emotionaltrend' not in existing:
+        op.create_table('emotionaltrend',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('session_id', sa.Integer(), nullable=True),
+        sa.Column('timestamp', sa.DateTime(), nullable=False),
+        sa.Column('sentiment_score', sa.Float(), nullable=False),
+        sa.Column('emotion_category', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('topic', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('message_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['session_id'], ['usersession.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if 'quiz' not in existing:
+        op.create_table('quiz',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('session_id', sa.Integer(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('question', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('options', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('correct_answer', sa.Integer(), nullable=False),
+        sa.Column('user_answer', sa.Integer(), nullable=True),
+        sa.Column('is_correct', sa.Boolean(), nullable=True),
+        sa.Column('topic', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('difficulty', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('generated_at', sa.DateTime(), nullable=False),
+        sa.Column('answered_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['session_id'], ['usersession.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if 'sessionpause' not in existing:
+        op.create_table('sessionpause',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('session_id', sa.Integer(), nullable=False),
+        sa.Column('pause_time', sa.DateTime(), nullable=False),
+        sa.Column('resume_time', sa.DateTime(), nullable=True),
+        sa.Column('reason', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['session_id'], ['usersession.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if 'sessionsummary' not in existing:
+        op.create_table('sessionsummary',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('session_id', sa.Integer(), nullable=False),
+        sa.Column('covered_until', sa.Integer(), nullable=False),
+        sa.Column('topics', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('struggles', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('notes', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['session_id'], ['usersession.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('session_id')
+        )
+    if 'bookmark' not in existing:
+        op.create_table('bookmark',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('question_id', sa.Integer(), nullable=True),
+        sa.Column('message_id', sa.Integer(), nullable=True),
+        sa.Column('title', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('description', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('tags', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['message_id'], ['chatmessage.id'], ),
+        sa.ForeignKeyConstraint(['question_id'], ['question.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if 'quizjob' not in existing:
+        op.create_table('quizjob',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('session_id', sa.Integer(), nullable=True),
+        sa.Column('topic', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('difficulty', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('status', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('last_error', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('quiz_id', sa.Integer(), nullable=True),
+        sa.Column('result', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['quiz_id'], ['quiz.id'], ),
+        sa.ForeignKeyConstraint(['session_id'], ['usersession.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+
+def downgrade():
+    op.drop_table('quizjob')
+    op.drop_table('bookmark')
+    op.drop_table('sessionsummary')
+    op.drop_table('sessionpause')
+    op.drop_table('quiz')
+    op.drop_table('emotionaltrend')
+    op.drop_table('chatmessage')
+    op.drop_table('usersession')
+    op.drop_table('userquestionprogress')
+    op.drop_table('spacedrepetition')
+    op.drop_table('learningstyle')
+    op.drop_table('learningpath')
+    op.drop_table('cognitiveprofile')
+    op.drop_table('user')
+    op.drop_table('studymaterial')
+    with op.batch_alter_table('quizbankitem', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_quizbankitem_topic'))
+
+    op.drop_table('quizbankitem')
+    op.drop_table('question')
@@ -0,0 +1,52 @@
+"""Indexes for the hot per-user queries, and unique emails and progress rows
+
+Revision ID: 0002
+Revises: 0001
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    # name, table, columns, unique
+    ("ux_user_email", "user", ["email"], True),
+    ("ux_userquestionprogress_user_question", "userquestionprogress", ["user_id", "question_id"], True),
+    ("ix_chatmessage_user_time", "chatmessage", ["user_id", "timestamp"], False),
+    ("ix_chatmessage_session", "chatmessage", ["session_id", "id"], False),
+    ("ix_emotionaltrend_user_time", "emotionaltrend", ["user_id", "timestamp"], False),
+    ("ix_emotionaltrend_session", "emotionaltrend", ["session_id"], False),
+    ("ix_quiz_user_answered", "quiz", ["user_id", "answered_at"], False),
+    ("ix_quiz_session", "quiz", ["session_id"], False),
+    ("ix_spacedrepetition_user_review", "spacedrepetition", ["user_id", "next_review"], False),
+    ("ix_usersession_user_start", "usersession", ["user_id", "session_start"], False),
+    ("ix_usersession_open", "usersession", ["session_end", "session_start"], False),
+]
+
+
+def upgrade():
+    bind = op.get_bind()
+    duplicates = bind.execute(sa.text(
+        'SELECT email FROM "user" GROUP BY email HAVING COUNT(*) > 1'
+    )).scalars().all()
+    if duplicates:
+        # Users own chats, quizzes and progress; merging them is a decision for a person
+        raise RuntimeError(
+            f"Cannot add the unique email index: {len(duplicates)} emails belong to more than one user "
+            f"(e.g. {duplicates[0]}). Merge or rename those accounts, then restart."
+        )
+    # Racing progress updates could insert the same (user, question) twice; keep the newest row
+    bind.execute(sa.text(
+        "DELETE FROM userquestionprogress WHERE id NOT IN "
+        "(SELECT MAX(id) FROM userquestionprogress GROUP BY user_id, question_id)"
+    ))
+    for name, table, columns, unique in INDEXES:
+        op.create_index(name, table, columns, unique=unique)
+
+
+def downgrade():
+    for name, table, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
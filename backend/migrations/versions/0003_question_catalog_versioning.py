@@ -0,0 +1,58 @@
+"""Question catalog versioning: catalogversion table and one row per (title, language)
+
+Revision ID: 0003
+Revises: 0002
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+# Columns that point at question.id
+QUESTION_REFERENCES = [
+    ("userquestionprogress", "question_id"),
+    ("spacedrepetition", "topic_id"),
+    ("learningpath", "topic_id"),
+    ("bookmark", "question_id"),
+]
+
+
+def upgrade():
+    op.create_table('catalogversion',
+    sa.Column('name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('content_hash', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('seeded_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+    # Two workers starting on an empty database could both seed the catalog.
+    # Point everything at the oldest copy of each question and drop the rest.
+    bind = op.get_bind()
+    # A user may have progress on several copies; keep the newest row per (user, question)
+    bind.execute(sa.text(
+        "DELETE FROM userquestionprogress WHERE id NOT IN "
+        "(SELECT MAX(p.id) FROM userquestionprogress p JOIN question q ON q.id = p.question_id "
+        "GROUP BY p.user_id, q.title, q.language) "
+        "AND question_id IN (SELECT id FROM question)"
+    ))
+    for table, column in QUESTION_REFERENCES:
+        bind.execute(sa.text(
+            f"UPDATE {table} SET {column} = ("
+            f"SELECT MIN(q2.id) FROM question q1 JOIN question q2 "
+            f"ON q2.title = q1.title AND q2.language = q1.language WHERE q1.id = {table}.{column}) "
+            f"WHERE {column} IN (SELECT id FROM question)"
+        ))
+    bind.execute(sa.text(
+        "DELETE FROM question WHERE id NOT IN (SELECT MIN(id) FROM question GROUP BY title, language)"
+    ))
+    op.create_index('ux_question_title_language', 'question', ['title', 'language'], unique=True)
+
+
+def downgrade():
+    op.drop_index('ux_question_title_language', table_name='question')
+    op.drop_table('catalogversion')
@@ -0,0 +1,70 @@
+"""Normalized problems: question content stored once per title, questions become language variants
+
+The content of the lowest-id copy of each title is kept. Question ids do not
+change, so progress, bookmarks, spaced repetition and learning paths are untouched.
+
+Revision ID: 0004
+Revises: 0003
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+CONTENT_COLUMNS = ["title", "description", "difficulty", "solution", "examples"]
+FOREIGN_KEY = "fk_question_problem_id_problem"
+
+
+def upgrade():
+    op.create_table('problem',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('title', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('description', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('difficulty', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('solution', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('examples', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ux_problem_title', 'problem', ['title'], unique=True)
+
+    columns = ", ".join(CONTENT_COLUMNS)
+    op.execute(
+        f"INSERT INTO problem ({columns}) SELECT {columns} FROM question "
+        f"WHERE id IN (SELECT MIN(id) FROM question GROUP BY title) ORDER BY id"
+    )
+    with op.batch_alter_table('question', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('problem_id', sa.Integer(), nullable=True))
+    op.execute("UPDATE question SET problem_id = (SELECT p.id FROM problem p WHERE p.title = question.title)")
+
+    with op.batch_alter_table('question', schema=None) as batch_op:
+        batch_op.alter_column('problem_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.drop_index('ux_question_title_language')
+        batch_op.create_index('ux_question_problem_language', ['problem_id', 'language'], unique=True)
+        batch_op.create_foreign_key(FOREIGN_KEY, 'problem', ['problem_id'], ['id'])
+        for column in CONTENT_COLUMNS:
+            batch_op.drop_column(column)
+
+
+def downgrade():
+    with op.batch_alter_table('question', schema=None) as batch_op:
+        for column in CONTENT_COLUMNS:
+            batch_op.add_column(sa.Column(column, sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+    assignments = ", ".join(
+        f"{column} = (SELECT p.{column} FROM problem p WHERE p.id = question.problem_id)" for column in CONTENT_COLUMNS
+    )
+    op.execute(f"UPDATE question SET {assignments}")
+
+    with op.batch_alter_table('question', schema=None) as batch_op:
+        for column in ("title", "description", "difficulty"):
+            batch_op.alter_column(column, existing_type=sqlmodel.sql.sqltypes.AutoString(), nullable=False)
+        batch_op.drop_constraint(FOREIGN_KEY, type_='foreignkey')
+        batch_op.drop_index('ux_question_problem_language')
+        batch_op.create_index('ux_question_title_language', ['title', 'language'], unique=True)
+        batch_op.drop_column('problem_id')
+
+    op.drop_index('ux_problem_title', table_name='problem')
+    op.drop_table('problem')
@@ -0,0 +1,19 @@
+"""Index for paging GET /questions filtered by language in id order
+
+Revision ID: 0005
+Revises: 0004
+"""
+from alembic import op
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_question_language', 'question', ['language', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_question_language', table_name='question')
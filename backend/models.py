@@ -1,8 +1,10 @@
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 from typing import Optional, List
 from datetime import datetime
 
 class User(SQLModel, table=True):
+    __table_args__ = (Index("ux_user_email", "email", unique=True),)
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str
     email: str
@@ -11,16 +13,38 @@ class User(SQLModel, table=True):
     dsa_level: str = "Beginner"
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
-class Question(SQLModel, table=True):
+class Problem(SQLModel, table=True):
+    """Content of a catalog question, shared by all of its language variants"""
+    __table_args__ = (Index("ux_problem_title", "title", unique=True),)
     id: Optional[int] = Field(default=None, primary_key=True)
     title: str
     description: str
     difficulty: str  # 'basic', 'intermediate', 'advanced'
-    language: str = "Python"  # 'Python', 'C++', 'JavaScript'
     solution: Optional[str] = None
     examples: Optional[str] = None  # JSON string: [{"input": ..., "output": ..., "explanation": ...}, ...]
 
+class Question(SQLModel, table=True):
+    """A Problem offered in one language; progress, bookmarks and learning paths point at these ids"""
+    __table_args__ = (
+        Index("ux_question_problem_language", "problem_id", "language", unique=True),
+        Index("ix_question_language", "language", "id"),  # GET /questions?language= pages in id order
+    )
+    id: Optional[int] = Field(default=None, primary_key=True)
+    problem_id: int = Field(foreign_key="problem.id")
+    language: str = "Python"  # 'Python', 'C++', 'JavaScript'
+
+class QuestionRead(SQLModel):
+    """A Question joined with its Problem, as the /questions endpoints return it"""
+    id: int
+    title: str
+    description: str
+    difficulty: str
+    language: str
+    solution: Optional[str] = None
+    examples: Optional[str] = None
+
 class UserQuestionProgress(SQLModel, table=True):
+    __table_args__ = (Index("ux_userquestionprogress_user_question", "user_id", "question_id", unique=True),)
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
     question_id: int = Field(foreign_key="question.id")
@@ -31,6 +55,10 @@ class UserQuestionProgress(SQLModel, table=True):
 
 class UserSession(SQLModel, table=True):
     """Session memory for contextual tutoring as described in the research paper"""
+    __table_args__ = (
+        Index("ix_usersession_user_start", "user_id", "session_start"),
+        Index("ix_usersession_open", "session_end", "session_start"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
     session_start: datetime = Field(default_factory=datetime.utcnow)
@@ -42,6 +70,10 @@ class UserSession(SQLModel, table=True):
 
 class ChatMessage(SQLModel, table=True):
     """Store chat messages for session memory and sentiment analysis"""
+    __table_args__ = (
+        Index("ix_chatmessage_user_time", "user_id", "timestamp"),
+        Index("ix_chatmessage_session", "session_id", "id"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     session_id: Optional[int] = Field(foreign_key="usersession.id")
     user_id: Optional[int] = Field(foreign_key="user.id")
@@ -57,6 +89,10 @@ class ChatMessage(SQLModel, table=True):
 
 class Quiz(SQLModel, table=True):
     """Store generated quizzes for tracking and improvement"""
+    __table_args__ = (
+        Index("ix_quiz_user_answered", "user_id", "answered_at"),
+        Index("ix_quiz_session", "session_id"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     session_id: Optional[int] = Field(foreign_key="usersession.id")
     user_id: Optional[int] = Field(foreign_key="user.id")
@@ -72,6 +108,10 @@ class Quiz(SQLModel, table=True):
 
 class EmotionalTrend(SQLModel, table=True):
     """Track emotional trends over time for personalization"""
+    __table_args__ = (
+        Index("ix_emotionaltrend_user_time", "user_id", "timestamp"),
+        Index("ix_emotionaltrend_session", "session_id"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: Optional[int] = Field(foreign_key="user.id")
     session_id: Optional[int] = Field(foreign_key="usersession.id")
@@ -92,6 +132,7 @@ class LearningStyle(SQLModel, table=True):
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
 class SpacedRepetition(SQLModel, table=True):
+    __table_args__ = (Index("ix_spacedrepetition_user_review", "user_id", "next_review"),)
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
     topic_id: int = Field(foreign_key="question.id")
@@ -142,4 +183,63 @@ class SessionPause(SQLModel, table=True):
     pause_time: datetime = Field()
     resume_time: Optional[datetime] = Field(default=None)
     reason: str = Field(default="")  # User-provided reason for pause
-    created_at: datetime = Field(default_factory=datetime.utcnow) 
\ No newline at end of file
+    created_at: datetime = Field(default_factory=datetime.utcnow) 
+
+class QuizJob(SQLModel, table=True):
+    """Background quiz generation requested by a chat turn; its id is the client's quiz ticket"""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: Optional[int] = Field(foreign_key="user.id")
+    session_id: Optional[int] = Field(foreign_key="usersession.id")
+    topic: str
+    difficulty: str
+    status: str = "pending"  # 'pending', 'running', 'done', 'failed'
+    attempts: int = 0
+    last_error: Optional[str] = None
+    quiz_id: Optional[int] = Field(default=None, foreign_key="quiz.id")
+    result: Optional[str] = None  # JSON string of the generated quiz, including explanation
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class QuizBankItem(SQLModel, table=True):
+    """Pre-generated, validated quiz served from memory instead of a per-chat LLM call"""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    topic: str = Field(index=True)
+    difficulty: str  # user's dsa_level: 'Beginner', 'Intermediate', 'Advanced'
+    question: str
+    options: str  # JSON string of options
+    correct_answer: int
+    explanation: Optional[str] = None
+    content_hash: str = Field(unique=True)  # sha256 of the normalized question, for dedupe
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class StudyMaterial(SQLModel, table=True):
+    """Cached /ai/question-detail output, keyed by a hash of everything that shapes the prompt"""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    cache_key: str = Field(unique=True)
+    title: str
+    content: str
+    model: str
+    prompt_version: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: Optional[datetime] = None  # None means it never expires
+
+
+class SessionSummary(SQLModel, table=True):
+    """Rolling summary of the turns of a UserSession that no longer fit in the chat prompt"""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    session_id: int = Field(foreign_key="usersession.id", unique=True)
+    covered_until: int = 0  # id of the newest ChatMessage folded into the summary
+    topics: Optional[str] = None  # JSON string of topics discussed, oldest first
+    struggles: Optional[str] = None  # JSON string of topics the user found hard
+    notes: Optional[str] = None  # JSON string of short "Student: ..." / "Tutor: ..." notes
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class CatalogVersion(SQLModel, table=True):
+    """Which revision of a data/ catalog file was last loaded into the database"""
+    name: str = Field(primary_key=True)  # e.g. "questions"
+    version: int
+    content_hash: str  # sha256 of the file; seeding is skipped while it matches
+    seeded_at: datetime = Field(default_factory=datetime.utcnow)
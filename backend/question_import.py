@@ -0,0 +1,176 @@
+"""
+Bulk question import from JSONL or CSV files.
+
+Rows are read as a stream and written in chunks of IMPORT_CHUNK_SIZE with one
+batch of upserts per chunk, so memory stays flat however large the file is.
+Content is stored once per title: a row with a known title updates that
+problem for all of its languages and adds its language if new. Each row needs a
+title, description and difficulty (basic, intermediate or advanced). It may
+also have a language (default Python), a solution, and examples: a JSON list
+of {"input", "output", "explanation"} objects.
+
+    python question_import.py problems.jsonl
+    python question_import.py problems.csv --chunk-size 5000
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import time
+from typing import AsyncIterator, Iterator, Optional, Tuple
+
+from database import engine, upsert_questions
+
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))
+MAX_REPORTED_ERRORS = 20
+
+FORMATS = ("jsonl", "csv")
+DIFFICULTIES = {"basic", "intermediate", "advanced"}
+
+
+def _records(stream: io.TextIOBase, fmt: str) -> Iterator[Tuple[int, object]]:
+    """(line number, raw record) pairs; a record that cannot be parsed is yielded as the exception"""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, ValueError(f"invalid JSON: {e}")
+
+
+def _examples(value) -> Optional[str]:
+    """Validate examples given as a JSON string (CSV) or a list (JSONL) and return them as a JSON string"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"examples is not valid JSON: {e}")
+    if not isinstance(value, list) or not all(
+        isinstance(example, dict) and "input" in example and "output" in example for example in value
+    ):
+        raise ValueError("examples must be a list of objects with input and output")
+    return json.dumps(value, ensure_ascii=False)
+
+
+def validate(record) -> dict:
+    """A Question row from one raw record, or ValueError saying what is wrong with it"""
+    if isinstance(record, Exception):
+        raise record
+    if not isinstance(record, dict):
+        raise ValueError("expected an object")
+    row = {}
+    for column in ("title", "description", "difficulty"):
+        value = record.get(column)
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError(f"{column} is required")
+        row[column] = value.strip()
+    row["difficulty"] = row["difficulty"].lower()
+    if row["difficulty"] not in DIFFICULTIES:
+        raise ValueError(f"difficulty must be one of {', '.join(sorted(DIFFICULTIES))}")
+    for column in ("language", "solution"):
+        if not isinstance(record.get(column) or "", str):
+            raise ValueError(f"{column} must be a string")
+    row["language"] = (record.get("language") or "Python").strip()
+    row["solution"] = record.get("solution") or None
+    row["examples"] = _examples(record.get("examples"))
+    return row
+
+
+def import_questions(stream: io.TextIOBase, fmt: str, chunk_size: int = IMPORT_CHUNK_SIZE) -> dict:
+    """Validate and upsert every record of an open JSONL or CSV text stream; returns a report"""
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+    report = {"rows": 0, "upserted": 0, "duplicates": 0, "invalid": 0, "errors": []}
+    started = time.perf_counter()
+    chunk = {}
+
+    def flush():
+        # One row per key: PostgreSQL refuses to upsert the same row twice in one statement
+        with engine.begin() as connection:
+            upsert_questions(connection, list(chunk.values()))
+        report["upserted"] += len(chunk)
+        chunk.clear()
+
+    for line_number, record in _records(stream, fmt):
+        report["rows"] += 1
+        try:
+            row = validate(record)
+        except ValueError as e:
+            report["invalid"] += 1
+            if len(report["errors"]) < MAX_REPORTED_ERRORS:
+                report["errors"].append(f"line {line_number}: {e}")
+            continue
+        key = (row["title"], row["language"])
+        if key in chunk:
+            report["duplicates"] += 1  # the later row wins, as it would across chunks
+        chunk[key] = row
+        if len(chunk) >= chunk_size:
+            flush()
+    if chunk:
+        flush()
+
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    report["rows_per_sec"] = round(report["rows"] / report["seconds"]) if report["seconds"] else report["rows"]
+    return report
+
+
+class _AsyncBody(io.RawIOBase):
+    """Blocking file object over an async byte stream, read from a worker thread"""
+
+    def __init__(self, chunks: AsyncIterator[bytes], loop: asyncio.AbstractEventLoop):
+        self._chunks = chunks
+        self._loop = loop
+        self._pending = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._pending:
+            try:
+                self._pending = asyncio.run_coroutine_threadsafe(self._chunks.__anext__(), self._loop).result()
+            except StopAsyncIteration:
+                return 0
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+async def import_stream(chunks: AsyncIterator[bytes], fmt: str, chunk_size: int = IMPORT_CHUNK_SIZE) -> dict:
+    """import_questions over an async byte stream such as a request body, without buffering it"""
+    body = _AsyncBody(chunks, asyncio.get_running_loop())
+    stream = io.TextIOWrapper(io.BufferedReader(body), encoding="utf-8-sig", newline="")
+    return await asyncio.to_thread(import_questions, stream, fmt, chunk_size)
+
+
+def format_for(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    return "jsonl" if extension == "ndjson" else extension
+
+
+if __name__ == "__main__":
+    from database import create_db_and_tables
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS, help="default: from the file extension")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    create_db_and_tables()
+    with open(args.path, encoding="utf-8-sig", newline="") as f:
+        report = import_questions(f, args.format or format_for(args.path), args.chunk_size)
+    for error in report.pop("errors"):
+        print(error)
+    print(f"Import: {report}")
@@ -0,0 +1,221 @@
+"""
+Pre-generated quiz bank, one bucket per (topic, dsa_level), served from memory.
+
+Fill the bank ahead of time with:
+    python quiz_bank.py --per-bucket 20 --concurrency 4
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database import async_engine, engine
+import metrics
+from models import Quiz, QuizBankItem
+from llm_scheduler import PREFETCH
+from quiz_jobs import generate_quiz
+
+logger = logging.getLogger(__name__)
+
+# Topics offered by the chat UI, plus the default used when no topic is chosen
+TOPICS = [
+    "DSA", "Arrays", "Strings", "Linked Lists", "Stacks", "Queues", "Trees",
+    "Graphs", "Dynamic Programming", "Sorting", "Searching",
+]
+LEVELS = ["Beginner", "Intermediate", "Advanced"]
+
+QUIZ_BANK_SIZE = int(os.getenv("QUIZ_BANK_SIZE", "20"))  # quizzes per bucket when pre-generating
+QUIZ_BANK_LOW = int(os.getenv("QUIZ_BANK_LOW", "5"))  # unseen quizzes left for a user before refilling
+QUIZ_BANK_REFILL = int(os.getenv("QUIZ_BANK_REFILL", "10"))
+QUIZ_BANK_MAX = int(os.getenv("QUIZ_BANK_MAX", "200"))  # hard cap per bucket
+QUIZ_BANK_USERS = int(os.getenv("QUIZ_BANK_USERS", "10000"))  # users whose served history stays in memory
+
+Bucket = Tuple[str, str]
+
+_items: Dict[int, dict] = {}
+_buckets: Dict[Bucket, List[int]] = {}
+_by_hash: Dict[str, int] = {}
+_served: "OrderedDict[int, Set[int]]" = OrderedDict()
+_refilling: Set[Bucket] = set()
+_refill_tasks: Set[asyncio.Task] = set()  # referenced until done, so a pending refill is not collected
+_stats = {"hits": 0, "misses": 0, "refills": 0, "generated": 0, "rejected": 0}
+
+
+def content_hash(question: str) -> str:
+    normalized = " ".join(question.lower().split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def _index(item: QuizBankItem):
+    _items[item.id] = {
+        "bank_id": item.id,
+        "question": item.question,
+        "options": json.loads(item.options),
+        "correct_answer": item.correct_answer,
+        "explanation": item.explanation or "",
+    }
+    _buckets.setdefault((item.topic, item.difficulty), []).append(item.id)
+    _by_hash[item.content_hash] = item.id
+
+
+def _reindex(items: List[QuizBankItem]):
+    _items.clear()
+    _buckets.clear()
+    _by_hash.clear()
+    for item in items:
+        _index(item)
+
+
+def load():
+    """Load every stored quiz into the in-memory index"""
+    with Session(engine) as session:
+        _reindex(session.exec(select(QuizBankItem)).all())
+
+
+async def load_async():
+    """load() for callers on the event loop"""
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        _reindex((await session.exec(select(QuizBankItem))).all())
+
+
+def _served_for(user_id: int, session: Session) -> Set[int]:
+    served = _served.get(user_id)
+    if served is None:
+        # First draw for this user in this process: recover history from their past quizzes
+        questions = session.exec(select(Quiz.question).where(Quiz.user_id == user_id)).all()
+        served = {_by_hash[h] for h in map(content_hash, questions) if h in _by_hash}
+        _served[user_id] = served
+        if len(_served) > QUIZ_BANK_USERS:
+            _served.popitem(last=False)
+    else:
+        _served.move_to_end(user_id)
+    return served
+
+
+def draw(user_id: int, topic: str, level: str, session: Session) -> Optional[dict]:
+    """Pick a quiz this user has not seen yet, or None if the bucket is exhausted"""
+    bucket = (topic, level)
+    ids = _buckets.get(bucket, [])
+    served = _served_for(user_id, session)
+    unseen = [i for i in ids if i not in served]
+    if len(unseen) <= QUIZ_BANK_LOW:
+        schedule_refill(bucket)
+    if not unseen:
+        _stats["misses"] += 1
+        return None
+    item_id = random.choice(unseen)
+    served.add(item_id)
+    _stats["hits"] += 1
+    return dict(_items[item_id])
+
+
+def stats() -> dict:
+    return {**_stats, "buckets": len(_buckets), "items": len(_items), "refilling": len(_refilling)}
+
+
+metrics.register("quiz_bank", stats)
+
+
+async def _generate_one(bucket: Bucket) -> bool:
+    topic, level = bucket
+    try:
+        # Not coalesced: concurrent fills want different quizzes, not copies of one
+        quiz_data = await generate_quiz(topic, level, temperature=1.0, priority=PREFETCH, coalesce=False)
+    except Exception as e:
+        logger.warning("Quiz bank generation for %s failed: %s", bucket, e)
+        _stats["rejected"] += 1
+        return False
+    digest = content_hash(quiz_data["question"])
+    if digest in _by_hash:
+        _stats["rejected"] += 1
+        return False
+    item = QuizBankItem(
+        topic=topic,
+        difficulty=level,
+        question=quiz_data["question"],
+        options=json.dumps(quiz_data["options"]),
+        correct_answer=quiz_data["correct_answer"],
+        explanation=quiz_data.get("explanation"),
+        content_hash=digest,
+    )
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        session.add(item)
+        try:
+            await session.commit()
+        except IntegrityError:
+            # Another process stored the same question first
+            _stats["rejected"] += 1
+            return False
+    _index(item)
+    _stats["generated"] += 1
+    return True
+
+
+async def fill_bucket(bucket: Bucket, target: int, semaphore: asyncio.Semaphore):
+    """Generate quizzes until the bucket holds `target` of them (duplicates and bad JSON are retried)"""
+    target = min(target, QUIZ_BANK_MAX)
+    attempts_left = target * 3
+
+    async def one():
+        async with semaphore:
+            return await _generate_one(bucket)
+
+    while attempts_left > 0:
+        missing = target - len(_buckets.get(bucket, []))
+        if missing <= 0:
+            break
+        batch = min(missing, attempts_left)
+        attempts_left -= batch
+        await asyncio.gather(*(one() for _ in range(batch)))
+
+
+def schedule_refill(bucket: Bucket):
+    """Grow a bucket in the background; only known topics and levels are refilled"""
+    if bucket in _refilling or bucket[0] not in TOPICS or bucket[1] not in LEVELS:
+        return
+    size = len(_buckets.get(bucket, []))
+    if size >= QUIZ_BANK_MAX:
+        return
+    _refilling.add(bucket)
+    _stats["refills"] += 1
+
+    async def refill():
+        try:
+            await fill_bucket(bucket, size + QUIZ_BANK_REFILL, asyncio.Semaphore(2))
+        finally:
+            _refilling.discard(bucket)
+
+    task = asyncio.get_running_loop().create_task(refill())
+    _refill_tasks.add(task)
+    task.add_done_callback(_refill_tasks.discard)
+
+
+async def prefill(per_bucket: int = QUIZ_BANK_SIZE, concurrency: int = 4):
+    """Top every (topic, level) bucket up to `per_bucket` quizzes"""
+    await load_async()
+    semaphore = asyncio.Semaphore(concurrency)
+    await asyncio.gather(*(
+        fill_bucket((topic, level), per_bucket, semaphore) for topic in TOPICS for level in LEVELS
+    ))
+
+
+if __name__ == "__main__":
+    from database import create_db_and_tables
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--per-bucket", type=int, default=QUIZ_BANK_SIZE)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    create_db_and_tables()
+    asyncio.run(prefill(args.per_bucket, args.concurrency))
+    print(f"Quiz bank: {stats()}")
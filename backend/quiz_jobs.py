@@ -0,0 +1,271 @@
+import asyncio
+import json
+import logging
+import os
+import random
+from datetime import datetime
+from typing import Dict, Optional, Set
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database import async_engine
+import metrics
+from llm import chat_completion
+from llm_scheduler import QUIZ
+from models import Quiz, QuizJob
+
+logger = logging.getLogger(__name__)
+
+QUIZ_WORKERS = int(os.getenv("QUIZ_WORKERS", "4"))
+QUIZ_QUEUE_SIZE = int(os.getenv("QUIZ_QUEUE_SIZE", "1000"))
+QUIZ_MAX_ATTEMPTS = int(os.getenv("QUIZ_MAX_ATTEMPTS", "3"))
+QUIZ_RETRY_BACKOFF = float(os.getenv("QUIZ_RETRY_BACKOFF", "1.0"))  # seconds, doubled per attempt
+
+_queue: Optional[asyncio.Queue] = None
+_workers: list = []
+# One future per waiting caller, resolved when the job reaches 'done' or 'failed'
+_waiters: Dict[int, Set[asyncio.Future]] = {}
+# Retries and failure writes running in the background; held here so they are not garbage-collected
+_background: Set[asyncio.Task] = set()
+_stats = {"submitted": 0, "done": 0, "failed": 0, "retries": 0, "rejected": 0}
+
+
+def generate_quiz_prompt(topic: str, user_level: str) -> str:
+    """Generate a quiz question based on the current topic"""
+    return f"""Generate a multiple choice quiz question about {topic} suitable for {user_level} level.
+Return ONLY a JSON object with this exact format:
+{{
+    "question": "What is the time complexity of...",
+    "options": ["Option A", "Option B", "Option C", "Option D"],
+    "correct_answer": 0,
+    "explanation": "Brief explanation of why this is correct"
+}}"""
+
+
+def parse_quiz(content: Optional[str]) -> dict:
+    """Parse and validate the LLM's quiz JSON, raising ValueError if unusable"""
+    if not content:
+        raise ValueError("empty quiz response")
+    quiz_data = json.loads(content)
+    missing = [k for k in ("question", "options", "correct_answer") if k not in quiz_data]
+    if missing:
+        raise ValueError(f"quiz JSON missing {', '.join(missing)}")
+    if not isinstance(quiz_data["options"], list) or len(quiz_data["options"]) < 2:
+        raise ValueError("quiz needs at least two options")
+    if not 0 <= int(quiz_data["correct_answer"]) < len(quiz_data["options"]):
+        raise ValueError("correct_answer is out of range")
+    quiz_data["correct_answer"] = int(quiz_data["correct_answer"])
+    return quiz_data
+
+
+async def generate_quiz(
+    topic: str,
+    user_level: str,
+    temperature: float = 0.3,
+    priority: int = QUIZ,
+    user_id: Optional[int] = None,
+    coalesce: bool = True,
+) -> dict:
+    """Ask the LLM for a quiz on the topic"""
+    content = await chat_completion(
+        [
+            {"role": "system", "content": "You are a DSA quiz generator. Generate only valid JSON."},
+            {"role": "user", "content": generate_quiz_prompt(topic, user_level)}
+        ],
+        max_tokens=200,
+        temperature=temperature,
+        priority=priority,
+        user_id=user_id,
+        coalesce=coalesce,
+    )
+    return parse_quiz(content)
+
+
+def create_job(user_id: Optional[int], session_id: Optional[int], topic: str, difficulty: str) -> QuizJob:
+    """A new pending job; store it, then call submit() with its id"""
+    return QuizJob(user_id=user_id, session_id=session_id, topic=topic, difficulty=difficulty)
+
+
+def _session() -> AsyncSession:
+    return AsyncSession(async_engine, expire_on_commit=False)
+
+
+def _spawn(coro):
+    task = asyncio.get_running_loop().create_task(coro)
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+def submit(job_id: int):
+    """Hand a committed job to the worker pool"""
+    if _queue is None:
+        _spawn(_fail(job_id, "quiz workers are not running"))
+        return
+    try:
+        _queue.put_nowait(job_id)
+        _stats["submitted"] += 1
+    except asyncio.QueueFull:
+        _stats["rejected"] += 1
+        _spawn(_fail(job_id, "quiz queue is full"))
+
+
+def job_payload(job: QuizJob) -> dict:
+    """Public view of a job, including the quiz once it is ready"""
+    payload = {
+        "ticket": job.id,
+        "status": job.status,
+        "attempts": job.attempts,
+        "error": job.last_error,
+        "quiz": None,
+    }
+    if job.status == "done" and job.result:
+        payload["quiz"] = {**json.loads(job.result), "id": job.quiz_id, "topic": job.topic, "difficulty": job.difficulty}
+    return payload
+
+
+async def wait_for(job_id: int, timeout: float) -> Optional[dict]:
+    """
+    Wait up to `timeout` seconds for a job submitted by this process to finish;
+    the job as it stands then, or None if there is no such job
+    """
+    # Register before reading the row, so a job finishing in between still wakes us
+    future = asyncio.get_running_loop().create_future()
+    _waiters.setdefault(job_id, set()).add(future)
+    try:
+        async with _session() as session:
+            job = await session.get(QuizJob, job_id)
+        if job and job.status not in ("done", "failed") and timeout > 0:
+            try:
+                await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                pass
+            async with _session() as session:
+                job = await session.get(QuizJob, job_id)
+        return job_payload(job) if job else None
+    finally:
+        futures = _waiters.get(job_id)
+        if futures is not None:
+            futures.discard(future)
+            if not futures:
+                del _waiters[job_id]
+
+
+def stats() -> dict:
+    return {**_stats, "queue_depth": _queue.qsize() if _queue else 0, "workers": len(_workers)}
+
+
+metrics.register("quiz_jobs", stats)
+
+
+def _resolve(job_id: int):
+    for future in _waiters.pop(job_id, ()):
+        if not future.done():
+            future.set_result(None)
+
+
+async def _fail(job_id: int, error: str):
+    async with _session() as session:
+        job = await session.get(QuizJob, job_id)
+        if job:
+            job.status = "failed"
+            job.last_error = error
+            job.updated_at = datetime.utcnow()
+            await session.commit()
+    _stats["failed"] += 1
+    _resolve(job_id)
+
+
+async def _retry_later(job_id: int, delay: float):
+    await asyncio.sleep(delay)
+    submit(job_id)
+
+
+async def _run_job(job_id: int):
+    async with _session() as session:
+        job = await session.get(QuizJob, job_id)
+        if not job or job.status in ("done", "failed"):
+            return
+        job.status = "running"
+        job.attempts += 1
+        job.updated_at = datetime.utcnow()
+        await session.commit()
+        topic, difficulty, attempts, user_id = job.topic, job.difficulty, job.attempts, job.user_id
+
+    try:
+        quiz_data = await generate_quiz(topic, difficulty, user_id=user_id)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        logger.warning("Quiz job %s attempt %s failed: %s", job_id, attempts, error)
+        if attempts >= QUIZ_MAX_ATTEMPTS:
+            await _fail(job_id, error)
+            return
+        async with _session() as session:
+            job = await session.get(QuizJob, job_id)
+            job.status = "pending"
+            job.last_error = error
+            job.updated_at = datetime.utcnow()
+            await session.commit()
+        _stats["retries"] += 1
+        delay = QUIZ_RETRY_BACKOFF * (2 ** (attempts - 1)) * random.uniform(0.5, 1.5)
+        _spawn(_retry_later(job_id, delay))
+        return
+
+    async with _session() as session:
+        job = await session.get(QuizJob, job_id)
+        quiz = Quiz(
+            session_id=job.session_id,
+            user_id=job.user_id,
+            question=quiz_data["question"],
+            options=json.dumps(quiz_data["options"]),
+            correct_answer=quiz_data["correct_answer"],
+            topic=job.topic,
+            difficulty=job.difficulty
+        )
+        session.add(quiz)
+        await session.flush()
+        job.quiz_id = quiz.id
+        job.result = json.dumps(quiz_data)
+        job.status = "done"
+        job.last_error = None
+        job.updated_at = datetime.utcnow()
+        await session.commit()
+    _stats["done"] += 1
+    _resolve(job_id)
+
+
+async def _worker():
+    while True:
+        job_id = await _queue.get()
+        try:
+            await _run_job(job_id)
+        except Exception:
+            logger.exception("Quiz job %s crashed", job_id)
+            await _fail(job_id, "internal error")
+        finally:
+            _queue.task_done()
+
+
+async def start():
+    """Start the worker pool and resubmit jobs left unfinished by a previous run"""
+    global _queue
+    _queue = asyncio.Queue(maxsize=QUIZ_QUEUE_SIZE)
+    for _ in range(QUIZ_WORKERS):
+        _workers.append(asyncio.create_task(_worker()))
+    async with _session() as session:
+        unfinished = (await session.exec(
+            select(QuizJob.id).where(QuizJob.status.in_(["pending", "running"]))
+        )).all()
+    for job_id in unfinished:
+        submit(job_id)
+
+
+async def stop():
+    global _queue
+    # Pending retries are picked up again by the next start(), which resubmits unfinished jobs
+    tasks = _workers + list(_background)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    _workers.clear()
+    _queue = None
@@ -0,0 +1,122 @@
+"""
+Admission control for the password endpoints.
+
+Every login and sign-up costs a bcrypt hash, so attempts are limited before
+any hashing starts: per client IP for both endpoints and per email for login.
+Each key has a token bucket holding up to `limit` attempts that refills at
+limit / RATE_LIMIT_WINDOW_SECONDS per second. The window slides, so there is
+no reset boundary to burst across. A bucket is stored as a single float: the
+time at which it will be full again (the generic cell rate algorithm). Buckets
+are kept in a bounded LRU map; an evicted key comes back full, which is what
+an idle key would have refilled to anyway.
+
+An attempt is only charged when every check admits it: a login refused by
+the per-email limit gives its per-IP token back, so hammering one account
+does not also lock out the rest of that IP.
+
+The buckets live in this process by default. To share limits across worker
+processes, pass set_store() an object whose async take() and give_back()
+apply the same arithmetic atomically in a shared store.
+"""
+import math
+import os
+import threading
+import time
+from typing import Dict, Tuple
+
+from fastapi import HTTPException, Request
+
+import metrics
+
+RATE_LIMIT_WINDOW_SECONDS = float(os.getenv("RATE_LIMIT_WINDOW_SECONDS", "60"))
+# Attempts per window; 0 disables a limit. A whole class may sign in from one school IP.
+LOGIN_LIMIT_PER_IP = int(os.getenv("LOGIN_LIMIT_PER_IP", "120"))
+LOGIN_LIMIT_PER_EMAIL = int(os.getenv("LOGIN_LIMIT_PER_EMAIL", "10"))
+REGISTER_LIMIT_PER_IP = int(os.getenv("REGISTER_LIMIT_PER_IP", "60"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+
+class MemoryStore:
+    """Token buckets for this process, bounded to max_keys"""
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._full_at: Dict[str, float] = {}  # key -> when its bucket is full again; insertion order is recency
+        self._lock = threading.Lock()
+
+    async def take(self, key: str, limit: int, window: float) -> float:
+        """Spend one attempt from the key's bucket; 0 if allowed, else seconds until one is available"""
+        now = time.monotonic()
+        with self._lock:
+            full_at = max(self._full_at.pop(key, now), now) + window / limit
+            if full_at - now > window:
+                # Put it back unchanged; a refused attempt costs nothing
+                self._full_at[key] = full_at - window / limit
+                return full_at - now - window
+            self._full_at[key] = full_at
+            if len(self._full_at) > self.max_keys:
+                self._evict(now)
+        return 0.0
+
+    async def give_back(self, key: str, limit: int, window: float):
+        """Return an attempt spent by take(), when a later check refused the request"""
+        with self._lock:
+            full_at = self._full_at.get(key)
+            if full_at is not None:
+                self._full_at[key] = full_at - window / limit
+
+    def _evict(self, now: float):
+        """Drop buckets that are full again, then the least recently used tenth of the rest"""
+        live = [(key, full_at) for key, full_at in self._full_at.items() if full_at > now]
+        # Rebuilding also compacts the dict; deleting from its front one key at a time leaves
+        # dead slots that make finding the oldest key slower and slower
+        self._full_at = dict(live[max(0, len(live) - self.max_keys * 9 // 10):])
+
+    def __len__(self) -> int:
+        return len(self._full_at)
+
+
+_store = MemoryStore()
+_stats = {"allowed": 0, "limited": 0}
+
+
+def set_store(store):
+    """Use another bucket store, e.g. one shared by every worker process"""
+    global _store
+    _store = store
+
+
+def client_ip(request: Request) -> str:
+    # Behind a proxy, set FORWARDED_ALLOW_IPS to the proxy's address or network (never '*',
+    # which trusts a client-supplied X-Forwarded-For) so this is the real client
+    return request.client.host if request.client else "unknown"
+
+
+async def _admit(*checks: Tuple[str, int]):
+    taken = []
+    for key, limit in checks:
+        if not limit:
+            continue
+        retry_after = await _store.take(key, limit, RATE_LIMIT_WINDOW_SECONDS)
+        if retry_after:
+            for spent_key, spent_limit in taken:
+                await _store.give_back(spent_key, spent_limit, RATE_LIMIT_WINDOW_SECONDS)
+            _stats["limited"] += 1
+            raise HTTPException(status_code=429, detail="Too many attempts, please try again later",
+                                headers={"Retry-After": str(math.ceil(retry_after))})
+        taken.append((key, limit))
+    _stats["allowed"] += 1
+
+
+async def admit_login(request: Request, email: str):
+    await _admit(
+        (f"login:ip:{client_ip(request)}", LOGIN_LIMIT_PER_IP),
+        (f"login:email:{email.strip().lower()}", LOGIN_LIMIT_PER_EMAIL),
+    )
+
+
+async def admit_register(request: Request):
+    await _admit((f"register:ip:{client_ip(request)}", REGISTER_LIMIT_PER_IP))
+
+
+metrics.register("rate_limit", lambda: {**_stats, "keys": len(_store) if hasattr(_store, "__len__") else None})
@@ -0,0 +1,189 @@
+"""
+Bulk student registration from a CSV or JSON roster.
+
+Each row needs a name and an email, and may have a password, a
+preferred_language (default Python) and a dsa_level (default Beginner). Rows
+without a password get a generated one, returned once in that row's result.
+Emails already registered are found with one query and skipped, as is a
+repeated email within the roster (the first row wins). The new users'
+passwords are hashed in parallel on the password pool, and the users are
+inserted in transactions of ROSTER_BATCH_SIZE rows. The report has a result
+for every row, in roster order.
+
+    python roster_import.py class-2025.csv
+    python roster_import.py class-2025.json --rounds 10
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import secrets
+import time
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import select
+
+import auth
+from database import async_engine, upsert
+from models import User
+
+ROSTER_BATCH_SIZE = int(os.getenv("ROSTER_BATCH_SIZE", "500"))
+ROSTER_MAX_ROWS = int(os.getenv("ROSTER_MAX_ROWS", "5000"))
+# bcrypt cost for imported passwords; raised to BCRYPT_ROUNDS at each student's first login
+ROSTER_BCRYPT_ROUNDS = int(os.getenv("ROSTER_BCRYPT_ROUNDS", str(auth.BCRYPT_ROUNDS)))
+
+FORMATS = ("csv", "json")
+
+
+def _records(text: str, fmt: str) -> Iterator[Tuple[int, object]]:
+    """(line or position, raw record) pairs from a CSV file, a JSON array or JSON lines"""
+    if fmt == "csv":
+        reader = csv.DictReader(io.StringIO(text, newline=""))
+        for record in reader:
+            yield reader.line_num, record
+        return
+    if text.lstrip().startswith("["):
+        try:
+            records = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"invalid JSON: {e}")
+        yield from enumerate(records, 1)
+        return
+    for line_number, line in enumerate(text.splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, ValueError(f"invalid JSON: {e}")
+
+
+def validate(record) -> dict:
+    """User columns (with a plain password) from one raw record, or ValueError saying what is wrong"""
+    if isinstance(record, Exception):
+        raise record
+    if not isinstance(record, dict):
+        raise ValueError("expected an object")
+    row = {}
+    for column in ("name", "email"):
+        value = record.get(column)
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError(f"{column} is required")
+        row[column] = value.strip()
+    if "@" not in row["email"]:
+        raise ValueError("email is not an email address")
+    for column, default in (("password", None), ("preferred_language", "Python"), ("dsa_level", "Beginner")):
+        value = record.get(column) or default
+        if value is not None and not isinstance(value, str):
+            raise ValueError(f"{column} must be a string")
+        row[column] = value
+    return row
+
+
+def parse(text: str, fmt: str) -> Tuple[List[dict], List[dict]]:
+    """(valid rows, per-row results so far); results of valid rows are filled in by import_roster"""
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+    rows, results, seen = [], [], set()
+    for line, record in _records(text, fmt):
+        if len(results) >= ROSTER_MAX_ROWS:
+            raise ValueError(f"a roster may have at most {ROSTER_MAX_ROWS} rows")
+        result = {"line": line}
+        results.append(result)
+        try:
+            row = validate(record)
+        except ValueError as e:
+            result.update(status="invalid", error=str(e))
+            continue
+        result["email"] = row["email"]
+        if row["email"] in seen:
+            result["status"] = "duplicate"
+            continue
+        seen.add(row["email"])
+        row["result"] = result
+        rows.append(row)
+    return rows, results
+
+
+async def _hash_all(rows: List[dict], rounds: int):
+    # One pool-sized wave at a time, so logins arriving meanwhile queue behind a wave, not the roster
+    wave = max(1, auth.PASSWORD_HASH_WORKERS)
+    for start in range(0, len(rows), wave):
+        batch = rows[start:start + wave]
+        hashes = await asyncio.gather(*(auth.hash_password_offloaded(row["password"], rounds) for row in batch))
+        for row, hashed in zip(batch, hashes):
+            row["hashed_password"] = hashed
+
+
+async def import_roster(text: str, fmt: str, rounds: Optional[int] = None,
+                        batch_size: int = ROSTER_BATCH_SIZE) -> dict:
+    """Register every new student of a roster; returns counts and a result per row"""
+    started = time.perf_counter()
+    rows, results = parse(text, fmt)
+
+    async with async_engine.connect() as connection:
+        existing = set((await connection.execute(
+            select(User.email).where(User.email.in_([row["email"] for row in rows]))
+        )).scalars())
+    new_rows = []
+    for row in rows:
+        if row["email"] in existing:
+            row["result"]["status"] = "exists"
+        else:
+            if row["password"] is None:
+                row["password"] = row["result"]["password"] = secrets.token_urlsafe(9)
+            new_rows.append(row)
+
+    await _hash_all(new_rows, rounds or ROSTER_BCRYPT_ROUNDS)
+
+    # DO NOTHING keeps a student who registered on their own in the meantime
+    statement = upsert(User.__table__, ["email"], update=False).returning(User.id, User.email)
+    columns = ("name", "email", "hashed_password", "preferred_language", "dsa_level")
+    for start in range(0, len(new_rows), batch_size):
+        batch = new_rows[start:start + batch_size]
+        created_at = datetime.utcnow()
+        async with async_engine.begin() as connection:
+            inserted = await connection.execute(
+                statement, [{**{column: row[column] for column in columns}, "created_at": created_at} for row in batch]
+            )
+            created = {email: user_id for user_id, email in inserted}
+        for row in batch:
+            if row["email"] in created:
+                row["result"].update(status="created", id=created[row["email"]])
+            else:
+                row["result"]["status"] = "exists"
+                row["result"].pop("password", None)
+
+    report = {status: sum(1 for r in results if r["status"] == status)
+              for status in ("created", "exists", "duplicate", "invalid")}
+    report["rows"] = len(results)
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    report["results"] = results
+    return report
+
+
+def format_for(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    return "json" if extension in ("jsonl", "ndjson") else extension
+
+
+if __name__ == "__main__":
+    from database import create_db_and_tables
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS, help="default: from the file extension")
+    parser.add_argument("--rounds", type=int, help=f"bcrypt cost (default: ROSTER_BCRYPT_ROUNDS, {ROSTER_BCRYPT_ROUNDS})")
+    args = parser.parse_args()
+
+    create_db_and_tables()
+    with open(args.path, encoding="utf-8-sig") as f:
+        text = f.read()
+    report = asyncio.run(import_roster(text, args.format or format_for(args.path), args.rounds))
+    for result in report.pop("results"):
+        detail = result.get("error") or result.get("password") or ""
+        print(f"line {result['line']}\t{result.get('email', '')}\t{result['status']}\t{detail}".rstrip())
+    print(f"Roster: {report}")
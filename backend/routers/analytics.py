@@ -1,7 +1,10 @@
-from fastapi import APIRouter, HTTPException, Depends, Request
-from sqlmodel import Session, select, desc
+from fastapi import APIRouter, Depends
+from sqlmodel import select, desc
+from sqlmodel.ext.asyncio.session import AsyncSession
 from models import User, UserSession, ChatMessage, Quiz, EmotionalTrend
-from database import get_session
+from database import get_async_session
+from auth import get_current_user
+import learner_state
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime, timedelta
@@ -20,42 +23,25 @@ class LearningAnalytics(BaseModel):
     session_duration_avg: float
 
 
-def get_current_user(request: Request, session: Session = Depends(get_session)) -> User:
-    """Get current user from token"""
-    auth: str = request.headers.get("authorization", "")
-    if not auth or not auth.lower().startswith("bearer "):
-        raise HTTPException(status_code=401, detail="Missing or invalid token")
-    token = auth.split()[1]
-    from auth import decode_access_token
-
-    payload = decode_access_token(token)
-    if not payload or "user_id" not in payload:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    user = session.get(User, payload["user_id"])
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    return user
-
-
 @router.get("/learning-summary")
 async def get_learning_summary(
     current_user: User = Depends(get_current_user),
-    db_session: Session = Depends(get_session),
+    db_session: AsyncSession = Depends(get_async_session),
 ):
     """Get comprehensive learning analytics for the user"""
 
     # Get all user sessions
-    sessions = db_session.exec(
+    sessions = (await db_session.exec(
         select(UserSession).where(UserSession.user_id == current_user.id)
-    ).all()
+    )).all()
 
     # Get all messages
-    messages = db_session.exec(
+    messages = (await db_session.exec(
         select(ChatMessage).where(ChatMessage.user_id == current_user.id)
-    ).all()
+    )).all()
 
     # Get all quizzes
-    quizzes = db_session.exec(select(Quiz).where(Quiz.user_id == current_user.id)).all()
+    quizzes = (await db_session.exec(select(Quiz).where(Quiz.user_id == current_user.id))).all()
 
     # Calculate statistics
     total_sessions = len(sessions)
@@ -84,14 +70,14 @@ async def get_learning_summary(
 
     # Emotional trends (last 30 days)
     thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-    recent_trends = db_session.exec(
+    recent_trends = (await db_session.exec(
         select(EmotionalTrend)
         .where(
             EmotionalTrend.user_id == current_user.id,
             EmotionalTrend.timestamp >= thirty_days_ago,
         )
         .order_by(desc(EmotionalTrend.timestamp))
-    ).all()
+    )).all()
 
     emotional_trends = [
         {
@@ -135,20 +121,20 @@ async def get_learning_summary(
 async def get_emotional_trends(
     days: int = 7,
     current_user: User = Depends(get_current_user),
-    db_session: Session = Depends(get_session),
+    db_session: AsyncSession = Depends(get_async_session),
 ):
     """Get emotional trends over specified number of days"""
 
     start_date = datetime.utcnow() - timedelta(days=days)
 
-    trends = db_session.exec(
+    trends = (await db_session.exec(
         select(EmotionalTrend)
         .where(
             EmotionalTrend.user_id == current_user.id,
             EmotionalTrend.timestamp >= start_date,
         )
         .order_by(desc(EmotionalTrend.timestamp))
-    ).all()
+    )).all()
 
     return {
         "trends": [
@@ -181,17 +167,17 @@ async def get_emotional_trends(
 @router.get("/topic-performance")
 async def get_topic_performance(
     current_user: User = Depends(get_current_user),
-    db_session: Session = Depends(get_session),
+    db_session: AsyncSession = Depends(get_async_session),
 ):
     """Get performance analytics by topic"""
 
     # Get all messages grouped by topic
-    messages = db_session.exec(
+    messages = (await db_session.exec(
         select(ChatMessage).where(ChatMessage.user_id == current_user.id)
-    ).all()
+    )).all()
 
     # Get all quizzes grouped by topic
-    quizzes = db_session.exec(select(Quiz).where(Quiz.user_id == current_user.id)).all()
+    quizzes = (await db_session.exec(select(Quiz).where(Quiz.user_id == current_user.id))).all()
 
     topic_stats = {}
 
@@ -256,38 +242,21 @@ async def get_topic_performance(
 @router.get("/recommendations")
 async def get_learning_recommendations(
     current_user: User = Depends(get_current_user),
-    db_session: Session = Depends(get_session),
+    db_session: AsyncSession = Depends(get_async_session),
 ):
     """Get personalized learning recommendations based on analytics"""
 
-    # Get recent emotional trends
-    recent_trends = db_session.exec(
-        select(EmotionalTrend)
-        .where(EmotionalTrend.user_id == current_user.id)
-        .order_by(desc(EmotionalTrend.timestamp))
-        .limit(10)
-    ).all()
-
-    # Get confusion topics
-    messages = db_session.exec(
-        select(ChatMessage).where(
-            ChatMessage.user_id == current_user.id, ChatMessage.sentiment_score < -0.3
-        )
-    ).all()
-
-    confusion_topics = list(set([msg.topic for msg in messages if msg.topic]))
-
-    # Get quiz performance
-    quizzes = db_session.exec(select(Quiz).where(Quiz.user_id == current_user.id)).all()
-
-    failed_quizzes = [q for q in quizzes if not q.is_correct]
-    weak_topics = list(set([q.topic for q in failed_quizzes if q.topic]))
+    # Kept up to date as messages and quiz answers are written; no table scans
+    state = await db_session.run_sync(lambda s: learner_state.get(current_user.id, s))
+    sentiment = state.sentiment_ewma
+    confusion_topics = state.confusion_topics()
+    weak_topics = state.weak_topics()
 
     # Generate recommendations
     recommendations = []
 
     # If user is consistently frustrated, recommend easier topics
-    if recent_trends and all(t.sentiment_score < -0.2 for t in recent_trends[-3:]):
+    if sentiment is not None and sentiment < -0.2:
         recommendations.append(
             {
                 "type": "difficulty_adjustment",
@@ -319,7 +288,7 @@ async def get_learning_recommendations(
         )
 
     # If user is doing well, suggest advanced topics
-    if recent_trends and all(t.sentiment_score > 0.2 for t in recent_trends[-3:]):
+    if sentiment is not None and sentiment > 0.2:
         recommendations.append(
             {
                 "type": "advance_topic",
@@ -332,16 +301,16 @@ async def get_learning_recommendations(
         "recommendations": recommendations,
         "current_mood": (
             "positive"
-            if recent_trends and recent_trends[-1].sentiment_score > 0
+            if state.last_sentiment is not None and state.last_sentiment > 0
             else (
                 "neutral"
-                if recent_trends and recent_trends[-1].sentiment_score > -0.2
+                if state.last_sentiment is not None and state.last_sentiment > -0.2
                 else "negative"
             )
         ),
         "learning_pace": (
             "fast"
-            if len(recent_trends) > 5
-            else "moderate" if len(recent_trends) > 2 else "slow"
+            if state.message_count > 5
+            else "moderate" if state.message_count > 2 else "slow"
         ),
     }
@@ -1,19 +1,30 @@
-from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-import os
-import openai
 import json
+import os
+from dataclasses import dataclass
 from typing import Optional, List
 from datetime import datetime
-from sqlmodel import Session, select, desc
-from database import get_session
-from models import User, UserSession, ChatMessage, Quiz, EmotionalTrend
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from database import get_async_session
+from auth import get_current_user
+from models import User, UserSession, ChatMessage, Quiz, QuizJob, EmotionalTrend
 from routers.sentiment import analyze_sentiment, SentimentRequest
+from llm import chat_completion, stream_chat_completion, is_configured, LLMUnavailable, RETRYABLE_ERRORS
+from llm_scheduler import INTERACTIVE
+import active_sessions
+import db_writer
+from context import build_history
+import learner_state
+import quiz_bank
+import quiz_jobs
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
-openai_api_key = os.getenv("OPENAI_API_KEY")
-client = openai.OpenAI(api_key=openai_api_key)
+# How long the streaming endpoint holds its final quiz event for a quiz still being generated
+QUIZ_STREAM_WAIT = float(os.getenv("QUIZ_STREAM_WAIT", "5"))
 
 
 class ChatRequest(BaseModel):
@@ -27,6 +38,8 @@ class ChatResponse(BaseModel):
     emotion_category: str
     quiz: Optional[dict] = None
     should_generate_quiz: bool = False
+    quiz_ticket: Optional[int] = None  # poll /chat/quiz/jobs/{ticket} until the quiz is ready
+    degraded: bool = False  # the tutor model was unavailable and a fallback reply was sent
 
 
 class QuizAnswerRequest(BaseModel):
@@ -34,6 +47,24 @@ class QuizAnswerRequest(BaseModel):
     selected_option: int
 
 
+# Errors left over after the LLM transport's own retries; the chat degrades instead of failing
+DEGRADED_ERRORS = (LLMUnavailable,) + RETRYABLE_ERRORS
+
+
+def degraded_reply(turn: "ChatTurn") -> str:
+    """Fallback tutor reply used while the LLM is unavailable"""
+    reply = "I'm having trouble reaching my tutoring brain right now, so I can't give a full answer."
+    if turn.sentiment_score < -0.3:
+        reply += " I can tell this is frustrating - it's not you, and your progress is saved."
+    if turn.topic:
+        reply += f" While you wait, try working through a small {turn.topic} example by hand"
+    else:
+        reply += " While you wait, try working through a small example by hand"
+    if turn.quiz is not None or turn.quiz_ticket is not None:
+        reply += " or have a go at the quiz below"
+    return reply + ". Please send your message again in a minute."
+
+
 def get_adaptive_prompt(user_level: str, sentiment_score: float, recent_topics: List[str], confusion_flags: List[str]) -> str:
     """
     Generate adaptive prompts based on user's emotional state and learning history
@@ -73,223 +104,304 @@ Build on this foundation and make connections to previous learning."""
     return base_prompt
 
 
-def generate_quiz_prompt(topic: str, user_level: str) -> str:
-    """Generate a quiz question based on the current topic"""
-    return f"""Generate a multiple choice quiz question about {topic} suitable for {user_level} level.
-Return ONLY a JSON object with this exact format:
-{{
-    "question": "What is the time complexity of...",
-    "options": ["Option A", "Option B", "Option C", "Option D"],
-    "correct_answer": 0,
-    "explanation": "Brief explanation of why this is correct"
-}}"""
-
-
-def get_current_user(request: Request, session: Session = Depends(get_session)) -> User:
-    """Get current user from token"""
-    auth: str = request.headers.get("authorization", "")
-    if not auth or not auth.lower().startswith("bearer "):
-        raise HTTPException(status_code=401, detail="Missing or invalid token")
-    token = auth.split()[1]
-    from auth import decode_access_token
-    payload = decode_access_token(token)
-    if not payload or "user_id" not in payload:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    user = session.get(User, payload["user_id"])
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    return user
+@dataclass
+class ChatTurn:
+    """Everything prepared for one chat turn before the LLM is called"""
+    session_id: Optional[int]
+    user_id: Optional[int]
+    user_level: str
+    topic: Optional[str]
+    sentiment_score: float
+    emotion_category: str
+    llm_messages: List[dict]
+    quiz: Optional[dict] = None  # served straight from the quiz bank
+    quiz_ticket: Optional[int] = None  # generating on the background workers
+
+
+async def start_turn(req: ChatRequest, current_user: User, session: AsyncSession) -> ChatTurn:
+    """
+    Store the user message and build the emotion-aware prompt for this turn.
+    The shared helpers take a sync Session; run_sync runs them on this session's connection.
+    """
+    # Analyze sentiment of user message
+    sentiment_result = analyze_sentiment(SentimentRequest(message=req.message))
+
+    # Get or create active session
+    session_id = await session.run_sync(lambda s: active_sessions.get_or_open(current_user.id or 0, s))
+
+    # Update the user's learning history with this message
+    state = await session.run_sync(lambda s: learner_state.get(current_user.id, s))
+    state.observe_message(req.topic, sentiment_result.sentiment)
+
+    # Generate adaptive prompt
+    system_prompt = get_adaptive_prompt(
+        current_user.dsa_level,
+        sentiment_result.sentiment,
+        state.recent_topics,
+        state.confusion_topics()
+    )
+
+    # Prepare conversation context: session summary plus the newest turns that fit the budget
+    conversation_history = await session.run_sync(build_history, session_id)
+
+    # Add current message
+    conversation_history.append({"role": "user", "content": req.message})
+
+    # Decide if we should generate a quiz
+    should_generate_quiz = (
+        sentiment_result.sentiment > 0.3 and
+        state.message_count % 3 == 0 and
+        req.topic is not None
+    )
+
+    turn = ChatTurn(
+        session_id=session_id,
+        user_id=current_user.id,
+        user_level=current_user.dsa_level,
+        topic=req.topic,
+        sentiment_score=sentiment_result.sentiment,
+        emotion_category=sentiment_result.emotion_category,
+        llm_messages=[{"role": "system", "content": system_prompt}, *conversation_history],
+    )
+
+    # Store user message
+    rows = [ChatMessage(
+        session_id=session_id,
+        user_id=current_user.id,
+        message=req.message,
+        sender="user",
+        sentiment_score=sentiment_result.sentiment,
+        emotion_category=sentiment_result.emotion_category,
+        topic=req.topic
+    )]
+
+    # Serve a pre-generated quiz from the bank when possible; otherwise generate
+    # one on the background workers, alongside the reply
+    quiz = job = banked = None
+    if should_generate_quiz:
+        topic = req.topic or "DSA"
+        banked = await session.run_sync(lambda s: quiz_bank.draw(current_user.id or 0, topic, turn.user_level, s))
+        if banked:
+            quiz = Quiz(
+                session_id=turn.session_id,
+                user_id=turn.user_id,
+                question=banked["question"],
+                options=json.dumps(banked["options"]),
+                correct_answer=banked["correct_answer"],
+                topic=topic,
+                difficulty=turn.user_level
+            )
+            rows.append(quiz)
+        else:
+            job = quiz_jobs.create_job(turn.user_id, turn.session_id, topic, turn.user_level)
+            rows.append(job)
+
+    # The user turn is durable before we await the LLM; the group-commit writer
+    # batches it with other requests' rows
+    await db_writer.write(*rows)
+    # Don't hold a connection while the LLM answers
+    await session.commit()
+    if quiz:
+        turn.quiz = {
+            "id": quiz.id,
+            "question": banked["question"],
+            "options": banked["options"],
+            "correct_answer": banked["correct_answer"],
+            "explanation": banked["explanation"],
+            "topic": quiz.topic,
+            "difficulty": quiz.difficulty,
+        }
+    if job:
+        turn.quiz_ticket = job.id
+        quiz_jobs.submit(job.id)
+    return turn
+
+
+async def finish_turn(turn: ChatTurn, bot_response: Optional[str]):
+    """Store the bot reply (durably) and the emotional trend (in the background)"""
+    # Store bot message
+    bot_message = ChatMessage(
+        session_id=turn.session_id,
+        user_id=turn.user_id,
+        message=bot_response or "",
+        sender="bot",
+        sentiment_score=0.0,  # Bot messages are neutral
+        emotion_category="neutral",
+        topic=turn.topic or ""
+    )
+    await db_writer.write(bot_message)
+
+    # Store emotional trend
+    db_writer.write_nowait(EmotionalTrend(
+        session_id=turn.session_id,
+        user_id=turn.user_id,
+        sentiment_score=turn.sentiment_score,
+        emotion_category=turn.emotion_category,
+        timestamp=datetime.utcnow()
+    ))
 
 
 @router.post("/message")
 async def chat_message(
     req: ChatRequest,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Main chat endpoint with emotion-aware responses"""
-    if not openai_api_key:
+    if not is_configured():
         raise HTTPException(status_code=500, detail="OpenAI API key not set")
 
     try:
-        # Analyze sentiment of user message
-        sentiment_result = analyze_sentiment(SentimentRequest(message=req.message))
-
-        # Get or create active session
-        active_session = session.exec(
-            select(UserSession).where(
-                UserSession.user_id == current_user.id,
-                UserSession.session_end is None
-            )
-        ).first()
+        turn = await start_turn(req, current_user, session)
 
-        if not active_session:
-            active_session = UserSession(
-                user_id=current_user.id or 0,
-                session_start=datetime.utcnow()
+        # Generate response with emotion awareness
+        degraded = False
+        try:
+            bot_response = await chat_completion(
+                turn.llm_messages, max_tokens=300, temperature=0.7, priority=INTERACTIVE, user_id=turn.user_id
             )
-            session.add(active_session)
-            session.commit()
-            session.refresh(active_session)
-
-        # Store user message
-        user_message = ChatMessage(
-            session_id=active_session.id,
-            user_id=current_user.id,
-            message=req.message,
-            sender="user",
-            sentiment_score=sentiment_result.sentiment,
-            emotion_category=sentiment_result.emotion_category,
-            topic=req.topic
-        )
-        session.add(user_message)
-
-        # Get user's learning history for context
-        recent_messages = session.exec(
-            select(ChatMessage).where(
-                ChatMessage.user_id == current_user.id
-            ).order_by(desc(ChatMessage.timestamp)).limit(10)
-        ).all()
-
-        recent_topics = list(set([msg.topic for msg in recent_messages if msg.topic]))
-        confusion_flags = []
-
-        # Identify confusing topics based on negative sentiment
-        for msg in recent_messages:
-            if msg.sentiment_score < -0.3 and msg.topic:
-                confusion_flags.append(msg.topic)
-
-        confusion_flags = list(set(confusion_flags))
-
-        # Generate adaptive prompt
-        system_prompt = get_adaptive_prompt(
-            current_user.dsa_level,
-            sentiment_result.sentiment,
-            recent_topics,
-            confusion_flags
-        )
+        except DEGRADED_ERRORS:
+            bot_response = degraded_reply(turn)
+            degraded = True
 
-        # Prepare conversation context
-        conversation_history = []
-        for msg in recent_messages[-5:]:  # Last 5 messages for context
-            role = "user" if msg.sender == "user" else "assistant"
-            conversation_history.append({"role": role, "content": msg.message})
+        await finish_turn(turn, bot_response)
 
-        # Add current message
-        conversation_history.append({"role": "user", "content": req.message})
+        # Don't wait for a generated quiz, but include it if the workers already finished it
+        quiz_data = turn.quiz
+        if turn.quiz_ticket:
+            job = await quiz_jobs.wait_for(turn.quiz_ticket, timeout=0)
+            quiz_data = job["quiz"] if job else None
 
-        # Generate response with emotion awareness
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                *conversation_history
-            ],
-            max_tokens=300,
-            temperature=0.7,
+        return ChatResponse(
+            response=bot_response or "I'm sorry, I couldn't generate a response.",
+            sentiment_score=turn.sentiment_score,
+            emotion_category=turn.emotion_category,
+            quiz=quiz_data,
+            should_generate_quiz=quiz_data is not None or turn.quiz_ticket is not None,
+            quiz_ticket=turn.quiz_ticket,
+            degraded=degraded
         )
 
-        bot_response = response.choices[0].message.content
-
-        # Store bot message
-        bot_message = ChatMessage(
-            session_id=active_session.id,
-            user_id=current_user.id,
-            message=bot_response or "",
-            sender="bot",
-            sentiment_score=0.0,  # Bot messages are neutral
-            emotion_category="neutral",
-            topic=req.topic or ""
-        )
-        session.add(bot_message)
+    except Exception as e:
+        await session.rollback()
+        learner_state.invalidate(current_user.id)
+        raise HTTPException(status_code=500, detail=f"Chat error: {str(e)}")
 
-        # Decide if we should generate a quiz
-        should_generate_quiz = (
-            sentiment_result.sentiment > 0.3 and
-            len(recent_messages) % 3 == 0 and
-            req.topic is not None
-        )
 
-        quiz_data = None
-        if should_generate_quiz:
-            try:
-                quiz_response = client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": "You are a DSA quiz generator. Generate only valid JSON."},
-                        {"role": "user", "content": generate_quiz_prompt(req.topic or "DSA", current_user.dsa_level)}
-                    ],
-                    max_tokens=200,
-                    temperature=0.3,
-                )
-                quiz_content = quiz_response.choices[0].message.content
-                if quiz_content:
-                    quiz_data = json.loads(quiz_content)
-                    
-                    # Store quiz in database
-                    quiz = Quiz(
-                        session_id=active_session.id,
-                        user_id=current_user.id,
-                        question=quiz_data["question"],
-                        options=json.dumps(quiz_data["options"]),
-                        correct_answer=quiz_data["correct_answer"],
-                        topic=req.topic or "DSA",
-                        difficulty=current_user.dsa_level
-                    )
-                    session.add(quiz)
-                else:
-                    should_generate_quiz = False
-            except Exception as e:
-                print(f"Quiz generation failed: {e}")
-                should_generate_quiz = False
-
-        # Store emotional trend
-        emotional_trend = EmotionalTrend(
-            session_id=active_session.id,
-            user_id=current_user.id,
-            sentiment_score=sentiment_result.sentiment,
-            emotion_category=sentiment_result.emotion_category,
-            timestamp=datetime.utcnow()
-        )
-        session.add(emotional_trend)
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
-        session.commit()
 
-        return ChatResponse(
-            response=bot_response or "I'm sorry, I couldn't generate a response.",
-            sentiment_score=sentiment_result.sentiment,
-            emotion_category=sentiment_result.emotion_category,
-            quiz=quiz_data,
-            should_generate_quiz=should_generate_quiz
-        )
+@router.post("/message/stream")
+async def chat_message_stream(
+    req: ChatRequest,
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """
+    Streaming variant of /chat/message using server-sent events.
+    Emits `meta` (sentiment) first, then `token` events as the reply is generated,
+    then `quiz`, then `done`. The bot message is stored once the stream finishes.
+    """
+    if not is_configured():
+        raise HTTPException(status_code=500, detail="OpenAI API key not set")
 
+    try:
+        turn = await start_turn(req, current_user, session)
     except Exception as e:
-        session.rollback()
+        await session.rollback()
+        learner_state.invalidate(current_user.id)
         raise HTTPException(status_code=500, detail=f"Chat error: {str(e)}")
 
+    async def events():
+        yield sse_event("meta", {
+            "sentiment_score": turn.sentiment_score,
+            "emotion_category": turn.emotion_category,
+            "should_generate_quiz": turn.quiz is not None or turn.quiz_ticket is not None,
+            "quiz_ticket": turn.quiz_ticket,
+        })
+
+        parts = []
+        degraded = False
+        try:
+            async for token in stream_chat_completion(
+                turn.llm_messages, max_tokens=300, temperature=0.7, priority=INTERACTIVE, user_id=turn.user_id
+            ):
+                parts.append(token)
+                yield sse_event("token", {"text": token})
+        except DEGRADED_ERRORS:
+            if parts:
+                yield sse_event("error", {"detail": "Chat error: the reply was interrupted"})
+                return
+            parts.append(degraded_reply(turn))
+            degraded = True
+            yield sse_event("token", {"text": parts[0]})
+        except Exception as e:
+            yield sse_event("error", {"detail": f"Chat error: {str(e)}"})
+            return
+
+        # A generated quiz has been running alongside the stream; give it a little longer
+        quiz_data = turn.quiz
+        if turn.quiz_ticket:
+            job = await quiz_jobs.wait_for(turn.quiz_ticket, timeout=QUIZ_STREAM_WAIT)
+            quiz_data = job["quiz"] if job else None
+        yield sse_event("quiz", {
+            "quiz": quiz_data,
+            "should_generate_quiz": quiz_data is not None or turn.quiz_ticket is not None,
+            "quiz_ticket": turn.quiz_ticket,
+        })
+
+        bot_response = "".join(parts)
+        await finish_turn(turn, bot_response)
+        yield sse_event("done", {
+            "response": bot_response or "I'm sorry, I couldn't generate a response.",
+            "degraded": degraded,
+        })
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/quiz/jobs/{ticket}")
+async def get_quiz_job(
+    ticket: int,
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """Poll a quiz ticket; `quiz` is filled in once status is 'done'"""
+    job = await session.get(QuizJob, ticket)
+    if not job or job.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Quiz ticket not found")
+    return quiz_jobs.job_payload(job)
+
 
 @router.post("/quiz/answer")
 async def answer_quiz(
     req: QuizAnswerRequest,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Handle quiz answer submission"""
     try:
         # Get the quiz
-        quiz = session.get(Quiz, req.quiz_id)
+        quiz = await session.get(Quiz, req.quiz_id)
         if not quiz or quiz.user_id != current_user.id:
             raise HTTPException(status_code=404, detail="Quiz not found")
 
         # Check if answer is correct
         is_correct = req.selected_option == quiz.correct_answer
+        state = await session.run_sync(lambda s: learner_state.get(current_user.id, s))
 
         # Update quiz with user's answer
         quiz.user_answer = req.selected_option
         quiz.is_correct = is_correct
         quiz.answered_at = datetime.utcnow()
 
-        session.commit()
+        await session.commit()
+        state.observe_quiz(quiz.topic, is_correct, quiz.answered_at)
 
         return {
             "correct": is_correct,
@@ -298,7 +410,7 @@ async def answer_quiz(
         }
 
     except Exception as e:
-        session.rollback()
+        await session.rollback()
         raise HTTPException(status_code=500, detail=f"Quiz error: {str(e)}")
 
 
@@ -306,29 +418,29 @@ async def answer_quiz(
 async def get_session_summary(
     session_id: int,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Get session summary with learning analytics"""
     try:
         # Get session
-        user_session = session.get(UserSession, session_id)
+        user_session = await session.get(UserSession, session_id)
         if not user_session or user_session.user_id != current_user.id:
             raise HTTPException(status_code=404, detail="Session not found")
 
         # Get session messages
-        messages = session.exec(
+        messages = (await session.exec(
             select(ChatMessage).where(ChatMessage.session_id == session_id)
-        ).all()
+        )).all()
 
         # Get emotional trends
-        emotional_trends = session.exec(
+        emotional_trends = (await session.exec(
             select(EmotionalTrend).where(EmotionalTrend.session_id == session_id)
-        ).all()
+        )).all()
 
         # Get quizzes
-        quizzes = session.exec(
+        quizzes = (await session.exec(
             select(Quiz).where(Quiz.session_id == session_id)
-        ).all()
+        )).all()
 
         # Calculate metrics
         total_messages = len(messages)
@@ -1,12 +1,15 @@
-from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime, timedelta
-from sqlmodel import Session, select, desc
-from database import get_session
+from sqlmodel import select, desc
+from sqlmodel.ext.asyncio.session import AsyncSession
+from database import get_async_session
+from auth import get_current_user
+import active_sessions
 from models import (
     User, LearningStyle, SpacedRepetition, CognitiveProfile, 
-    LearningPath, Bookmark, SessionPause, Question
+    LearningPath, Bookmark, SessionPause, Question, Problem
 )
 from routers.sentiment import analyze_sentiment, SentimentRequest
 
@@ -41,32 +44,17 @@ class SpacedRepetitionResponse(BaseModel):
     success_rate: float
     difficulty_level: int
 
-def get_current_user(request: Request, session: Session = Depends(get_session)) -> User:
-    """Get current user from token"""
-    auth: str = request.headers.get("authorization", "")
-    if not auth or not auth.lower().startswith("bearer "):
-        raise HTTPException(status_code=401, detail="Missing or invalid token")
-    token = auth.split()[1]
-    from auth import decode_access_token
-    payload = decode_access_token(token)
-    if not payload or "user_id" not in payload:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    user = session.get(User, payload["user_id"])
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    return user
-
 @router.post("/learning-style")
 async def update_learning_style(
     req: LearningStyleRequest,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Update user's learning style preferences"""
     # Check if learning style exists
-    existing_style = session.exec(
+    existing_style = (await session.exec(
         select(LearningStyle).where(LearningStyle.user_id == current_user.id)
-    ).first()
+    )).first()
     
     if existing_style:
         # Update existing
@@ -86,18 +74,18 @@ async def update_learning_style(
         )
         session.add(learning_style)
     
-    session.commit()
+    await session.commit()
     return {"message": "Learning style updated successfully"}
 
 @router.get("/learning-style")
 async def get_learning_style(
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Get user's learning style preferences"""
-    learning_style = session.exec(
+    learning_style = (await session.exec(
         select(LearningStyle).where(LearningStyle.user_id == current_user.id)
-    ).first()
+    )).first()
     
     if not learning_style:
         # Return default values
@@ -119,12 +107,12 @@ async def get_learning_style(
 async def update_cognitive_profile(
     req: CognitiveProfileRequest,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Update user's cognitive profile"""
-    existing_profile = session.exec(
+    existing_profile = (await session.exec(
         select(CognitiveProfile).where(CognitiveProfile.user_id == current_user.id)
-    ).first()
+    )).first()
     
     if existing_profile:
         # Update existing
@@ -148,18 +136,18 @@ async def update_cognitive_profile(
         )
         session.add(cognitive_profile)
     
-    session.commit()
+    await session.commit()
     return {"message": "Cognitive profile updated successfully"}
 
 @router.get("/cognitive-profile")
 async def get_cognitive_profile(
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Get user's cognitive profile"""
-    cognitive_profile = session.exec(
+    cognitive_profile = (await session.exec(
         select(CognitiveProfile).where(CognitiveProfile.user_id == current_user.id)
-    ).first()
+    )).first()
     
     if not cognitive_profile:
         # Return default values
@@ -184,28 +172,29 @@ async def get_cognitive_profile(
 @router.get("/spaced-repetition")
 async def get_spaced_repetition_topics(
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Get topics due for spaced repetition review"""
     now = datetime.utcnow()
     
     # Get topics due for review
-    due_topics = session.exec(
+    due_topics = (await session.exec(
         select(SpacedRepetition)
         .where(
             SpacedRepetition.user_id == current_user.id,
             SpacedRepetition.next_review <= now
         )
-    ).all()
+    )).all()
     
     # Get question details for each topic
     topics_with_details = []
     for topic in due_topics:
-        question = session.get(Question, topic.topic_id)
-        if question:
+        question = await session.get(Question, topic.topic_id)
+        problem = await session.get(Problem, question.problem_id) if question else None
+        if problem:
             topics_with_details.append({
                 "topic_id": topic.topic_id,
-                "topic_title": question.title,
+                "topic_title": problem.title,
                 "next_review": topic.next_review,
                 "review_count": topic.review_count,
                 "success_rate": topic.success_rate,
@@ -219,15 +208,15 @@ async def mark_topic_reviewed(
     topic_id: int,
     success: bool,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Mark a topic as reviewed and update spaced repetition schedule"""
-    spaced_rep = session.exec(
+    spaced_rep = (await session.exec(
         select(SpacedRepetition).where(
             SpacedRepetition.user_id == current_user.id,
             SpacedRepetition.topic_id == topic_id
         )
-    ).first()
+    )).first()
     
     if not spaced_rep:
         # Create new spaced repetition entry
@@ -258,14 +247,14 @@ async def mark_topic_reviewed(
     spaced_rep.next_review = datetime.utcnow() + timedelta(days=interval_days)
     spaced_rep.updated_at = datetime.utcnow()
     
-    session.commit()
+    await session.commit()
     return {"message": "Topic review recorded successfully"}
 
 @router.post("/bookmarks")
 async def create_bookmark(
     req: BookmarkRequest,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Create a new bookmark"""
     bookmark = Bookmark(
@@ -277,8 +266,8 @@ async def create_bookmark(
         message_id=req.message_id
     )
     session.add(bookmark)
-    session.commit()
-    session.refresh(bookmark)
+    await session.commit()
+    await session.refresh(bookmark)
     
     return {
         "id": bookmark.id,
@@ -291,14 +280,14 @@ async def create_bookmark(
 @router.get("/bookmarks")
 async def get_bookmarks(
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Get user's bookmarks"""
-    bookmarks = session.exec(
+    bookmarks = (await session.exec(
         select(Bookmark)
         .where(Bookmark.user_id == current_user.id)
         .order_by(desc(Bookmark.created_at))
-    ).all()
+    )).all()
     
     return {
         "bookmarks": [
@@ -319,44 +308,45 @@ async def get_bookmarks(
 async def delete_bookmark(
     bookmark_id: int,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Delete a bookmark"""
-    bookmark = session.exec(
+    bookmark = (await session.exec(
         select(Bookmark).where(
             Bookmark.id == bookmark_id,
             Bookmark.user_id == current_user.id
         )
-    ).first()
+    )).first()
     
     if not bookmark:
         raise HTTPException(status_code=404, detail="Bookmark not found")
     
-    session.delete(bookmark)
-    session.commit()
+    await session.delete(bookmark)
+    await session.commit()
     return {"message": "Bookmark deleted successfully"}
 
 @router.get("/learning-path")
 async def get_personalized_learning_path(
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Generate personalized learning path based on user profile"""
     # Get user's learning style and cognitive profile
-    learning_style = session.exec(
+    learning_style = (await session.exec(
         select(LearningStyle).where(LearningStyle.user_id == current_user.id)
-    ).first()
+    )).first()
     
-    cognitive_profile = session.exec(
+    cognitive_profile = (await session.exec(
         select(CognitiveProfile).where(CognitiveProfile.user_id == current_user.id)
-    ).first()
+    )).first()
     
     # Get all questions for user's level and language
-    questions = session.exec(
-        select(Question).where(
-            Question.language == current_user.preferred_language
-        ).order_by(Question.difficulty)
-    ).all()
+    questions = (await session.exec(
+        select(Question.id, Problem.title, Problem.difficulty)
+        .join(Problem, Problem.id == Question.problem_id)
+        .where(Question.language == current_user.preferred_language)
+        .order_by(Problem.difficulty)
+    )).all()
     
     # Generate personalized learning path
     learning_path = []
@@ -386,29 +376,23 @@ async def get_personalized_learning_path(
 async def pause_session(
     reason: str = "",
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Pause the current learning session"""
     # Get active session
-    from models import UserSession
-    active_session = session.exec(
-        select(UserSession).where(
-            UserSession.user_id == current_user.id,
-            UserSession.session_end == None
-        )
-    ).first()
+    session_id = await session.run_sync(lambda s: active_sessions.current(current_user.id or 0, s))
     
-    if not active_session:
+    if not session_id:
         raise HTTPException(status_code=404, detail="No active session found")
     
     # Create pause record
     pause = SessionPause(
-        session_id=active_session.id or 0,
+        session_id=session_id,
         pause_time=datetime.utcnow(),
         reason=reason
     )
     session.add(pause)
-    session.commit()
+    await session.commit()
     
     return {"message": "Session paused successfully", "pause_id": pause.id}
 
@@ -416,16 +400,16 @@ async def pause_session(
 async def resume_session(
     pause_id: int,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Resume a paused learning session"""
-    pause_record = session.get(SessionPause, pause_id)
+    pause_record = await session.get(SessionPause, pause_id)
     if not pause_record:
         raise HTTPException(status_code=404, detail="Pause record not found")
     
     # Update pause record
     pause_record.resume_time = datetime.utcnow()
-    session.commit()
+    await session.commit()
     
     return {"message": "Session resumed successfully"}
 
@@ -440,37 +424,23 @@ class ModeUpdateRequest(BaseModel):
 async def pause_session_endpoint(
     req: dict,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Pause the current learning session (alternative endpoint)"""
     reason = req.get("reason", "")
     
     # Get active session
-    from models import UserSession
-    active_session = session.exec(
-        select(UserSession).where(
-            UserSession.user_id == current_user.id,
-            UserSession.session_end == None
-        )
-    ).first()
-    
-    if not active_session:
-        # Create a new session if none exists
-        active_session = UserSession(
-            user_id=current_user.id or 0,
-            session_start=datetime.utcnow()
-        )
-        session.add(active_session)
-        session.commit()
+    # Create a new session if none exists
+    session_id = await session.run_sync(lambda s: active_sessions.get_or_open(current_user.id or 0, s))
     
     # Create pause record
     pause = SessionPause(
-        session_id=active_session.id or 0,
+        session_id=session_id,
         pause_time=datetime.utcnow(),
         reason=reason
     )
     session.add(pause)
-    session.commit()
+    await session.commit()
     
     return {"message": "Session paused successfully", "pause_id": pause.id}
 
@@ -478,16 +448,16 @@ async def pause_session_endpoint(
 async def resume_session_endpoint(
     pause_id: int,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Resume a paused learning session (alternative endpoint)"""
-    pause_record = session.get(SessionPause, pause_id)
+    pause_record = await session.get(SessionPause, pause_id)
     if not pause_record:
         raise HTTPException(status_code=404, detail="Pause record not found")
     
     # Update pause record
     pause_record.resume_time = datetime.utcnow()
-    session.commit()
+    await session.commit()
     
     return {"message": "Session resumed successfully"}
 
@@ -495,30 +465,16 @@ async def resume_session_endpoint(
 async def update_difficulty(
     req: DifficultyUpdateRequest,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Update user's current difficulty level"""
     # Store difficulty in user session or create a new field in User model
     # For now, we'll store it in the session
-    from models import UserSession
-    active_session = session.exec(
-        select(UserSession).where(
-            UserSession.user_id == current_user.id,
-            UserSession.session_end == None
-        )
-    ).first()
-    
-    if not active_session:
-        # Create a new session
-        active_session = UserSession(
-            user_id=current_user.id or 0,
-            session_start=datetime.utcnow()
-        )
-        session.add(active_session)
+    # Create a new session if none exists
+    await session.run_sync(lambda s: active_sessions.get_or_open(current_user.id or 0, s))
     
     # Store difficulty in session metadata (you might want to add this field to UserSession model)
     # For now, we'll just return success
-    session.commit()
     
     return {"message": "Difficulty updated successfully", "difficulty": req.difficulty}
 
@@ -526,7 +482,7 @@ async def update_difficulty(
 async def update_mode(
     req: ModeUpdateRequest,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Update user's current learning mode"""
     # Store mode in user session or create a new field in User model
@@ -536,27 +492,21 @@ async def update_mode(
 @router.get("/session-state")
 async def get_session_state(
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Get current session state including pause status and settings"""
     # Get active session
-    from models import UserSession
-    active_session = session.exec(
-        select(UserSession).where(
-            UserSession.user_id == current_user.id,
-            UserSession.session_end == None
-        )
-    ).first()
+    session_id = await session.run_sync(lambda s: active_sessions.current(current_user.id or 0, s))
     
     # Get latest pause record
     latest_pause = None
-    if active_session:
-        latest_pause = session.exec(
+    if session_id:
+        latest_pause = (await session.exec(
             select(SessionPause).where(
-                SessionPause.session_id == active_session.id,
+                SessionPause.session_id == session_id,
                 SessionPause.resume_time == None
             ).order_by(desc(SessionPause.pause_time))
-        ).first()
+        )).first()
     
     return {
         "isPaused": latest_pause is not None,
@@ -1,33 +1,99 @@
-from fastapi import APIRouter, Query, HTTPException, Depends, Body
+from fastapi import APIRouter, Query, HTTPException, Depends, Body, Request, Response
 from sqlmodel import Session, select
-from models import Question, UserQuestionProgress
+from models import Problem, Question, QuestionRead, UserQuestionProgress
 from database import get_session
 from typing import List, Optional, Dict
-from auth import get_current_user
+from auth import get_current_user, require_admin
+import question_import
 from fastapi import status
+import base64
+import csv
 import json
 
 router = APIRouter(prefix="/questions", tags=["questions"])
 
+QUESTIONS_PAGE_MAX = 100
 
-@router.get("/", response_model=List[Question])
+
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"after": last_id}).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        last_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))["after"]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    # bool is an int subclass, and the id must fit the BIGINT it is compared with
+    if type(last_id) is not int or not 0 <= last_id < 2 ** 63:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return last_id
+
+
+def select_questions():
+    """Questions joined with their problem content, in the QuestionRead shape"""
+    return select(
+        Question.id, Problem.title, Problem.description, Problem.difficulty,
+        Question.language, Problem.solution, Problem.examples,
+    ).join(Problem, Problem.id == Question.problem_id)
+
+
+def read_question(session: Session, question_id: int) -> QuestionRead:
+    row = session.exec(select_questions().where(Question.id == question_id)).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Question not found")
+    return QuestionRead(**row._mapping)
+
+
+@router.get("/", response_model=List[QuestionRead])
 def get_questions(
+    response: Response,
     difficulty: Optional[str] = Query(
         None, description="Difficulty level: basic, intermediate, advanced"
     ),
     language: Optional[str] = Query(
         None, description="Programming language: Python, C++, JavaScript"
     ),
+    limit: int = Query(10, ge=1, le=QUESTIONS_PAGE_MAX, description="Questions per page"),
+    cursor: Optional[str] = Query(
+        None, description="X-Next-Cursor header of the previous page"
+    ),
     session: Session = Depends(get_session),
 ):
-    query = select(Question)
+    """Questions in id order, a page at a time; X-Next-Cursor is set while more remain"""
+    query = select_questions()
     if difficulty:
-        query = query.where(Question.difficulty == difficulty)
+        query = query.where(Problem.difficulty == difficulty)
     if language:
         query = query.where(Question.language == language)
-    results = session.exec(query).all()
-    # Limit to 10 questions per request
-    return results[:10]
+    if cursor:
+        query = query.where(Question.id > decode_cursor(cursor))
+    # One extra row tells whether there is a next page
+    rows = session.exec(query.order_by(Question.id).limit(limit + 1)).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1].id)
+    return [QuestionRead(**row._mapping) for row in rows]
+
+
+@router.post("/import")
+async def import_questions(
+    request: Request,
+    format: Optional[str] = Query(
+        None, description="jsonl or csv; defaults to csv for a text/csv body, else jsonl"
+    ),
+    admin=Depends(require_admin),
+):
+    """Stream a JSONL or CSV question file in the request body into the catalog"""
+    if format is None:
+        format = "csv" if "csv" in request.headers.get("content-type", "") else "jsonl"
+    if format not in question_import.FORMATS:
+        raise HTTPException(status_code=400, detail="format must be jsonl or csv")
+    try:
+        return await question_import.import_stream(request.stream(), format)
+    except (ValueError, csv.Error) as e:
+        # Undecodable bytes or broken CSV quoting; chunks before this point are kept
+        raise HTTPException(status_code=400, detail=f"Could not read the file: {e}")
 
 
 @router.get("/progress", response_model=Dict[int, dict])
@@ -75,12 +141,9 @@ def update_user_progress(
     return
 
 
-@router.get("/{question_id}", response_model=Question)
+@router.get("/{question_id}", response_model=QuestionRead)
 def get_question(question_id: int, session: Session = Depends(get_session)):
-    question = session.get(Question, question_id)
-    if not question:
-        raise HTTPException(status_code=404, detail="Question not found")
-    return question
+    return read_question(session, question_id)
 
 
 @router.post("/{question_id}/submit")
@@ -89,9 +152,7 @@ def submit_answer(
     answer: str = Body(..., embed=True),
     session: Session = Depends(get_session),
 ):
-    question = session.get(Question, question_id)
-    if not question:
-        raise HTTPException(status_code=404, detail="Question not found")
+    question = read_question(session, question_id)
     # Simple string match for now (case-insensitive, strip)
     correct = False
     if question.solution:
@@ -101,9 +162,7 @@ def submit_answer(
 
 @router.get("/{question_id}/summary")
 def get_question_summary(question_id: int, session: Session = Depends(get_session)):
-    question = session.get(Question, question_id)
-    if not question:
-        raise HTTPException(status_code=404, detail="Question not found")
+    question = read_question(session, question_id)
     examples = []
     if question.examples:
         try:
@@ -1,12 +1,14 @@
-from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi import APIRouter, Depends
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
-from sqlmodel import Session, select, desc, func
-from database import get_session
+from sqlmodel import select, desc, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+from database import get_async_session
+from auth import get_current_user
 from models import (
     User, UserSession, ChatMessage, Quiz, EmotionalTrend, 
-    UserQuestionProgress, Question
+    UserQuestionProgress, Question, Problem
 )
 from routers.sentiment import analyze_sentiment
 
@@ -42,25 +44,10 @@ class ResearchMetrics(BaseModel):
     external_tool_usage_rate: float
     satisfaction_ratings: Dict[str, float]
 
-def get_current_user(request: Request, session: Session = Depends(get_session)) -> User:
-    """Get current user from token"""
-    auth: str = request.headers.get("authorization", "")
-    if not auth or not auth.lower().startswith("bearer "):
-        raise HTTPException(status_code=401, detail="Missing or invalid token")
-    token = auth.split()[1]
-    from auth import decode_access_token
-    payload = decode_access_token(token)
-    if not payload or "user_id" not in payload:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    user = session.get(User, payload["user_id"])
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    return user
-
 @router.post("/user-study-data")
 async def submit_user_study_data(
     data: UserStudyData,
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Submit user study feedback data"""
     # Store in database (you might want to create a new model for this)
@@ -71,7 +58,7 @@ async def submit_user_study_data(
 @router.post("/learning-outcome")
 async def submit_learning_outcome(
     outcome: LearningOutcome,
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Submit learning outcome measurement"""
     # Store learning outcome data
@@ -81,15 +68,15 @@ async def submit_learning_outcome(
 @router.get("/metrics")
 async def get_research_metrics(
     current_user: User = Depends(get_current_user),
-    db_session: Session = Depends(get_session)
+    db_session: AsyncSession = Depends(get_async_session)
 ):
     """Get comprehensive research metrics for analysis"""
     
     # Calculate total participants
-    total_users = db_session.exec(select(func.count())).first() or 0
+    total_users = (await db_session.exec(select(func.count()))).first() or 0
     
     # Calculate average session duration
-    sessions = db_session.exec(select(UserSession)).all()
+    sessions = (await db_session.exec(select(UserSession))).all()
     total_duration = 0
     completed_sessions = 0
     
@@ -102,12 +89,12 @@ async def get_research_metrics(
     avg_session_duration = total_duration / completed_sessions if completed_sessions > 0 else 0
     
     # Calculate average quiz accuracy
-    quizzes = db_session.exec(select(Quiz)).all()
+    quizzes = (await db_session.exec(select(Quiz))).all()
     correct_quizzes = sum(1 for quiz in quizzes if quiz.is_correct)
     avg_quiz_accuracy = correct_quizzes / len(quizzes) if quizzes else 0
     
     # Calculate emotional improvement rate
-    emotional_trends = db_session.exec(select(EmotionalTrend)).all()
+    emotional_trends = (await db_session.exec(select(EmotionalTrend))).all()
     positive_shifts = 0
     total_sessions = 0
     
@@ -142,13 +129,13 @@ async def get_research_metrics(
 async def get_user_emotional_trends(
     user_id: int,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Get emotional trends for a specific user"""
-    trends = session.exec(
+    trends = (await session.exec(
         select(EmotionalTrend)
         .where(EmotionalTrend.user_id == user_id)
-    ).all()
+    )).all()
     
     return {
         "user_id": user_id,
@@ -167,28 +154,28 @@ async def get_user_emotional_trends(
 async def get_user_learning_progress(
     user_id: int,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Get detailed learning progress for a user"""
     
     # Get question progress
-    progress = session.exec(
+    progress = (await session.exec(
         select(UserQuestionProgress)
         .where(UserQuestionProgress.user_id == user_id)
-    ).all()
+    )).all()
     
     # Get quiz performance
-    quizzes = session.exec(
+    quizzes = (await session.exec(
         select(Quiz)
         .where(Quiz.user_id == user_id)
-    ).all()
+    )).all()
     
     # Get session data
-    sessions = session.exec(
+    sessions = (await session.exec(
         select(UserSession)
         .where(UserSession.user_id == user_id)
         .order_by(desc(UserSession.session_start))
-    ).all()
+    )).all()
     
     return {
         "user_id": user_id,
@@ -215,12 +202,14 @@ async def get_user_learning_progress(
 @router.get("/topic-performance")
 async def get_topic_performance_analysis(
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Get performance analysis by topic"""
     
     # Get all questions grouped by difficulty
-    questions = session.exec(select(Question)).all()
+    questions = (await session.exec(
+        select(Question.id, Problem.difficulty).join(Problem, Problem.id == Question.problem_id)
+    )).all()
     
     topic_performance = {}
     
@@ -237,10 +226,10 @@ async def get_topic_performance_analysis(
         topic_performance[topic]["total_questions"] += 1
         
         # Get progress for this question
-        progress = session.exec(
+        progress = (await session.exec(
             select(UserQuestionProgress)
             .where(UserQuestionProgress.question_id == question.id)
-        ).all()
+        )).all()
         
         for p in progress:
             if p.attempted:
@@ -260,17 +249,17 @@ async def get_topic_performance_analysis(
 @router.get("/export-data")
 async def export_research_data(
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Export all research data for analysis"""
     
     # Get all relevant data
-    users = session.exec(select(User)).all()
-    sessions = session.exec(select(UserSession)).all()
-    messages = session.exec(select(ChatMessage)).all()
-    quizzes = session.exec(select(Quiz)).all()
-    emotional_trends = session.exec(select(EmotionalTrend)).all()
-    progress = session.exec(select(UserQuestionProgress)).all()
+    users = (await session.exec(select(User))).all()
+    sessions = (await session.exec(select(UserSession))).all()
+    messages = (await session.exec(select(ChatMessage))).all()
+    quizzes = (await session.exec(select(Quiz))).all()
+    emotional_trends = (await session.exec(select(EmotionalTrend))).all()
+    progress = (await session.exec(select(UserQuestionProgress))).all()
     
     export_data = {
         "export_timestamp": datetime.utcnow().isoformat(),
@@ -361,7 +350,7 @@ async def export_research_data(
 @router.get("/ab-test-results")
 async def get_ab_test_results(
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Get A/B testing results for different features"""
     
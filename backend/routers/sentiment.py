@@ -1,12 +1,51 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+import functools
+import os
+import metrics
 
 router = APIRouter(prefix="/sentiment", tags=["sentiment"])
 
 # Initialize VADER sentiment analyzer
 analyzer = SentimentIntensityAnalyzer()
 
+# Scores of recently seen messages; students repeat short ones ("ok", "thanks", "I don't get it") a lot
+SENTIMENT_CACHE_SIZE = int(os.getenv("SENTIMENT_CACHE_SIZE", "10000"))
+# Longer messages are rarely sent twice and would only crowd the cache
+SENTIMENT_CACHE_MAX_CHARS = int(os.getenv("SENTIMENT_CACHE_MAX_CHARS", "64"))
+_uncached = {"scored": 0}
+
+
+@functools.lru_cache(maxsize=SENTIMENT_CACHE_SIZE)
+def _cached_scores(normalized: str) -> dict:
+    return analyzer.polarity_scores(normalized)
+
+
+def polarity_scores(message: str) -> dict:
+    """
+    VADER scores for a message; do not modify the returned dict. Only runs of
+    whitespace are normalized: VADER splits on whitespace, so that cannot change
+    a score, while case and punctuation can ("GREAT!!" scores above "great").
+    """
+    normalized = " ".join(message.split())
+    if len(normalized) > SENTIMENT_CACHE_MAX_CHARS:
+        _uncached["scored"] += 1
+        return analyzer.polarity_scores(normalized)
+    return _cached_scores(normalized)
+
+
+def _cache_metrics() -> dict:
+    info = _cached_scores.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "hits": info.hits, "misses": info.misses, "size": info.currsize, "too_long": _uncached["scored"],
+        "hit_rate": round(info.hits / lookups, 3) if lookups else None,
+    }
+
+
+metrics.register("sentiment_cache", _cache_metrics)
+
 
 class SentimentRequest(BaseModel):
     message: str
@@ -28,7 +67,7 @@ def analyze_sentiment(req: SentimentRequest):
     Returns compound score between -1.0 and +1.0
     """
     # Get sentiment scores
-    scores = analyzer.polarity_scores(req.message)
+    scores = polarity_scores(req.message)
 
     # Determine emotion category based on compound score
     compound = scores["compound"]
@@ -56,7 +95,7 @@ def analyze_sentiment_batch(messages: list[str]):
     """
     results = []
     for message in messages:
-        scores = analyzer.polarity_scores(message)
+        scores = polarity_scores(message)
         compound = scores["compound"]
 
         if compound >= 0.3:
@@ -1,14 +1,21 @@
-from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
 from sqlmodel import select, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.exc import IntegrityError
 from models import User
-from database import get_session
+from database import get_async_session, get_session
 from auth import (
-    hash_password,
-    verify_password,
+    hash_password_offloaded,
+    verify_password_offloaded,
     create_access_token,
-    decode_access_token,
+    get_current_user,
+    require_admin,
 )
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
+import rate_limit
+import roster_import
+import csv
+from typing import Literal, Optional
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -26,45 +33,83 @@ class UserLogin(BaseModel):
     password: str
 
 
+class UserUpdate(BaseModel):
+    """Profile fields to change; omitted fields are kept"""
+    name: Optional[str] = None
+    preferred_language: Optional[str] = None
+    dsa_level: Optional[Literal["Beginner", "Intermediate", "Advanced"]] = None
+
+    @field_validator("*")
+    @classmethod
+    def not_null(cls, value):
+        # The columns are NOT NULL; an explicit null is a 422, not a failed commit
+        if value is None:
+            raise ValueError("may not be null")
+        return value
+
+
 @router.post("/register")
-def register(user: UserCreate, session: Session = Depends(get_session)):
-    existing = session.exec(select(User).where(User.email == user.email)).first()
+async def register(user: UserCreate, request: Request, session: AsyncSession = Depends(get_async_session)):
+    await rate_limit.admit_register(request)
+    existing = (await session.exec(select(User).where(User.email == user.email))).first()
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
     db_user = User(
         name=user.name,
         email=user.email,
-        hashed_password=hash_password(user.password),
+        hashed_password=await hash_password_offloaded(user.password),
         preferred_language=user.preferred_language,
         dsa_level=user.dsa_level,
     )
     session.add(db_user)
-    session.commit()
-    session.refresh(db_user)
+    try:
+        await session.commit()
+    except IntegrityError:
+        # Lost a race with a concurrent sign-up; ux_user_email keeps the first one
+        await session.rollback()
+        raise HTTPException(status_code=400, detail="Email already registered")
     return {"msg": "User registered successfully"}
 
 
 @router.post("/login")
-def login(user: UserLogin, session: Session = Depends(get_session)):
-    db_user = session.exec(select(User).where(User.email == user.email)).first()
-    if not db_user or not verify_password(user.password, db_user.hashed_password):
+async def login(user: UserLogin, request: Request, session: AsyncSession = Depends(get_async_session)):
+    await rate_limit.admit_login(request, user.email)
+    db_user = (await session.exec(select(User).where(User.email == user.email))).first()
+    if not db_user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    valid, new_hash = await verify_password_offloaded(user.password, db_user.hashed_password)
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    if new_hash:
+        # BCRYPT_ROUNDS changed since this password was stored
+        db_user.hashed_password = new_hash
+        session.add(db_user)
+        await session.commit()
     token = create_access_token({"sub": db_user.email, "user_id": db_user.id})
     return {"access_token": token, "token_type": "bearer"}
 
 
-@router.get("/me")
-def get_me(request: Request, session: Session = Depends(get_session)):
-    auth = request.headers.get("authorization")
-    if not auth or not auth.lower().startswith("bearer "):
-        raise HTTPException(status_code=401, detail="Missing or invalid token")
-    token = auth.split()[1]
-    payload = decode_access_token(token)
-    if not payload or "user_id" not in payload:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    user = session.get(User, payload["user_id"])
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+@router.post("/roster")
+async def import_roster(
+    request: Request,
+    format: Optional[str] = Query(
+        None, description="csv or json (an array or JSON lines); defaults to csv for a text/csv body, else json"
+    ),
+    admin=Depends(require_admin),
+):
+    """Register a class at once from a CSV or JSON roster in the request body; returns a result per row"""
+    if format is None:
+        format = "csv" if "csv" in request.headers.get("content-type", "") else "json"
+    if format not in roster_import.FORMATS:
+        raise HTTPException(status_code=400, detail="format must be csv or json")
+    try:
+        text = (await request.body()).decode("utf-8-sig")
+        return await roster_import.import_roster(text, format)
+    except (ValueError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Could not read the roster: {e}")
+
+
+def profile(user: User) -> dict:
     return {
         "id": user.id,
         "name": user.name,
@@ -73,3 +118,26 @@ def get_me(request: Request, session: Session = Depends(get_session)):
         "dsa_level": user.dsa_level,
         "created_at": user.created_at,
     }
+
+
+@router.get("/me")
+def get_me(user: User = Depends(get_current_user)):
+    return profile(user)
+
+
+@router.patch("/me")
+def update_me(
+    update: UserUpdate,
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_session),
+):
+    # Update a fresh row, not the cached one; saving it evicts it from the auth cache
+    user = session.get(User, current_user.id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    for field, value in update.model_dump(exclude_unset=True).items():
+        setattr(user, field, value)
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+    return profile(user)
@@ -0,0 +1,226 @@
+"""
+Persistent cache for /ai/question-detail study material.
+
+Entries are keyed by a hash of the prompt version, model, title and description,
+so editing a problem or the prompt misses the cache automatically. Warm the
+cache for the whole question catalog with:
+    python study_cache.py --concurrency 4
+"""
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, delete, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database import async_engine, engine
+import metrics
+from llm import LLM_MODEL, chat_completion
+from llm_scheduler import INTERACTIVE, PREFETCH
+from models import Problem, StudyMaterial
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever question_detail_prompt changes so old material is regenerated
+STUDY_PROMPT_VERSION = "1"
+STUDY_CACHE_TTL_DAYS = float(os.getenv("STUDY_CACHE_TTL_DAYS", "30"))  # 0 disables expiry
+
+_stats = {"hits": 0, "misses": 0}
+
+
+def question_detail_prompt(title: str, description: str) -> str:
+    return f"""
+# SYSTEM INSTRUCTIONS:
+You are a strict DSA tutor writing study material — **NOT solving the problem**. You may NOT include code. You must explain visually and structurally.
+
+Write a markdown explanation following these **strict rules and sections**:
+
+---
+
+## 🔹 Summary (2–3 lines)  
+Explain what kind of thinking this problem is testing. Do NOT mention code.
+
+---
+
+## 🔸 Key Concepts (3–4 bullets)  
+- What concept is core to solving this problem?  
+- What patterns or DSA topics are involved?  
+- What edge cases or misconceptions might arise?  
+- What should a student think about before starting?
+
+---
+
+## ✍️ Example (Only 1, no code)  
+Give one small, clear example **with input and expected output only**.  
+Describe the transition in words, not code.
+
+---
+
+## 🎨 Visualization (Mermaid Diagram REQUIRED)  
+Use a **mermaid** diagram in a markdown code block.
+
+Example syntax:  
+```mermaid
+graph LR
+A[Left Pointer] --> B[Compare Characters] --> C[Right Pointer]
+Keep it simple but relevant (pointer movement, recursion, state transition, etc.).
+If nothing obvious fits, invent a helpful analogy or suggest a Google Image keyword like:
+"Search: two pointers string visualization"
+
+💡 Time/Space Hint
+Give a small nudge, not the answer.
+Examples:
+
+“How many elements are visited?”
+
+“Does space usage grow with input?”
+
+❗ RULES (Follow Strictly)
+❌ NO code
+
+❌ NO pseudocode
+
+❌ NO implementation
+
+✅ USE all 5 sections above
+
+✅ MUST include Mermaid
+
+✅ Format as markdown
+
+TASK
+Title: {title}
+
+Description: {description}
+"""
+
+
+def cache_key(title: str, description: str, model: str = LLM_MODEL) -> str:
+    raw = "\x1f".join([STUDY_PROMPT_VERSION, model, title.strip(), description.strip()])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+async def lookup(session: AsyncSession, key: str) -> Optional[StudyMaterial]:
+    material = (await session.exec(select(StudyMaterial).where(StudyMaterial.cache_key == key))).first()
+    if material and material.expires_at and material.expires_at <= datetime.utcnow():
+        return None
+    return material
+
+
+async def store(key: str, title: str, content: str) -> bool:
+    """Save generated material; False if a concurrent request stored the same key first"""
+    expires_at = None
+    if STUDY_CACHE_TTL_DAYS > 0:
+        expires_at = datetime.utcnow() + timedelta(days=STUDY_CACHE_TTL_DAYS)
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        material = (await session.exec(select(StudyMaterial).where(StudyMaterial.cache_key == key))).first()
+        if material:
+            material.content = content
+            material.created_at = datetime.utcnow()
+            material.expires_at = expires_at
+        else:
+            session.add(StudyMaterial(
+                cache_key=key,
+                title=title,
+                content=content,
+                model=LLM_MODEL,
+                prompt_version=STUDY_PROMPT_VERSION,
+                expires_at=expires_at,
+            ))
+        try:
+            await session.commit()
+        except IntegrityError:
+            # A concurrent request stored the same material first
+            await session.rollback()
+            return False
+    return True
+
+
+async def generate(title: str, description: str, priority: int = PREFETCH,
+                   user_id: Optional[int] = None) -> Optional[str]:
+    return await chat_completion(
+        [{"role": "user", "content": question_detail_prompt(title, description)}],
+        max_tokens=500,
+        temperature=0.7,
+        priority=priority,
+        user_id=user_id,
+    )
+
+
+async def get_or_generate(title: str, description: str, user_id: Optional[int] = None) -> Optional[str]:
+    """Return cached study material, calling the LLM only on a miss (at interactive priority: a student is waiting)"""
+    key = cache_key(title, description)
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        material = await lookup(session, key)
+        if material:
+            _stats["hits"] += 1
+            return material.content
+    _stats["misses"] += 1
+    content = await generate(title, description, INTERACTIVE, user_id)
+    if content:
+        await store(key, title, content)
+    return content
+
+
+def stats() -> dict:
+    return dict(_stats)
+
+
+metrics.register("study_cache", stats)
+
+
+def purge_stale() -> int:
+    """Delete expired entries and entries from older prompt versions"""
+    with Session(engine) as session:
+        result = session.exec(
+            delete(StudyMaterial).where(
+                (StudyMaterial.prompt_version != STUDY_PROMPT_VERSION)
+                | (StudyMaterial.expires_at <= datetime.utcnow())
+            )
+        )
+        session.commit()
+        return result.rowcount
+
+
+async def warm(concurrency: int = 4) -> dict:
+    """Generate study material for every catalog problem that has no fresh entry"""
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        problems = (await session.exec(select(Problem.title, Problem.description))).all()
+        missing = [(t, d) for t, d in problems if not await lookup(session, cache_key(t, d))]
+
+    semaphore = asyncio.Semaphore(concurrency)
+    generated = failures = 0
+
+    async def one(title: str, description: str):
+        nonlocal generated, failures
+        async with semaphore:
+            try:
+                content = await generate(title, description)
+            except Exception as e:
+                logger.warning("Warming study material for %r failed: %s", title, e)
+                failures += 1
+                return
+        if content and await store(cache_key(title, description), title, content):
+            generated += 1
+
+    await asyncio.gather(*(one(t, d) for t, d in missing))
+    return {"problems": len(problems), "generated": generated, "failed": failures}
+
+
+if __name__ == "__main__":
+    from database import create_db_and_tables
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--purge", action="store_true", help="delete expired and outdated entries first")
+    args = parser.parse_args()
+
+    create_db_and_tables()
+    if args.purge:
+        print(f"Purged {purge_stale()} stale entries")
+    print(f"Study cache: {asyncio.run(warm(args.concurrency))}")
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Checks for the configurable database engine.
+
+SQLite checks always run. The PostgreSQL path runs when TEST_POSTGRES_URL
+points at a scratch database (its tables are dropped and migrated again):
+
+    TEST_POSTGRES_URL=postgresql://postgres@127.0.0.1:5432/dsagpt_test python test_database.py
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+try:
+    import pytest
+    skip, Skipped = pytest.skip, pytest.skip.Exception
+except ImportError:  # the runner at the bottom works without pytest
+    class Skipped(Exception):
+        pass
+
+    def skip(reason: str):
+        raise Skipped(reason)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def run_with(url: str, *args) -> subprocess.CompletedProcess:
+    """Run this file in a fresh interpreter with DATABASE_URL set (the engine is built at import)"""
+    env = {**os.environ, "DATABASE_URL": url, "OPENAI_API_KEY": "fake-key", "SECRET_KEY": "test-secret"}
+    return subprocess.run(
+        [sys.executable, os.path.join(HERE, "test_database.py"), *args],
+        env=env, cwd=tempfile.mkdtemp(prefix="dsagpt-test-"), capture_output=True, text=True, timeout=120,
+    )
+
+
+def test_sqlite_pragmas():
+    """WAL, synchronous=NORMAL, busy_timeout and mmap_size are applied on connect"""
+    import database
+    from sqlalchemy import text
+
+    path = os.path.join(tempfile.mkdtemp(prefix="dsagpt-test-"), "pragmas.db")
+    engine = database.build_engine(f"sqlite:///{path}")
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == database.SQLITE_BUSY_TIMEOUT_MS
+        assert conn.execute(text("PRAGMA mmap_size")).scalar() == database.SQLITE_MMAP_SIZE
+    assert engine.echo is False
+    assert engine.pool.size() == database.DB_POOL_SIZE
+
+
+def test_sqlite_memory_shares_one_connection():
+    import database
+    from sqlalchemy import text
+
+    engine = database.build_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (x INTEGER)"))
+        conn.execute(text("INSERT INTO t VALUES (1)"))
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT x FROM t")).scalar() == 1
+
+
+def test_postgres_options():
+    import database
+
+    options = database.engine_options("postgresql://u:p@db.example.com/dsagpt")
+    assert options["pool_size"] == database.DB_POOL_SIZE
+    assert options["pool_pre_ping"] is True
+    assert "connect_args" not in options
+
+
+def test_database_url_from_environment():
+    result = run_with("postgres://u:p@db.example.com:5432/dsagpt", "--print-url")
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "postgresql://u:p@db.example.com:5432/dsagpt"
+
+
+def test_app_on_sqlite_file():
+    result = run_with("sqlite:///./app.db", "--smoke")
+    assert result.returncode == 0, result.stdout + result.stderr
+
+
+def test_app_on_postgres():
+    url = os.getenv("TEST_POSTGRES_URL")
+    if not url:
+        skip("TEST_POSTGRES_URL is not set")
+    result = run_with(url, "--smoke", "--reset")
+    assert result.returncode == 0, result.stdout + result.stderr
+
+
+def test_question_catalog_seeding():
+    result = run_with("sqlite:///./catalog.db", "--catalog")
+    assert result.returncode == 0, result.stdout + result.stderr
+
+
+def catalog():
+    """Seed twice, then seed an edited copy of the catalog over the first one"""
+    import json
+    from sqlalchemy import event
+    from sqlmodel import Session, select
+
+    from database import QUESTIONS_FILE, create_db_and_tables, engine, seed_questions
+    from models import CatalogVersion, Problem, Question
+
+    def catalog_rows(session):
+        query = select(Question.id, Problem.title, Question.language, Problem.description).join(Problem)
+        return {(row.title, row.language): row for row in session.exec(query).all()}
+
+    create_db_and_tables()
+    seed_questions()
+    with Session(engine) as session:
+        ids = {key: row.id for key, row in catalog_rows(session).items()}
+        assert len(ids) == 90, len(ids)
+        assert len(session.exec(select(Problem)).all()) == 30
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    seed_questions()
+    event.remove(engine, "before_cursor_execute", listener)
+    assert len(statements) == 1 and "catalogversion" in statements[0], statements
+
+    with open(QUESTIONS_FILE) as f:
+        edited = json.load(f)
+    edited["version"] += 1
+    edited["questions"][0]["description"] = "Reverse the array in place."
+    edited["questions"].append({**edited["questions"][1], "title": "Find Minimum Element"})
+    with open("questions.json", "w") as f:
+        json.dump(edited, f)
+    seed_questions("questions.json")
+    with Session(engine) as session:
+        questions = catalog_rows(session)
+        assert len(questions) == 93, len(questions)
+        assert all(questions[key].id == id for key, id in ids.items())
+        assert questions[("Reverse an Array", "C++")].description == "Reverse the array in place."
+        assert session.get(CatalogVersion, "questions").version == edited["version"]
+    print("catalog ok")
+
+
+def smoke(reset: bool):
+    """Start the app on DATABASE_URL and drive sign-up, questions and two chat turns"""
+    sys.path.insert(0, os.path.join(HERE, "benchmarks"))
+    import fake_llm
+    os.environ["OPENAI_BASE_URL"] = fake_llm.start_in_thread(0.01)
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import text
+    from sqlmodel import Session, SQLModel, select
+
+    from database import engine
+    import models
+    from main import app
+
+    if reset:
+        SQLModel.metadata.drop_all(engine)
+        with engine.begin() as conn:
+            conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
+    with TestClient(app) as client:
+        user = {"name": "Test", "email": "db-test@example.com", "password": "test-password"}
+        assert client.post("/users/register", json=user).status_code == 200
+        r = client.post("/users/login", json={"email": user["email"], "password": user["password"]})
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        assert len(client.get("/questions/").json()) > 0
+        for message in ("What is a heap?", "Thanks, that helps a lot!"):
+            r = client.post("/chat/message", json={"message": message, "topic": "Heaps"}, headers=headers)
+            assert r.status_code == 200, r.text
+    with Session(engine) as session:
+        messages = session.exec(select(models.ChatMessage)).all()
+        assert len(messages) == 4, len(messages)
+        assert len({m.session_id for m in messages}) == 1
+        assert len(session.exec(select(models.EmotionalTrend)).all()) == 2
+    print(f"smoke ok on {engine.url.get_backend_name()}")
+
+
+if __name__ == "__main__":
+    if "--print-url" in sys.argv:
+        import database
+        print(database.DATABASE_URL)
+        sys.exit(0)
+    if "--catalog" in sys.argv:
+        catalog()
+        sys.exit(0)
+    if "--smoke" in sys.argv:
+        smoke(reset="--reset" in sys.argv)
+        sys.exit(0)
+
+    sys.path.insert(0, HERE)
+    failed = 0
+    for name, test in [(n, f) for n, f in list(globals().items()) if n.startswith("test_")]:
+        try:
+            test()
+            print(f"✅ {name}")
+        except Skipped as e:
+            print(f"⏭️  {name}: skipped, {e}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {name}: {e}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Checks that the hot-path queries are served by the indexes from migrations/.
+
+Migrates a scratch SQLite database to head and runs EXPLAIN QUERY PLAN on each
+query the routers issue per request; a plan that reads the table with a bare
+SCAN means an index is missing.
+"""
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='dsagpt-test-'), 'plans.db')}"
+
+from sqlalchemy import text  # noqa: E402
+from sqlmodel import desc, select  # noqa: E402
+
+from database import create_db_and_tables, engine  # noqa: E402
+from models import (  # noqa: E402
+    ChatMessage, EmotionalTrend, Problem, Question, Quiz, SpacedRepetition, User, UserQuestionProgress,
+    UserSession,
+)
+
+create_db_and_tables()
+
+
+def plan(statement) -> str:
+    """EXPLAIN QUERY PLAN output for a SQLModel select, one step per line"""
+    compiled = statement.compile(engine, compile_kwargs={"literal_binds": True})
+    with engine.connect() as conn:
+        rows = conn.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+    return "\n".join(row[-1] for row in rows)
+
+
+def assert_indexed(statement, index: str):
+    steps = plan(statement)
+    assert f"INDEX {index}" in steps, steps
+    assert not any(step.startswith("SCAN") and "INDEX" not in step for step in steps.splitlines()), steps
+    assert "TEMP B-TREE" not in steps, steps
+
+
+def test_user_by_email():
+    assert_indexed(select(User).where(User.email == "a@example.com"), "ux_user_email")
+
+
+def test_chat_messages_by_user_newest_first():
+    assert_indexed(
+        select(ChatMessage).where(ChatMessage.user_id == 1).order_by(desc(ChatMessage.timestamp)).limit(20),
+        "ix_chatmessage_user_time",
+    )
+
+
+def test_chat_messages_by_session():
+    assert_indexed(
+        select(ChatMessage).where(ChatMessage.session_id == 1).order_by(desc(ChatMessage.id)).limit(12),
+        "ix_chatmessage_session",
+    )
+
+
+def test_emotional_trends_by_user_since():
+    assert_indexed(
+        select(EmotionalTrend)
+        .where(EmotionalTrend.user_id == 1, EmotionalTrend.timestamp >= datetime(2024, 1, 1))
+        .order_by(desc(EmotionalTrend.timestamp)),
+        "ix_emotionaltrend_user_time",
+    )
+
+
+def test_quizzes_by_user():
+    assert_indexed(
+        select(Quiz).where(Quiz.user_id == 1).order_by(desc(Quiz.answered_at)),
+        "ix_quiz_user_answered",
+    )
+
+
+def test_progress_by_user_and_question():
+    assert_indexed(
+        select(UserQuestionProgress).where(
+            UserQuestionProgress.user_id == 1, UserQuestionProgress.question_id == 7
+        ),
+        "ux_userquestionprogress_user_question",
+    )
+
+
+def test_due_reviews_by_user():
+    assert_indexed(
+        select(SpacedRepetition)
+        .where(SpacedRepetition.user_id == 1, SpacedRepetition.next_review <= datetime(2024, 1, 1))
+        .order_by(SpacedRepetition.next_review),
+        "ix_spacedrepetition_user_review",
+    )
+
+
+def test_open_session_for_user():
+    assert_indexed(
+        select(UserSession)
+        .where(UserSession.user_id == 1, UserSession.session_end == None)
+        .order_by(desc(UserSession.session_start)),
+        "ix_usersession_user_start",
+    )
+
+
+def test_idle_open_sessions():
+    assert_indexed(
+        select(UserSession).where(UserSession.session_end == None).order_by(UserSession.session_start),
+        "ix_usersession_open",
+    )
+
+
+def question_page():
+    """GET /questions after a cursor, as routers/questions.py builds it"""
+    return (
+        select(Question.id, Problem.title, Problem.difficulty, Question.language)
+        .join(Problem, Problem.id == Question.problem_id)
+        .where(Question.id > 500)
+        .order_by(Question.id)
+        .limit(11)
+    )
+
+
+def test_question_page_by_language():
+    assert_indexed(question_page().where(Question.language == "Python"), "ix_question_language")
+
+
+def test_question_page():
+    steps = plan(question_page())
+    assert "SEARCH question USING INTEGER PRIMARY KEY (rowid>?)" in steps, steps
+    assert "TEMP B-TREE" not in steps, steps
+
+
+if __name__ == "__main__":
+    failed = 0
+    for name, test in [(n, f) for n, f in list(globals().items()) if n.startswith("test_")]:
+        try:
+            test()
+            print(f"✅ {name}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {name}: {e}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Checks for the pre-generated quiz bank, against the fake LLM server.
+
+Each check runs in a fresh interpreter on a scratch SQLite database, since the
+LLM client and the engine are configured at import.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def run_with(*args) -> subprocess.CompletedProcess:
+    """Run this file in a fresh interpreter on a scratch database"""
+    env = {**os.environ, "DATABASE_URL": "sqlite:///./bank.db", "OPENAI_API_KEY": "fake-key",
+           "SECRET_KEY": "test-secret"}
+    return subprocess.run(
+        [sys.executable, os.path.join(HERE, "test_quiz_bank.py"), *args],
+        env=env, cwd=tempfile.mkdtemp(prefix="dsagpt-test-"), capture_output=True, text=True, timeout=120,
+    )
+
+
+def test_fill_bucket_generates_distinct_quizzes():
+    result = run_with("--fill")
+    assert result.returncode == 0, result.stdout + result.stderr
+
+
+def fill(target: int = 6):
+    """Fill one bucket with every generation in flight at once; each must be its own quiz"""
+    import asyncio
+    sys.path.insert(0, os.path.join(HERE, "benchmarks"))
+    import fake_llm
+    os.environ["OPENAI_BASE_URL"] = fake_llm.start_in_thread(0.05)
+
+    from sqlmodel import Session, select
+
+    from database import create_db_and_tables, engine
+    import llm
+    import quiz_bank
+    from models import QuizBankItem
+
+    create_db_and_tables()
+    asyncio.run(quiz_bank.fill_bucket(("Arrays", "Beginner"), target, asyncio.Semaphore(target)))
+    with Session(engine) as session:
+        questions = session.exec(select(QuizBankItem.question)).all()
+    assert len(questions) == target and len(set(questions)) == target, questions
+    assert llm.stats()["coalesced"] == 0, llm.stats()
+    assert quiz_bank.stats()["generated"] == target, quiz_bank.stats()
+    print("quiz bank ok")
+
+
+if __name__ == "__main__":
+    if "--fill" in sys.argv:
+        sys.path.insert(0, HERE)
+        fill()
+        sys.exit(0)
+
+    failed = 0
+    for name, test in [(n, f) for n, f in list(globals().items()) if n.startswith("test_")]:
+        try:
+            test()
+            print(f"✅ {name}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {name}: {e}")
+    sys.exit(1 if failed else 0)
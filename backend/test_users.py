@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Checks for the /users endpoints on a scratch SQLite database.
+"""
+import os
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='dsagpt-test-'), 'users.db')}"
+os.environ.setdefault("SECRET_KEY", "test-secret")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from database import create_db_and_tables  # noqa: E402
+from main import app  # noqa: E402
+
+create_db_and_tables()
+client = TestClient(app)
+
+
+def signed_in(email: str) -> dict:
+    user = {"name": "Test", "email": email, "password": "test-password"}
+    assert client.post("/users/register", json=user).status_code == 200
+    r = client.post("/users/login", json={"email": email, "password": user["password"]})
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def test_update_me():
+    headers = signed_in("update@example.com")
+    r = client.patch("/users/me", json={"name": "Renamed", "dsa_level": "Advanced"}, headers=headers)
+    assert r.status_code == 200, r.text
+    assert r.json()["name"] == "Renamed" and r.json()["preferred_language"] == "Python"
+    # The cached user is dropped once the change commits
+    me = client.get("/users/me", headers=headers).json()
+    assert me["name"] == "Renamed" and me["dsa_level"] == "Advanced", me
+
+
+def test_update_me_rejects_null_and_unknown_level():
+    headers = signed_in("invalid@example.com")
+    for body in ({"name": None}, {"preferred_language": None}, {"dsa_level": None}, {"dsa_level": "Expert"}):
+        r = client.patch("/users/me", json=body, headers=headers)
+        assert r.status_code == 422, (body, r.status_code, r.text)
+    assert client.get("/users/me", headers=headers).json()["name"] == "Test"
+
+
+if __name__ == "__main__":
+    failed = 0
+    with client:
+        for name, test in [(n, f) for n, f in list(globals().items()) if n.startswith("test_")]:
+            try:
+                test()
+                print(f"✅ {name}")
+            except Exception as e:
+                failed += 1
+                print(f"❌ {name}: {e}")
+    sys.exit(1 if failed else 0)
@@ -1042,7 +1042,7 @@ function SolveQuestion() {
     setShowAIDetail(true);
     fetch(apiUrl('ai/question-detail'), {
       method: 'POST',
-      headers: { 'Content-Type': 'application/json' },
+      headers: { 'Content-Type': 'application/json', ...(token ? { 'Authorization': `Bearer ${token}` } : {}) },
       body: JSON.stringify({ title: question.title, description: question.description })
     })
       .then(res => res.ok ? res.json() : Promise.reject(res))
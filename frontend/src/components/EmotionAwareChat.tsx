@@ -30,6 +30,7 @@ interface ChatResponse {
   emotion_category: string;
   quiz?: Quiz;
   should_generate_quiz: boolean;
+  quiz_ticket?: number | null;
 }
 
 const EmotionAwareChat: React.FC = () => {
@@ -105,6 +106,39 @@ const EmotionAwareChat: React.FC = () => {
     }
   };
 
+  const openQuiz = (quiz: Quiz) => {
+    setCurrentQuiz(quiz);
+    setShowQuiz(true);
+    setQuizAnswered(false);
+    setQuizFeedback('');
+    setSelectedAnswer(null);
+    setShowExplanation(false);
+    setShowHint(false);
+    setHintIndex(0);
+    setTimeRemaining(60);
+    // Start timer after a short delay
+    setTimeout(() => startQuizTimer(), 1000);
+  };
+
+  // Quizzes are generated in the background; poll the ticket until it is ready
+  const pollQuizTicket = async (ticket: number, token: string, attempt = 0) => {
+    if (attempt >= 30) return;
+    try {
+      const response = await fetch(apiUrl(`chat/quiz/jobs/${ticket}`), {
+        headers: { 'Authorization': `Bearer ${token}` }
+      });
+      if (!response.ok) return;
+      const job = await response.json();
+      if (job.status === 'done' && job.quiz) {
+        openQuiz(job.quiz);
+      } else if (job.status !== 'failed') {
+        setTimeout(() => pollQuizTicket(ticket, token, attempt + 1), 1000);
+      }
+    } catch (error) {
+      console.error('Error polling quiz ticket:', error);
+    }
+  };
+
   const sendMessage = async (e?: React.FormEvent) => {
     if (e) e.preventDefault();
     if (!input.trim() || loading) return;
@@ -172,19 +206,11 @@ const EmotionAwareChat: React.FC = () => {
         }
       }
 
-      // Handle quiz if generated
+      // Handle quiz if generated, or wait for it in the background
       if (data.quiz && data.should_generate_quiz) {
-        setCurrentQuiz(data.quiz);
-        setShowQuiz(true);
-        setQuizAnswered(false);
-        setQuizFeedback('');
-        setSelectedAnswer(null);
-        setShowExplanation(false);
-        setShowHint(false);
-        setHintIndex(0);
-        setTimeRemaining(60);
-        // Start timer after a short delay
-        setTimeout(() => startQuizTimer(), 1000);
+        openQuiz(data.quiz);
+      } else if (data.quiz_ticket) {
+        pollQuizTicket(data.quiz_ticket, token);
       }
 
     } catch (error) {